@@ -0,0 +1,219 @@
+# backend/benchmarks/chunking.py
+"""
+Compare the word-window TextChunker, the TokenAwareChunker and the
+SemanticChunker (with and without pooled chunk embeddings).
+
+The corpus is a seeded, generated student handbook (every sentence states a
+distinct fact, like a real handbook and unlike the templated HTML fixtures),
+or text files passed with --documents. For each splitter it reports
+chunking throughput, chunk counts and how many of the stored tokens lie
+beyond the model's sequence limit (stored and sent to Gemini, but never
+embedded).
+
+facts_embedded is the share of probe sentences that lie wholly inside the
+embedded part of some chunk, i.e. the best hit rate any query could reach.
+Retrieval hit rate: random sentences from the corpus are turned into queries
+by dropping some of their words; a probe is a hit when one of the top-k
+chunks contains the whole sentence within the part the model embeds.
+
+With --sections each paragraph is passed as its own section, the way the
+DOCX and TXT parsers emit them, and packed splitters are added to show how
+many vectors section packing saves.
+
+Usage (from backend/):
+    python -m benchmarks.chunking
+    python -m benchmarks.chunking --sections
+    python -m benchmarks.chunking --real-embedder --probes 300 --top-k 3 --output chunking.json
+    python -m benchmarks.chunking --documents handbook.txt prospectus.txt
+
+Without --real-embedder the hashing stand-in from benchmarks.fakes is used
+(word-level "tokens", 256 per text), so the numbers show the effect of
+truncation rather than semantic quality.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from config.app_config import AppConfig
+from services.chunker import SemanticChunker, TextChunker, TokenAwareChunker
+from services.embedder import Embedder
+from benchmarks.fakes import HashingEncoder
+
+OFFICES = ["Registrar", "Financial Aid", "Admissions", "Housing", "Career Services", "Library", "Counselling", "IT Help Desk"]
+BUILDINGS = ["Hartley Hall", "Morrow Building", "Ellison Centre", "Quayside Annex", "Birch Pavilion", "Old Mill"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+TEMPLATES = [
+    "The {office} office in {building} room {room} is open from {start}:00 to {end}:00 on {day}.",
+    "Students must submit form {form} to {office} at least {n} days before the end of week {week}.",
+    "A late fee of {fee} dollars applies when the {office} deadline in week {week} is missed.",
+    "Course {course} requires {n} credits and meets in {building} on {day} afternoons.",
+    "Scholarship {form} covers {pct} percent of tuition for students with a grade average above {grade}.",
+    "The {office} hotline {phone} answers questions about form {form} within {n} working days.",
+]
+
+
+def generate_handbook(pages: int, rng: random.Random) -> List[Tuple[str, str]]:
+    """(name, text) documents of unique, fact-bearing sentences in paragraphs."""
+    documents = []
+    for page in range(pages):
+        paragraphs = []
+        for _ in range(rng.randint(6, 9)):
+            sentences = [
+                rng.choice(TEMPLATES).format(
+                    office=rng.choice(OFFICES), building=rng.choice(BUILDINGS), day=rng.choice(DAYS),
+                    room=rng.randint(100, 499), start=rng.randint(7, 10), end=rng.randint(15, 20),
+                    form=f"{rng.choice('ABCDEFGH')}-{rng.randint(10, 99)}", n=rng.randint(2, 30),
+                    week=rng.randint(1, 15), fee=rng.randint(10, 200), course=f"{rng.choice(['CS', 'ME', 'NU', 'MA'])}{rng.randint(100, 499)}",
+                    pct=rng.randint(10, 100), grade=round(rng.uniform(2.5, 3.9), 1), phone=f"555-{rng.randint(1000, 9999)}"
+                )
+                for _ in range(rng.randint(3, 6))
+            ]
+            paragraphs.append(" ".join(sentences))
+        documents.append((f"handbook-p{page + 1}", "\n\n".join(paragraphs)))
+    return documents
+
+
+def load_documents(paths: List[str]) -> List[Tuple[str, str]]:
+    documents = []
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            documents.append((os.path.basename(path), f.read()))
+    return documents
+
+
+def embedded_prefix(embedder: Embedder, tokenizer, text: str) -> str:
+    """The part of text the model actually embeds (up to max_seq_length tokens)."""
+    limit = embedder.max_seq_length or 256
+    encoded = tokenizer([text], add_special_tokens=False, return_offsets_mapping=True)
+    offsets = [o for o in encoded["offset_mapping"][0] if o[1] > o[0]]
+    special = tokenizer.num_special_tokens_to_add(pair=False) if hasattr(tokenizer, "num_special_tokens_to_add") else 2
+    if len(offsets) <= limit - special:
+        return text
+    return text[:offsets[limit - special - 1][1]]
+
+
+def make_probes(documents: List[Tuple[str, str]], count: int, rng: random.Random) -> List[Tuple[str, str]]:
+    sentences = [
+        s.strip() for _, text in documents
+        for s in re.split(r"(?<=[.!?])\s+|\n\n", text) if len(s.split()) >= 8
+    ]
+    probes = []
+    for sentence in rng.sample(sentences, min(count, len(sentences))):
+        words = sentence.split()
+        kept = [w for w in words if rng.random() > 0.3] or words
+        probes.append((" ".join(kept), sentence))
+    return probes
+
+
+def to_sections(text: str, split: bool) -> List[Tuple[int, str]]:
+    if not split:
+        return [(1, text)]
+    paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+    return [(i + 1, p) for i, p in enumerate(paragraphs)]
+
+
+def evaluate(name: str, chunker, documents, embedder: Embedder, tokenizer, probes, top_k: int, sections: bool = False) -> Dict:
+    start = time.perf_counter()
+    spans = []
+    for doc_name, text in documents:
+        spans.extend(chunker.iter_spans(to_sections(text, sections), doc_name))
+    chunks = [span.to_dict() for span in spans]
+    chunk_ms = (time.perf_counter() - start) * 1000
+    total_bytes = sum(len(text.encode()) for _, text in documents)
+
+    token_counts = [len(tokenizer([c["text"]], add_special_tokens=False)["input_ids"][0]) for c in chunks]
+    limit = (embedder.max_seq_length or 256) - (tokenizer.num_special_tokens_to_add(pair=False) if hasattr(tokenizer, "num_special_tokens_to_add") else 2)
+    beyond = sum(max(0, n - limit) for n in token_counts)
+
+    start = time.perf_counter()
+    if spans and all(span.embedding is not None for span in spans):
+        vectors = np.vstack([span.embedding for span in spans])
+    else:
+        vectors = embedder.get_embeddings([c["text"] for c in chunks])
+    embed_ms = (time.perf_counter() - start) * 1000
+    embedded = [embedded_prefix(embedder, tokenizer, c["text"]) for c in chunks]
+
+    queries = embedder.get_embeddings([q for q, _ in probes])
+    scores = queries @ vectors.T
+    reachable = sum(any(sentence in text for text in embedded) for _, sentence in probes)
+    hits = 0
+    for row, (_, sentence) in enumerate(probes):
+        top = np.argsort(-scores[row])[:top_k]
+        hits += any(sentence in embedded[i] for i in top)
+
+    return {
+        "splitter": name,
+        "chunks": len(chunks),
+        "chunk_ms": round(chunk_ms, 2),
+        "mb_per_sec": round(total_bytes / 1e6 / max(chunk_ms / 1000, 1e-9), 2),
+        "mean_tokens": round(float(np.mean(token_counts)), 1) if token_counts else 0.0,
+        "tokens_beyond_limit_pct": round(100 * beyond / max(1, sum(token_counts)), 1),
+        "embed_ms": round(embed_ms, 1),
+        "facts_embedded": round(reachable / max(1, len(probes)), 3),
+        f"hit_rate@{top_k}": round(hits / max(1, len(probes)), 3),
+    }
+
+
+def main(args) -> List[Dict]:
+    config = AppConfig(gemini_api_key="offline", qdrant_url=":memory:")
+    embedder = Embedder(config) if args.real_embedder else Embedder(config, model=HashingEncoder())
+    rng = random.Random(args.seed)
+    documents = load_documents(args.documents) if args.documents else generate_handbook(args.pages, rng)
+    probes = make_probes(documents, args.probes, rng)
+
+    token_chunker = TokenAwareChunker(embedder, max_tokens=args.max_tokens, overlap=args.overlap_tokens)
+    tokenizer = token_chunker._get_tokenizer()
+    splitters = {
+        "words": TextChunker(chunk_size=args.chunk_words, overlap=args.overlap_words),
+        "tokens": token_chunker,
+        "semantic": SemanticChunker(embedder, max_tokens=args.max_tokens, min_tokens=args.min_tokens, tokenizer=tokenizer),
+        "semantic+pool": SemanticChunker(
+            embedder, max_tokens=args.max_tokens, min_tokens=args.min_tokens, tokenizer=tokenizer, pool_embeddings=True
+        ),
+    }
+    if args.sections:
+        splitters["words+pack"] = TextChunker(chunk_size=args.chunk_words, overlap=args.overlap_words, pack_sections=True)
+        splitters["tokens+pack"] = TokenAwareChunker(
+            embedder, max_tokens=args.max_tokens, overlap=args.overlap_tokens, tokenizer=tokenizer, pack_sections=True
+        )
+    return [
+        evaluate(name, chunker, documents, embedder, tokenizer, probes, args.top_k, args.sections)
+        for name, chunker in splitters.items()
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark word- vs token-based chunking")
+    parser.add_argument("--documents", nargs="+", help="Text files to chunk (defaults to a generated handbook)")
+    parser.add_argument("--pages", type=int, default=40, help="Pages of the generated handbook")
+    parser.add_argument("--sections", action="store_true",
+                        help="Pass each paragraph as a section (like DOCX/TXT parsers) and add packed splitters")
+    parser.add_argument("--chunk-words", type=int, default=500)
+    parser.add_argument("--overlap-words", type=int, default=50)
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--overlap-tokens", type=int, default=32)
+    parser.add_argument("--min-tokens", type=int, default=64, help="Semantic chunker minimum chunk size")
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--real-embedder", action="store_true",
+                        help="Use the real SentenceTransformer and its tokenizer (needs the model cached locally)")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = main(args)
+    keys = list(results[0])
+    print("".join(f"{k:>26}" if i else f"{k:<12}" for i, k in enumerate(keys)))
+    for row in results:
+        print("".join(f"{row[k]!s:>26}" if i else f"{row[k]!s:<12}" for i, k in enumerate(keys)))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
@@ -0,0 +1,183 @@
+# backend/benchmarks/embedding_backends.py
+"""
+Compare Embedder backends on CPU: PyTorch, ONNX Runtime (fp32) and ONNX
+Runtime with dynamic int8 quantization.
+
+Every backend encodes the same corpus through Embedder.get_embeddings. The
+report gives load time, bulk throughput (sentences/sec), single-query
+latency, and agreement with the PyTorch vectors. Agreement is measured as
+per-sentence cosine similarity and as the overlap of each query's top-k
+neighbours (what retrieval would return).
+
+The corpus is made of sentences from the generated handbook in
+benchmarks.chunking, or lines of --documents.
+
+Usage (from backend/):
+    python -m benchmarks.embedding_backends
+    python -m benchmarks.embedding_backends --threads 4 --sentences 4000 --output embedding.json
+    python -m benchmarks.embedding_backends --backends torch onnx-int8 --quantization avx512_vnni
+
+Needs the real model (cached locally or downloadable) and, for the ONNX
+backends, sentence-transformers[onnx]. Exported models are written to
+--onnx-dir and reused by later runs.
+"""
+import argparse
+import json
+import logging
+import platform
+import random
+import re
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.app_config import AppConfig
+from services.embedder import Embedder
+from benchmarks.chunking import generate_handbook, load_documents
+from benchmarks.loadtest import summarize
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def detect_quantization() -> str:
+    """Best dynamic-quantization target for this CPU."""
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "arm64"
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return "avx2"
+    if "avx512_vnni" in flags:
+        return "avx512_vnni"
+    if "avx512f" in flags:
+        return "avx512"
+    return "avx2"
+
+
+def make_corpus(args, rng: random.Random) -> List[str]:
+    documents = load_documents(args.documents) if args.documents else generate_handbook(max(1, args.sentences // 30), rng)
+    sentences = [
+        s.strip() for _, text in documents
+        for s in re.split(r"(?<=[.!?])\s+|\n+", text) if len(s.split()) >= 4
+    ]
+    return sentences[:args.sentences]
+
+
+def build_embedder(backend: str, args) -> Embedder:
+    config = AppConfig(
+        gemini_api_key="offline",
+        qdrant_url=":memory:",
+        embedding_backend="torch" if backend == "torch" else "onnx",
+        embedding_quantization=args.quantization if backend == "onnx-int8" else None,
+        embedding_threads=args.threads,
+        embedding_onnx_dir=args.onnx_dir,
+    )
+    return Embedder(config)
+
+
+def top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def unit(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def run_backend(backend: str, args, corpus: List[str], queries: List[str], reference: Optional[Dict]) -> Dict:
+    embedder = build_embedder(backend, args)
+    start = time.perf_counter()
+    embedder.get_embeddings(corpus[:8])  # load (and on first run export) the model
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectors = unit(embedder.get_embeddings(corpus))
+    bulk_s = time.perf_counter() - start
+
+    for query in queries[:5]:
+        embedder.get_embeddings([query])
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        start = time.perf_counter()
+        query_vectors.append(embedder.get_embeddings([query])[0])
+        latencies.append((time.perf_counter() - start) * 1000)
+    query_vectors = unit(np.vstack(query_vectors))
+
+    result = {
+        "backend": embedder.describe_backend(),
+        "load_s": round(load_s, 2),
+        "sentences_per_sec": round(len(corpus) / max(bulk_s, 1e-9), 1),
+        "query_latency_ms": summarize(latencies),
+        "vectors": vectors,
+        "query_vectors": query_vectors,
+    }
+    if reference is not None:
+        cosines = np.einsum("ij,ij->i", vectors, reference["vectors"])
+        ours = top_k(query_vectors, vectors, args.top_k)
+        theirs = top_k(reference["query_vectors"], reference["vectors"], args.top_k)
+        overlap = np.mean([len(set(a) & set(b)) / args.top_k for a, b in zip(ours, theirs)])
+        result["cosine_vs_torch"] = {
+            "mean": round(float(cosines.mean()), 5),
+            "min": round(float(cosines.min()), 5),
+        }
+        result[f"top{args.top_k}_overlap_vs_torch"] = round(float(overlap), 3)
+    return result
+
+
+def main(args) -> List[Dict]:
+    rng = random.Random(args.seed)
+    corpus = make_corpus(args, rng)
+    queries = rng.sample(corpus, min(args.queries, len(corpus)))
+    # Queries are paraphrase-like: sentences with a few words dropped
+    queries = [" ".join(w for w in q.split() if rng.random() > 0.25) or q for q in queries]
+
+    results = []
+    reference = None
+    backends = args.backends if "torch" not in args.backends else ["torch"] + [b for b in args.backends if b != "torch"]
+    for backend in backends:
+        result = run_backend(backend, args, corpus, queries, reference)
+        if backend == "torch":
+            reference = result
+        results.append(result)
+    for result in results:
+        result.pop("vectors")
+        result.pop("query_vectors")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PyTorch vs ONNX Runtime (fp32 / int8) embedding backends")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--quantization", default=None,
+                        help="int8 target: avx2, avx512, avx512_vnni or arm64 (detected from the CPU by default)")
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (0: runtime default)")
+    parser.add_argument("--onnx-dir", default="cache/onnx")
+    parser.add_argument("--documents", nargs="+", help="Text files for the corpus (defaults to a generated handbook)")
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+    args.quantization = args.quantization or detect_quantization()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = main(args)
+    for row in results:
+        latency = row["query_latency_ms"]
+        line = (
+            f"{row['backend']:<18} load {row['load_s']:>6}s  {row['sentences_per_sec']:>8} sent/s  "
+            f"query p50 {latency['p50']:>6}ms p95 {latency['p95']:>6}ms"
+        )
+        if "cosine_vs_torch" in row:
+            line += (
+                f"  cos mean {row['cosine_vs_torch']['mean']} min {row['cosine_vs_torch']['min']}"
+                f"  top{args.top_k} overlap {row[f'top{args.top_k}_overlap_vs_torch']}"
+            )
+        print(line)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
@@ -0,0 +1,132 @@
+# backend/benchmarks/embedding_workers.py
+"""
+Bulk embedding throughput with 1..N embedding worker processes.
+
+The same corpus of chunk-sized texts is encoded through
+Embedder.get_embeddings_for_metadata (the ingestion path), first in-process
+and then with an EmbeddingPool of each worker count. For every setting it
+reports texts/sec, speedup over in-process encoding, parallel efficiency
+(speedup / workers) and the largest difference from the in-process vectors.
+Pool start-up (spawning workers and loading the model) is excluded; it is
+reported separately as start_s.
+
+Usage (from backend/):
+    python -m benchmarks.embedding_workers
+    python -m benchmarks.embedding_workers --workers 1 2 4 8 --texts 8192 --real-embedder
+    python -m benchmarks.embedding_workers --threads 1 --output workers.json
+
+Without --real-embedder the hashing stand-in from benchmarks.fakes is used;
+its encode is pure-Python CPU work, so it shows process scaling and the
+shared-memory transfer overhead but not the model's own threading.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from config.app_config import AppConfig
+from services.embedder import Embedder
+from benchmarks.chunking import generate_handbook
+from benchmarks.fakes import HashingEncoder
+
+
+def make_texts(count: int, rng: random.Random) -> List[str]:
+    sentences = [
+        s.strip() for _, text in generate_handbook(max(1, count // 10), rng)
+        for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()
+    ]
+    # Chunk-like texts of 2 to 16 sentences
+    texts = []
+    while len(texts) < count:
+        start = rng.randrange(len(sentences))
+        texts.append(" ".join(sentences[start:start + rng.randint(2, 16)]))
+    return texts
+
+
+def build_embedder(args, workers: int) -> Embedder:
+    config = AppConfig(
+        gemini_api_key="offline",
+        qdrant_url=":memory:",
+        embedding_threads=args.threads,
+        embedding_workers=workers,
+    )
+    return Embedder(config, model=None if args.real_embedder else HashingEncoder())
+
+
+def run(embedder: Embedder, chunks: List[Dict], repeats: int, out: np.ndarray) -> Dict:
+    best = float("inf")
+    vectors = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        vectors = embedder.get_embeddings_for_metadata(chunks, out=out)
+        best = min(best, time.perf_counter() - start)
+    return {"seconds": round(best, 3), "texts_per_sec": round(len(chunks) / max(best, 1e-9), 1), "vectors": vectors}
+
+
+def main(args) -> List[Dict]:
+    rng = random.Random(args.seed)
+    chunks = [{"text": text} for text in make_texts(args.texts, rng)]
+
+    baseline_embedder = build_embedder(args, 0)
+    baseline_embedder.warmup()
+    # Reused output buffer, like RAGService._embed_and_upload
+    out = np.empty((len(chunks), baseline_embedder.get_embeddings(["dimension"]).shape[1]), dtype=np.float32)
+    baseline = run(baseline_embedder, chunks, args.repeats, out)
+    reference = baseline.pop("vectors").copy()
+    results = [{"workers": 0, "start_s": 0.0, **baseline, "speedup": 1.0, "efficiency": None, "max_abs_diff": 0.0}]
+
+    for workers in args.workers:
+        embedder = build_embedder(args, workers)
+        start = time.perf_counter()
+        embedder.get_embeddings_for_metadata(chunks[:max(256, workers * 64)])  # spawn workers, load the model
+        start_s = time.perf_counter() - start
+        try:
+            row = run(embedder, chunks, args.repeats, out)
+        finally:
+            embedder.close()
+        vectors = row.pop("vectors")
+        speedup = baseline["seconds"] / max(row["seconds"], 1e-9)
+        results.append({
+            "workers": workers,
+            "start_s": round(start_s, 2),
+            **row,
+            "speedup": round(speedup, 2),
+            "efficiency": round(speedup / workers, 2),
+            "max_abs_diff": float(np.abs(vectors - reference).max()) if vectors.shape == reference.shape else None,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark multi-process embedding workers for bulk ingestion")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 4])
+    parser.add_argument("--texts", type=int, default=4096)
+    parser.add_argument("--threads", type=int, default=0,
+                        help="Intra-op threads per worker (0: cpu_count / workers; in-process: runtime default)")
+    parser.add_argument("--repeats", type=int, default=3, help="Best of this many timed runs per setting")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--real-embedder", action="store_true",
+                        help="Use the real SentenceTransformer (needs the model cached locally)")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+    args.workers = sorted(set(w for w in args.workers if w > 1))
+
+    logging.basicConfig(level=logging.WARNING)
+    results = main(args)
+    print(f"{'workers':>8} {'start s':>8} {'seconds':>8} {'texts/s':>9} {'speedup':>8} {'effic.':>7} {'max diff':>9}")
+    for row in results:
+        efficiency = "-" if row["efficiency"] is None else row["efficiency"]
+        diff = "-" if row["max_abs_diff"] is None else f"{row['max_abs_diff']:.1e}"
+        print(
+            f"{row['workers'] or 'inproc':>8} {row['start_s']:>8} {row['seconds']:>8} {row['texts_per_sec']:>9} "
+            f"{row['speedup']:>8} {efficiency:>7} {diff:>9}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
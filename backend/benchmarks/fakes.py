@@ -0,0 +1,204 @@
+# backend/benchmarks/fakes.py
+"""
+Offline stand-ins for the paid/remote services, used by the load-testing
+and benchmark scripts. They plug into the real service classes through
+their constructor injection points, so prompt formatting, chunking and
+vector store code paths are still exercised:
+
+    GeminiClient(config, model=FakeGenerativeModel(...))
+    QdrantVectorStore(config, client=QdrantClient(location=":memory:"))
+    Embedder(config, model=HashingEncoder())
+"""
+import hashlib
+import random
+import re
+import threading
+import time
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+_WORDS = (
+    "the university offers undergraduate and postgraduate programmes across engineering "
+    "science arts commerce and management students can apply online before the admission "
+    "deadline scholarships hostel facilities library laboratories placement cell faculty "
+    "research campus tuition fee structure semester examination eligibility criteria"
+).split()
+
+
+class LatencyDistribution:
+    """
+    Samples a delay in seconds from a configurable distribution.
+
+    Spec strings:
+        "fixed:<ms>"                  always <ms>
+        "uniform:<low_ms>:<high_ms>"  uniform between bounds
+        "lognormal:<median_ms>:<sigma>"  heavy-tailed, closest to real LLM TTFT
+    """
+
+    def __init__(self, spec: str = "lognormal:400:0.5", seed: Optional[int] = None):
+        self.spec = spec
+        self._rng = random.Random(seed)
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(p) for p in params]
+
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(f"Invalid latency distribution spec: {spec}")
+
+    def sample(self) -> float:
+        if self.kind == "fixed":
+            ms = self.params[0]
+        elif self.kind == "uniform":
+            ms = self._rng.uniform(self.params[0], self.params[1])
+        else:
+            median_ms, sigma = self.params
+            ms = self._rng.lognormvariate(np.log(median_ms), sigma)
+        return max(ms, 0.0) / 1000.0
+
+
+class _FakePart:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _FakeUsageMetadata:
+    def __init__(self, prompt_tokens: int, candidate_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = candidate_tokens
+        self.total_token_count = prompt_tokens + candidate_tokens
+
+
+class _FakeResponse:
+    """Mimics the subset of GenerateContentResponse the app reads."""
+
+    def __init__(self, text: str, usage_metadata: Optional[_FakeUsageMetadata] = None):
+        self.text = text
+        self.parts = [_FakePart(text)] if text else []
+        self.usage_metadata = usage_metadata
+
+
+class FakeGenerativeModel:
+    """
+    Drop-in replacement for genai.GenerativeModel.
+
+    Waits a time-to-first-token drawn from the latency distribution, then emits
+    tokens at a fixed rate. Blocking sleeps are intentional: the real SDK call
+    is synchronous too, so the app's threading behaviour is reproduced.
+    """
+
+    def __init__(
+        self,
+        token_rate: float = 50.0,
+        output_tokens: int = 120,
+        tokens_per_chunk: int = 8,
+        latency: Optional[LatencyDistribution] = None,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            token_rate: Generated tokens per second after the first token
+            output_tokens: Tokens per answer
+            tokens_per_chunk: Tokens per streamed chunk
+            latency: Time-to-first-token distribution
+            error_rate: Fraction of calls failing with a quota (429-style) error
+            seed: Seed for reproducible runs
+        """
+        self.token_rate = token_rate
+        self.output_tokens = output_tokens
+        self.tokens_per_chunk = max(1, tokens_per_chunk)
+        self.latency = latency or LatencyDistribution(seed=seed)
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    def _maybe_fail(self) -> None:
+        if self.error_rate and self._rng.random() < self.error_rate:
+            try:
+                from google.api_core.exceptions import ResourceExhausted
+            except ImportError:
+                raise RuntimeError("429 Resource has been exhausted (fake)")
+            raise ResourceExhausted("Resource has been exhausted (fake)")
+
+    def _tokens(self) -> List[str]:
+        return [self._rng.choice(_WORDS) for _ in range(self.output_tokens)]
+
+    def _stream(self, prompt_tokens: int) -> Iterator[_FakeResponse]:
+        time.sleep(self.latency.sample())
+        tokens = self._tokens()
+        delay = self.tokens_per_chunk / self.token_rate if self.token_rate > 0 else 0.0
+        for i in range(0, len(tokens), self.tokens_per_chunk):
+            if i:
+                time.sleep(delay)
+            text = " ".join(tokens[i:i + self.tokens_per_chunk]) + " "
+            last = i + self.tokens_per_chunk >= len(tokens)
+            usage = _FakeUsageMetadata(prompt_tokens, len(tokens)) if last else None
+            yield _FakeResponse(text, usage)
+
+    def generate_content(self, prompt, stream: bool = False, **kwargs):
+        self.calls += 1
+        self._maybe_fail()
+        prompt_tokens = len(str(prompt)) // 4
+
+        if stream:
+            return self._stream(prompt_tokens)
+
+        time.sleep(self.latency.sample())
+        tokens = self._tokens()
+        if self.token_rate > 0:
+            time.sleep(len(tokens) / self.token_rate)
+
+        if "suggest" in str(prompt).lower():
+            text = "\n".join(
+                f"What {' '.join(self._rng.sample(_WORDS, 5))}?" for _ in range(5)
+            )
+        else:
+            text = " ".join(tokens)
+        return _FakeResponse(text, _FakeUsageMetadata(prompt_tokens, len(tokens)))
+
+
+class HashingEncoder:
+    """
+    Deterministic, dependency-free stand-in for SentenceTransformer.
+
+    Hashes word unigrams into a fixed number of dimensions and L2-normalises,
+    so identical texts map to identical vectors and overlapping texts score
+    higher than unrelated ones. Not semantically meaningful.
+
+    call_ms and per_text_ms model a real forward pass: every encode() holds
+    one shared "compute" lock for call_ms + per_text_ms * len(batch), so
+    concurrent small calls queue behind each other like they would on
+    saturated cores, and batching amortises the fixed cost.
+    """
+
+    _compute = threading.Lock()
+
+    def __init__(self, dim: int = 384, max_seq_length: int = 256, call_ms: float = 0.0, per_text_ms: float = 0.0):
+        self.dim = dim
+        self.max_seq_length = max_seq_length
+        self.call_ms = call_ms
+        self.per_text_ms = per_text_ms
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        if self.call_ms or self.per_text_ms:
+            with self._compute:
+                time.sleep((self.call_ms + self.per_text_ms * len(sentences)) / 1000.0)
+
+        out = np.zeros((len(sentences), self.dim), dtype=np.float32)
+        for row, text in enumerate(sentences):
+            for word in re.findall(r"\w+", text.lower())[: self.max_seq_length]:
+                digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                sign = 1.0 if digest[4] & 1 else -1.0
+                out[row, bucket] += sign
+
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
@@ -0,0 +1,92 @@
+# backend/benchmarks/html_extraction.py
+"""
+Compare the BeautifulSoup per-selector extraction with the single-pass lxml
+extractor on recorded university pages (benchmarks/fixtures/html).
+
+For each page it reports parse+extract time, the number of chunks
+flatten_scraped_data() would embed and the characters they contain. The
+legacy path extracts nested matches (article > section > p) repeatedly and
+keeps navigation/footer text, which shows up as extra chunks and characters.
+The single-pass path also feeds the structure-aware WebContentChunker, so its
+chunk count reflects heading-grouped chunks rather than one per element.
+
+Usage (from backend/):
+    python -m benchmarks.html_extraction
+    python -m benchmarks.html_extraction --pages path/to/*.html --iterations 50 --output results.json
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+from typing import Dict, List
+
+from services.scraper import WebScraper
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "html", "*.html")
+
+
+def measure(extract, iterations: int) -> Dict:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        data = extract()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / iterations
+    return {"ms_per_page": round(elapsed_ms, 3), "data": data}
+
+
+def summarize(scraper: WebScraper, data: Dict, url: str) -> Dict:
+    chunks = scraper.flatten_scraped_data(data, url)
+    return {
+        "chunks": len(chunks),
+        "chars": sum(len(c["text"]) for c in chunks),
+    }
+
+
+def run(paths: List[str], selectors: List[str], iterations: int) -> Dict[str, Dict]:
+    scraper = WebScraper()
+    results: Dict[str, Dict] = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            content = f.read()
+        url = f"https://www.northfield.edu/{os.path.basename(path)}"
+        html = content.decode("utf-8", errors="replace")
+
+        legacy = measure(lambda: scraper._extract_with_soup(html, url, selectors, False, False), iterations)
+        # Same tree walk as the streamed production path, parsing the whole page up front
+        single = measure(
+            lambda: scraper._extract_from_root(scraper.extractor.parse(content, "utf-8"), url, selectors, False, False),
+            iterations
+        )
+
+        page = {
+            "bytes": len(content),
+            "legacy": {"ms_per_page": legacy["ms_per_page"], **summarize(scraper, legacy["data"], url)},
+            "single_pass": {"ms_per_page": single["ms_per_page"], **summarize(scraper, single["data"], url)},
+        }
+        page["speedup"] = round(page["legacy"]["ms_per_page"] / max(page["single_pass"]["ms_per_page"], 1e-9), 2)
+        page["chunks_saved"] = page["legacy"]["chunks"] - page["single_pass"]["chunks"]
+        results[os.path.basename(path)] = page
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark HTML extraction strategies")
+    parser.add_argument("--pages", nargs="+", help="HTML files (defaults to the bundled fixtures)")
+    parser.add_argument("--selectors", nargs="+", default=["p", "h1", "h2", "h3", "li", "article", "section"])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    logging.getLogger("services.scraper").setLevel(logging.WARNING)
+    paths = args.pages or sorted(glob.glob(FIXTURES))
+    results = run(paths, args.selectors, args.iterations)
+
+    print(f"{'page':<20}{'legacy ms':>10}{'lxml ms':>10}{'speedup':>9}{'legacy chunks':>15}{'lxml chunks':>13}{'legacy chars':>14}{'lxml chars':>12}")
+    for name, page in results.items():
+        legacy, single = page["legacy"], page["single_pass"]
+        print(f"{name:<20}{legacy['ms_per_page']:>10}{single['ms_per_page']:>10}{page['speedup']:>9}"
+              f"{legacy['chunks']:>15}{single['chunks']:>13}{legacy['chars']:>14}{single['chars']:>12}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
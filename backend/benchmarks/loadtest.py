@@ -0,0 +1,398 @@
+# backend/benchmarks/loadtest.py
+"""
+Offline end-to-end load test for the FastAPI app.
+
+GeminiClient and QdrantVectorStore are swapped for local stand-ins through
+ServiceManager (fake Gemini model with configurable token rate and latency,
+in-memory Qdrant), and the app is driven in-process over ASGI, so no network
+access is needed. Per endpoint it reports throughput, TTFT, p50/p95/p99
+latency and RSS memory.
+
+Usage (from backend/):
+    python -m benchmarks.loadtest --concurrency 16 --requests 200
+    python -m benchmarks.loadtest --output results.json
+    python -m benchmarks.loadtest --baseline results.json --max-regression 0.2
+
+With --baseline the exit code is 1 when any endpoint regresses by more than
+--max-regression in p95 latency or throughput, which makes it usable in CI.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from config.app_config import AppConfig
+from services.embedder import Embedder
+from services.gemini_client import GeminiClient
+from services.vector_store_qdrant import QdrantVectorStore
+from services.services_manager import ServiceManager, set_service_manager
+from benchmarks.fakes import FakeGenerativeModel, HashingEncoder, LatencyDistribution
+
+ENDPOINTS = ("upload-docs", "chat", "chat-stream")
+
+SAMPLE_DOCUMENT = """
+Admissions are open for the undergraduate and postgraduate programmes for the coming academic year.
+Applicants must submit the online form before the deadline together with their transcripts.
+The tuition fee for engineering programmes is charged per semester and scholarships are available
+for meritorious students. The campus offers hostel facilities for boys and girls, a central library,
+modern laboratories and an active placement cell that works with leading recruiters.
+"""
+
+QUERIES = (
+    "What is the tuition fee for engineering?",
+    "Are hostel facilities available?",
+    "How do I apply for admission?",
+    "Which scholarships are offered?",
+)
+
+
+@dataclass
+class RequestResult:
+    status: int
+    latency_ms: float
+    ttft_ms: Optional[float]
+    bytes_received: int
+    error: Optional[str] = None
+
+
+@dataclass
+class EndpointReport:
+    endpoint: str
+    requests: int
+    errors: int
+    concurrency: int
+    duration_s: float
+    throughput_rps: float
+    latency_ms: Dict[str, float] = field(default_factory=dict)
+    ttft_ms: Dict[str, float] = field(default_factory=dict)
+    rss_start_mb: float = 0.0
+    rss_peak_mb: float = 0.0
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "max": round(max(values), 2) if values else 0.0,
+    }
+
+
+def current_rss_mb() -> float:
+    """Current resident set size; falls back to the peak RSS where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class RSSSampler:
+    """Samples RSS on a background thread to capture the peak of a phase."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = current_rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_mb())
+
+
+async def call_asgi(app, request: httpx.Request) -> RequestResult:
+    """
+    Send one request straight into the ASGI app.
+
+    httpx's ASGITransport buffers the whole body, which hides time-to-first-token,
+    so the ASGI protocol is driven directly and the first body chunk is timestamped.
+    """
+    body = request.read()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": request.method,
+        "scheme": "http",
+        "path": request.url.path,
+        "raw_path": request.url.raw_path,
+        "query_string": request.url.query,
+        "root_path": "",
+        "headers": [(k.lower(), v) for k, v in request.headers.raw],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    request_sent = False
+    response_complete = asyncio.Event()
+    status = 0
+    received = 0
+    chunks: List[bytes] = []
+    first_byte: Optional[float] = None
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, received, first_byte
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            data = message.get("body", b"")
+            if data:
+                if first_byte is None:
+                    first_byte = time.perf_counter()
+                received += len(data)
+                chunks.append(data)
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    start = time.perf_counter()
+    try:
+        await app(scope, receive, send)
+    except Exception as e:
+        return RequestResult(500, (time.perf_counter() - start) * 1000, None, received, str(e))
+    finally:
+        response_complete.set()
+    end = time.perf_counter()
+
+    error = None
+    payload = b"".join(chunks)
+    if status >= 400:
+        error = payload[:200].decode(errors="replace")
+    elif b'"error"' in payload:
+        # SSE endpoints report failures in-band with a 200 status
+        error = payload[:200].decode(errors="replace")
+
+    ttft = (first_byte - start) * 1000 if first_byte is not None else None
+    return RequestResult(status, (end - start) * 1000, ttft, received, error)
+
+
+def build_upload_request(session_id: str, doc_bytes: bytes) -> httpx.Request:
+    return httpx.Request(
+        "POST",
+        "http://testserver/upload-docs",
+        data={"session_id": session_id},
+        files=[("files", (f"brochure-{uuid.uuid4().hex[:8]}.txt", doc_bytes, "text/plain"))],
+    )
+
+
+def build_chat_request(session_id: str, query: str) -> httpx.Request:
+    return httpx.Request("POST", "http://testserver/chat", json={"query": query, "session_id": session_id})
+
+
+def build_chat_stream_request(session_id: str, query: str) -> httpx.Request:
+    return httpx.Request("POST", "http://testserver/chat-stream", data={"query": query, "session_id": session_id})
+
+
+async def run_phase(
+    app,
+    endpoint: str,
+    make_request: Callable[[int], httpx.Request],
+    total: int,
+    concurrency: int
+) -> Tuple[EndpointReport, List[RequestResult]]:
+    """Fire `total` requests at `concurrency` and aggregate the results."""
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+    results: List[RequestResult] = []
+
+    async def worker():
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results.append(await call_asgi(app, make_request(i)))
+
+    rss_start = current_rss_mb()
+    with RSSSampler() as sampler:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.perf_counter() - start
+
+    ok = [r for r in results if r.error is None]
+    report = EndpointReport(
+        endpoint=endpoint,
+        requests=len(results),
+        errors=len(results) - len(ok),
+        concurrency=concurrency,
+        duration_s=round(duration, 3),
+        throughput_rps=round(len(ok) / duration, 2) if duration > 0 else 0.0,
+        latency_ms=summarize([r.latency_ms for r in ok]),
+        ttft_ms=summarize([r.ttft_ms for r in ok if r.ttft_ms is not None]),
+        rss_start_mb=round(rss_start, 1),
+        rss_peak_mb=round(sampler.peak, 1),
+    )
+    return report, results
+
+
+def build_offline_service_manager(args) -> ServiceManager:
+    """Wire the real services around offline stand-ins."""
+    from qdrant_client import QdrantClient
+
+    config = AppConfig(gemini_api_key="offline", qdrant_url=":memory:")
+    model = FakeGenerativeModel(
+        token_rate=args.token_rate,
+        output_tokens=args.output_tokens,
+        latency=LatencyDistribution(args.latency, seed=args.seed),
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    embedder = Embedder(config) if args.real_embedder else Embedder(config, model=HashingEncoder())
+    return ServiceManager(
+        config,
+        embedder=embedder,
+        vector_store=QdrantVectorStore(config, client=QdrantClient(location=":memory:")),
+        gemini_client=GeminiClient(config, model=model),
+    )
+
+
+async def run(args) -> Dict[str, EndpointReport]:
+    set_service_manager(build_offline_service_manager(args))
+    # Imported late so the routes pick up the offline ServiceManager
+    from main import app
+
+    logging.getLogger().setLevel(args.log_level)
+    doc_bytes = (SAMPLE_DOCUMENT * args.doc_repeat).encode()
+    chat_session = f"loadtest-{uuid.uuid4().hex[:8]}"
+    reports: Dict[str, EndpointReport] = {}
+
+    async with app.router.lifespan_context(app):
+        # Seed the collection the chat endpoints query
+        seed = await call_asgi(app, build_upload_request(chat_session, doc_bytes))
+        if seed.error:
+            raise RuntimeError(f"Failed to seed chat session: {seed.error}")
+
+        builders = {
+            "upload-docs": lambda i: build_upload_request(f"loadtest-upload-{i}", doc_bytes),
+            "chat": lambda i: build_chat_request(chat_session, QUERIES[i % len(QUERIES)]),
+            "chat-stream": lambda i: build_chat_stream_request(chat_session, QUERIES[i % len(QUERIES)]),
+        }
+        for endpoint in args.endpoints:
+            report, results = await run_phase(
+                app, endpoint, builders[endpoint], args.requests, args.concurrency
+            )
+            reports[endpoint] = report
+            for r in [r for r in results if r.error][:3]:
+                print(f"  {endpoint} error sample: {r.error}", file=sys.stderr)
+
+    return reports
+
+
+def compare_to_baseline(reports: Dict[str, EndpointReport], baseline: Dict, tolerance: float) -> List[str]:
+    """Return human-readable regressions against a previous results file."""
+    regressions = []
+    for endpoint, report in reports.items():
+        base = baseline.get("endpoints", {}).get(endpoint)
+        if not base:
+            continue
+        base_p95 = base["latency_ms"].get("p95", 0.0)
+        if base_p95 and report.latency_ms["p95"] > base_p95 * (1 + tolerance):
+            regressions.append(f"{endpoint}: p95 {report.latency_ms['p95']}ms vs baseline {base_p95}ms")
+        base_rps = base.get("throughput_rps", 0.0)
+        if base_rps and report.throughput_rps < base_rps * (1 - tolerance):
+            regressions.append(f"{endpoint}: throughput {report.throughput_rps}rps vs baseline {base_rps}rps")
+        if report.errors > base.get("errors", 0):
+            regressions.append(f"{endpoint}: {report.errors} errors vs baseline {base.get('errors', 0)}")
+    return regressions
+
+
+def print_table(reports: Dict[str, EndpointReport]) -> None:
+    header = f"{'endpoint':<14}{'reqs':>6}{'err':>5}{'rps':>9}{'ttft p50':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'rss peak':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in reports.values():
+        print(
+            f"{r.endpoint:<14}{r.requests:>6}{r.errors:>5}{r.throughput_rps:>9.2f}"
+            f"{r.ttft_ms['p50']:>10.1f}{r.latency_ms['p50']:>9.1f}{r.latency_ms['p95']:>9.1f}"
+            f"{r.latency_ms['p99']:>9.1f}{r.rss_peak_mb:>9.1f}M"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test for the chatbot API")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=50, help="Requests per endpoint")
+    parser.add_argument("--token-rate", type=float, default=80.0, help="Fake Gemini tokens/sec")
+    parser.add_argument("--output-tokens", type=int, default=120, help="Fake Gemini tokens per answer")
+    parser.add_argument("--latency", default="lognormal:400:0.5",
+                        help="Fake Gemini TTFT distribution: fixed:MS | uniform:LO:HI | lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake Gemini calls raising 429")
+    parser.add_argument("--doc-repeat", type=int, default=20, help="Size multiplier for the uploaded document")
+    parser.add_argument("--real-embedder", action="store_true",
+                        help="Use the real SentenceTransformer (needs the model cached locally)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed relative regression before failing (default 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    reports = asyncio.run(run(args))
+    print_table(reports)
+
+    results = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "endpoints": {name: asdict(r) for name, r in reports.items()},
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(reports, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
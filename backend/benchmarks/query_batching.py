@@ -0,0 +1,132 @@
+# backend/benchmarks/query_batching.py
+"""
+Query embedding throughput and latency with and without micro-batching.
+
+Closed-loop clients (threads, like the request worker threads that call
+RAGService.query_rag) each embed queries back to back, either directly
+through Embedder.get_embeddings([query]) or through the
+QueryEmbeddingBatcher. For every concurrency level it reports queries/sec,
+p50/p95/p99 latency and the mean batch size.
+
+Usage (from backend/):
+    python -m benchmarks.query_batching
+    python -m benchmarks.query_batching --concurrency 1 8 32 --requests 2000 --real-embedder
+    python -m benchmarks.query_batching --call-ms 6 --per-text-ms 0.4 --output batching.json
+
+Without --real-embedder the HashingEncoder stand-in simulates a forward pass
+that costs --call-ms + --per-text-ms per text on one shared compute unit.
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, List
+
+from config.app_config import AppConfig
+from services.embedder import Embedder
+from services.embedding_batcher import QueryEmbeddingBatcher
+from benchmarks.chunking import TEMPLATES
+from benchmarks.fakes import HashingEncoder
+from benchmarks.loadtest import summarize
+
+
+def make_queries(count: int, rng: random.Random) -> List[str]:
+    words = " ".join(TEMPLATES).replace("{", " ").replace("}", " ").split()
+    return [" ".join(rng.sample(words, rng.randint(5, 14))) + "?" for _ in range(count)]
+
+
+def drive(embed: Callable[[str], object], queries: List[str], concurrency: int) -> Dict:
+    latencies: List[float] = []
+    lock = threading.Lock()
+    cursor = iter(queries)
+
+    def client() -> None:
+        while True:
+            with lock:
+                query = next(cursor, None)
+            if query is None:
+                return
+            start = time.perf_counter()
+            embed(query)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    return {"qps": round(len(latencies) / wall, 1), "latency_ms": summarize(latencies)}
+
+
+class CountingEmbedder:
+    """Records the size of every encode call made through it."""
+
+    def __init__(self, embedder: Embedder):
+        self.embedder = embedder
+        self.batches: List[int] = []
+
+    def get_embeddings(self, texts: List[str]):
+        self.batches.append(len(texts))
+        return self.embedder.get_embeddings(texts)
+
+
+def main(args) -> List[Dict]:
+    config = AppConfig(gemini_api_key="offline", qdrant_url=":memory:")
+    model = None if args.real_embedder else HashingEncoder(call_ms=args.call_ms, per_text_ms=args.per_text_ms)
+    embedder = Embedder(config, model=model)
+    rng = random.Random(args.seed)
+    embedder.get_embeddings(make_queries(4, rng))  # load the model
+
+    results = []
+    for concurrency in args.concurrency:
+        queries = make_queries(args.requests, rng)
+        direct = drive(lambda q: embedder.get_embeddings([q]), queries, concurrency)
+
+        counting = CountingEmbedder(embedder)
+        batcher = QueryEmbeddingBatcher(counting, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+        batched = drive(batcher.embed, queries, concurrency)
+        batcher.close()
+
+        results.append({
+            "concurrency": concurrency,
+            "direct": direct,
+            "batched": batched,
+            "mean_batch_size": round(sum(counting.batches) / max(1, len(counting.batches)), 2),
+            "speedup": round(batched["qps"] / max(direct["qps"], 1e-9), 2),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched query embedding")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=1000, help="Queries per concurrency level and mode")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--call-ms", type=float, default=5.0, help="Stand-in encoder: fixed cost per encode call")
+    parser.add_argument("--per-text-ms", type=float, default=0.3, help="Stand-in encoder: cost per text")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--real-embedder", action="store_true",
+                        help="Use the real SentenceTransformer (needs the model cached locally)")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = main(args)
+    print(f"{'conc':>5} {'direct qps':>11} {'p50':>8} {'p95':>8} {'batched qps':>12} {'p50':>8} {'p95':>8} {'batch':>6} {'speedup':>8}")
+    for row in results:
+        d, b = row["direct"], row["batched"]
+        print(
+            f"{row['concurrency']:>5} {d['qps']:>11} {d['latency_ms']['p50']:>8} {d['latency_ms']['p95']:>8} "
+            f"{b['qps']:>12} {b['latency_ms']['p50']:>8} {b['latency_ms']['p95']:>8} "
+            f"{row['mean_batch_size']:>6} {row['speedup']:>8}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
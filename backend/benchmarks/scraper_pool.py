@@ -0,0 +1,133 @@
+# backend/benchmarks/scraper_pool.py
+"""
+Per-page scrape latency with a fresh HTTP client per page vs. the shared pool.
+
+A local keep-alive HTTP/1.1 server serves a university-style page; a delay
+on every new connection stands in for the TCP + TLS handshake a real site
+costs (the stdlib server can't do TLS/HTTP/2, so this measures connection
+reuse, not multiplexing). Reports per-page latency, throughput and how many
+connections the server saw.
+
+Usage (from backend/):
+    python -m benchmarks.scraper_pool --pages 200 --concurrency 8 --connect-delay-ms 60
+"""
+import argparse
+import asyncio
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from services.scraper import WebScraper
+
+PAGE = (
+    "<html><head><title>Admissions</title>"
+    '<meta name="description" content="Undergraduate admissions"></head><body>'
+    + "".join(
+        f"<section><h2>Programme {i}</h2><p>Entry requirements, fees and deadlines for programme {i}.</p>"
+        f"<ul><li>Duration: 4 years</li><li>Intake: Fall</li></ul></section>"
+        for i in range(40)
+    )
+    + "</body></html>"
+).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connect_delay = 0.0
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with _Handler.lock:
+            _Handler.connections += 1
+        time.sleep(self.connect_delay)
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(connect_delay_ms: float) -> ThreadingHTTPServer:
+    _Handler.connect_delay = connect_delay_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+async def run_mode(mode: str, urls: List[str], concurrency: int) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    shared = WebScraper(max_connections_per_host=concurrency)
+    latencies: List[float] = []
+
+    async def scrape(url: str) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            if mode == "per-request":
+                # Previous behaviour: a new client (and connection) for every page
+                scraper = WebScraper()
+                try:
+                    data = await scraper.scrape_page(url)
+                finally:
+                    await scraper.aclose()
+            else:
+                data = await shared.scrape_page(url)
+            if not data:
+                raise RuntimeError(f"Empty scrape for {url}")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    _Handler.connections = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(scrape(url) for url in urls))
+    duration = time.perf_counter() - started
+    await shared.aclose()
+
+    return {
+        "pages": len(urls),
+        "pages_per_sec": round(len(urls) / duration, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "connections": _Handler.connections,
+    }
+
+
+async def main(args) -> Dict[str, Dict]:
+    server = start_server(args.connect_delay_ms)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/programmes/{i}" for i in range(args.pages)]
+    try:
+        return {mode: await run_mode(mode, urls, args.concurrency) for mode in ("per-request", "pooled")}
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pooled scraper HTTP client")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--connect-delay-ms", type=float, default=50.0,
+                        help="Simulated handshake cost per new connection")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    for mode, stats in results.items():
+        print(f"{mode:>12}: {stats}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
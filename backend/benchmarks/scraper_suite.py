@@ -0,0 +1,345 @@
+# backend/benchmarks/scraper_suite.py
+"""
+Offline WebScraper benchmark suite.
+
+The recorded university pages in benchmarks/fixtures/html are served from an
+in-process HTTP server that adds a configurable time to first byte and
+throttles bandwidth, so runs are reproducible without network access.
+Scenarios:
+
+    parse                  streamed lxml parse + extraction per fixture (no network)
+    scrape_page            pages fetched one after another with scrape_page()
+    scrape_multiple_pages  the same pages through scrape_multiple_pages()
+    ingest                 index_scraped_urls_to_qdrant() with the offline stand-ins
+                           (hashing encoder, in-memory Qdrant; needs qdrant-client)
+
+For each it reports pages/sec, bytes/sec, parse time per page, chunks
+produced and peak RSS, and writes everything as JSON for comparisons.
+
+Usage (from backend/):
+    python -m benchmarks.scraper_suite
+    python -m benchmarks.scraper_suite --pages 300 --concurrency 16 --latency-ms 80 --bandwidth-kbps 2000
+    python -m benchmarks.scraper_suite --output scraper.json --baseline previous.json --max-regression 0.2
+
+With --baseline the exit code is 1 when pages/sec or parse time regresses by
+more than --max-regression, so it can gate CI like benchmarks.loadtest.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import AsyncIterator, Dict, List, Optional
+
+from services.scraper import WebScraper
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "html", "*.html")
+SCENARIOS = ("parse", "scrape_page", "scrape_multiple_pages", "ingest")
+SELECTORS = ["p", "h1", "h2", "h3", "li", "article", "section"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "max": round(max(values), 2) if values else 0.0,
+    }
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return 0.0
+
+
+class RSSSampler:
+    """Samples RSS on a background thread to capture the peak of a scenario."""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = current_rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_mb())
+
+
+class FixtureServer:
+    """
+    Serves fixture pages at /<fixture>/<n> with a delay before the response
+    (time to first byte) and an optional bandwidth cap per connection.
+    """
+
+    def __init__(self, pages: Dict[str, bytes], latency_ms: float = 0.0, bandwidth_kbps: float = 0.0, chunk_size: int = 16384):
+        self.pages = pages
+        self.latency = latency_ms / 1000
+        self.bandwidth = bandwidth_kbps * 1024 / 8  # bytes per second
+        self.chunk_size = chunk_size
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                body = server.pages.get(self.path.strip("/").split("/")[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                time.sleep(server.latency)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                for start in range(0, len(body), server.chunk_size):
+                    chunk = body[start:start + server.chunk_size]
+                    self.wfile.write(chunk)
+                    if server.bandwidth:
+                        time.sleep(len(chunk) / server.bandwidth)
+                with server._lock:
+                    server.bytes_sent += len(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> str:
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+async def _chunks(content: bytes, size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(content), size):
+        yield content[start:start + size]
+
+
+async def bench_parse(pages: Dict[str, bytes], iterations: int) -> Dict[str, Dict]:
+    """Time the streamed parse + extraction path on each fixture, without network I/O."""
+    scraper = WebScraper()
+    results = {}
+    for name, content in pages.items():
+        url = f"https://www.northfield.edu/{name}"
+        start = time.perf_counter()
+        for _ in range(iterations):
+            data, _ = await scraper._scrape_html(_chunks(content, 16384), "utf-8", url, SELECTORS, True, False)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / iterations
+        results[name] = {
+            "bytes": len(content),
+            "parse_ms": round(elapsed_ms, 3),
+            "chunks": len(scraper.flatten_scraped_data(data, url)),
+        }
+    return results
+
+
+def count_chunks(scraper: WebScraper, scraped: Dict[str, Dict]) -> int:
+    return sum(len(scraper.flatten_scraped_data(data, url)) for url, data in scraped.items() if data)
+
+
+async def run_scenario(name: str, urls: List[str], server: FixtureServer, args) -> Dict:
+    scraper = WebScraper(max_connections=max(args.concurrency, 10), max_connections_per_host=args.concurrency)
+    latencies: List[float] = []
+    errors = 0
+    chunks = 0
+    server.bytes_sent = 0
+
+    with RSSSampler() as sampler:
+        started = time.perf_counter()
+        if name == "scrape_page":
+            scraped = {}
+            for url in urls:
+                page_start = time.perf_counter()
+                scraped[url] = await scraper.scrape_page(url)
+                latencies.append((time.perf_counter() - page_start) * 1000)
+            duration = time.perf_counter() - started
+        elif name == "scrape_multiple_pages":
+            scraped = await scraper.scrape_multiple_pages(urls, concurrency=args.concurrency)
+            duration = time.perf_counter() - started
+        else:
+            rag_service = build_offline_rag_service(scraper)
+            results = await rag_service.index_scraped_urls_to_qdrant(
+                urls, SELECTORS, "scraper-bench", concurrency=args.concurrency, incremental=False
+            )
+            duration = time.perf_counter() - started
+            errors = sum(1 for r in results.values() if r["status"] == "failed")
+            chunks = sum(r.get("chunks", 0) for r in results.values())
+            scraped = None
+
+    if scraped is not None:
+        errors = sum(1 for data in scraped.values() if not data)
+        chunks = count_chunks(scraper, scraped)
+    await scraper.aclose()
+
+    report = {
+        "pages": len(urls),
+        "errors": errors,
+        "duration_s": round(duration, 3),
+        "pages_per_sec": round(len(urls) / duration, 2),
+        "bytes_per_sec": round(server.bytes_sent / duration),
+        "chunks": chunks,
+        "rss_peak_mb": round(sampler.peak, 1),
+    }
+    if latencies:
+        report["latency_ms"] = summarize(latencies)
+    return report
+
+
+def build_offline_rag_service(scraper: WebScraper):
+    """RAGService around the offline stand-ins used by benchmarks.loadtest."""
+    from qdrant_client import QdrantClient
+    from config.app_config import AppConfig
+    from services.chatbot import RAGService
+    from services.embedder import Embedder
+    from services.gemini_client import GeminiClient
+    from services.vector_store_qdrant import QdrantVectorStore
+    from benchmarks.fakes import FakeGenerativeModel, HashingEncoder
+
+    config = AppConfig(gemini_api_key="offline", qdrant_url=":memory:", scraper_cache_path=None)
+    return RAGService(
+        config,
+        Embedder(config, model=HashingEncoder()),
+        QdrantVectorStore(config, client=QdrantClient(location=":memory:")),
+        GeminiClient(config, model=FakeGenerativeModel()),
+        scraper
+    )
+
+
+async def run(args) -> Dict:
+    paths = args.fixtures or sorted(glob.glob(FIXTURES))
+    pages = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            pages[os.path.splitext(os.path.basename(path))[0]] = f.read()
+
+    results: Dict = {"scenarios": {}}
+    if "parse" in args.scenarios:
+        results["parse"] = await bench_parse(pages, args.parse_iterations)
+
+    server = FixtureServer(pages, args.latency_ms, args.bandwidth_kbps)
+    base = server.start()
+    names = list(pages)
+    urls = [f"{base}/{names[i % len(names)]}/{i}" for i in range(args.pages)]
+    try:
+        for name in args.scenarios:
+            if name != "parse":
+                results["scenarios"][name] = await run_scenario(name, urls, server, args)
+    finally:
+        server.stop()
+    return results
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Return human-readable regressions against a previous results file."""
+    regressions = []
+    for name, report in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base and base.get("pages_per_sec") and report["pages_per_sec"] < base["pages_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: {report['pages_per_sec']} pages/s vs baseline {base['pages_per_sec']}")
+        if base and report["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: {report['errors']} errors vs baseline {base.get('errors', 0)}")
+    for page, report in results.get("parse", {}).items():
+        base = baseline.get("parse", {}).get(page)
+        if base and report["parse_ms"] > base["parse_ms"] * (1 + tolerance):
+            regressions.append(f"parse {page}: {report['parse_ms']}ms vs baseline {base['parse_ms']}ms")
+    return regressions
+
+
+def print_tables(results: Dict) -> None:
+    if "parse" in results:
+        print(f"{'fixture':<16}{'bytes':>9}{'parse ms':>10}{'chunks':>8}")
+        for name, page in results["parse"].items():
+            print(f"{name:<16}{page['bytes']:>9}{page['parse_ms']:>10}{page['chunks']:>8}")
+        print()
+    header = f"{'scenario':<24}{'pages':>6}{'err':>5}{'pages/s':>9}{'KB/s':>9}{'p50 ms':>8}{'chunks':>8}{'rss peak':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results["scenarios"].items():
+        p50 = r.get("latency_ms", {}).get("p50", "-")
+        print(f"{name:<24}{r['pages']:>6}{r['errors']:>5}{r['pages_per_sec']:>9}{r['bytes_per_sec'] // 1024:>9}"
+              f"{p50:>8}{r['chunks']:>8}{r['rss_peak_mb']:>9}M")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline WebScraper benchmark suite")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--fixtures", nargs="+", help="HTML files to serve (defaults to the bundled fixtures)")
+    parser.add_argument("--pages", type=int, default=120, help="Pages fetched per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Server time to first byte")
+    parser.add_argument("--bandwidth-kbps", type=float, default=0.0, help="Per-connection bandwidth cap (0 = unthrottled)")
+    parser.add_argument("--parse-iterations", type=int, default=20)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed relative regression before failing (default 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level)
+    logging.getLogger().setLevel(args.log_level)
+    results = asyncio.run(run(args))
+    print_tables(results)
+
+    results = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        **results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
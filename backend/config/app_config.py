@@ -1,6 +1,6 @@
 import os
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Tuple
 
 @dataclass
 class AppConfig:
@@ -15,9 +15,70 @@ class AppConfig:
     langsmith_tracing: bool = False
     chunk_size: int = 500
     chunk_overlap: int = 50
+    chunk_mode: str = "tokens"  # "tokens" (fit the embedder's sequence limit), "semantic" (split at topic shifts) or "words"
+    chunk_tokens: int = 256
+    chunk_overlap_tokens: int = 32
+    chunk_pack_sections: bool = True  # merge small consecutive sections (DOCX paragraphs, TXT lines)
+    chunk_min_tokens: int = 64  # semantic mode: tokens before a topic shift may end a chunk
+    chunk_breakpoint_percentile: float = 90.0  # semantic mode: sentence distances above this percentile are topic shifts
+    chunk_pool_embeddings: bool = False  # semantic mode: index mean-pooled sentence embeddings instead of re-embedding chunks
+    ingest_workers: int = 0  # processes for the per-file parse+chunk stage of uploads (0 or 1: in-process)
     top_k: int = 3
     log_level: str = "INFO"
 
+    # Embedding model runtime
+    embedding_backend: str = "torch"  # "torch" or "onnx" (ONNX Runtime on CPU)
+    embedding_quantization: Optional[str] = None  # onnx only: dynamic int8 for "avx2", "avx512", "avx512_vnni" or "arm64"
+    embedding_threads: int = 0  # intra-op threads for encoding (0: runtime default)
+    embedding_onnx_dir: str = "cache/onnx"  # exported / quantized ONNX models, reused across restarts
+    embedding_batch_tokens: int = 0  # padded tokens per encode batch (0: sized to available memory)
+    embedding_max_batch_size: int = 256
+    embedding_workers: int = 0  # processes encoding bulk ingestion batches (0 or 1: in-process)
+    query_batching: bool = True  # micro-batch query embeddings of concurrent requests
+    query_batch_max_size: int = 32
+    query_batch_max_wait_ms: float = 2.0
+    warmup_enabled: bool = True  # load and warm models at startup; /ready reports 503 until done
+    warmup_ocr: bool = False  # also preload the EasyOCR readers (slow, memory-heavy)
+    warmup_gemini: bool = True  # open the Gemini connection with a count_tokens call
+
+    # Gemini request scheduling
+    gemini_requests_per_minute: int = 1000
+    gemini_tokens_per_minute: int = 1000000
+    gemini_max_concurrency: int = 16
+    gemini_max_retries: int = 3
+    gemini_hedge_enabled: bool = False
+    gemini_hedge_min_ms: int = 300
+    gemini_hedge_default_ms: int = 2000
+
+    # Web scraping HTTP client
+    scraper_max_connections: int = 20
+    scraper_max_connections_per_host: int = 6
+    scraper_http2: bool = True
+    scraper_dns_cache_ttl: int = 300
+    scraper_cache_path: Optional[str] = "cache/http_cache.sqlite"
+    scraper_max_page_bytes: int = 5 * 1024 * 1024
+    scraper_max_document_bytes: int = 50 * 1024 * 1024
+    web_chunk_tokens: int = 256
+
+    # Site crawling limits
+    crawl_max_depth: int = 2
+    crawl_max_pages: int = 100
+    crawl_concurrency: int = 8
+    crawl_delay: float = 0.5
+
+    # Sitemap-driven recrawl of the shared corpus (disabled without sitemap URLs)
+    sitemap_urls: Tuple[str, ...] = ()
+    sitemap_collection: str = "university_corpus"
+    sitemap_interval: int = 3600
+    sitemap_max_pages: int = 500
+    sitemap_max_age: int = 604800
+
+    # Near-duplicate chunk removal before embedding
+    dedup_enabled: bool = True
+    dedup_threshold: float = 0.8
+    dedup_max_collections: int = 256
+    dedup_idle_ttl: int = 86400
+
     @classmethod
     def from_env(cls):
         return cls(
@@ -29,6 +90,55 @@ class AppConfig:
             langsmith_tracing=os.getenv("LANGCHAIN_TRACING_V2", "false").lower() == "true",
             chunk_size=int(os.getenv("CHUNK_SIZE", "500")),
             chunk_overlap=int(os.getenv("CHUNK_OVERLAP", "50")),
+            chunk_mode=os.getenv("CHUNK_MODE", "tokens").lower(),
+            chunk_tokens=int(os.getenv("CHUNK_TOKENS", "256")),
+            chunk_overlap_tokens=int(os.getenv("CHUNK_OVERLAP_TOKENS", "32")),
+            chunk_pack_sections=os.getenv("CHUNK_PACK_SECTIONS", "true").lower() == "true",
+            chunk_min_tokens=int(os.getenv("CHUNK_MIN_TOKENS", "64")),
+            chunk_breakpoint_percentile=float(os.getenv("CHUNK_BREAKPOINT_PERCENTILE", "90")),
+            chunk_pool_embeddings=os.getenv("CHUNK_POOL_EMBEDDINGS", "false").lower() == "true",
+            ingest_workers=int(os.getenv("INGEST_WORKERS", "0")),
             top_k=int(os.getenv("TOP_K", "3")),
-            log_level=os.getenv("LOG_LEVEL", "INFO")
+            log_level=os.getenv("LOG_LEVEL", "INFO"),
+            embedding_backend=os.getenv("EMBEDDING_BACKEND", "torch").lower(),
+            embedding_quantization=os.getenv("EMBEDDING_QUANTIZATION") or None,
+            embedding_threads=int(os.getenv("EMBEDDING_THREADS", "0")),
+            embedding_onnx_dir=os.getenv("EMBEDDING_ONNX_DIR", "cache/onnx"),
+            embedding_batch_tokens=int(os.getenv("EMBEDDING_BATCH_TOKENS", "0")),
+            embedding_max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "256")),
+            embedding_workers=int(os.getenv("EMBEDDING_WORKERS", "0")),
+            query_batching=os.getenv("QUERY_BATCHING", "true").lower() == "true",
+            query_batch_max_size=int(os.getenv("QUERY_BATCH_MAX_SIZE", "32")),
+            query_batch_max_wait_ms=float(os.getenv("QUERY_BATCH_MAX_WAIT_MS", "2")),
+            warmup_enabled=os.getenv("WARMUP_ENABLED", "true").lower() == "true",
+            warmup_ocr=os.getenv("WARMUP_OCR", "false").lower() == "true",
+            warmup_gemini=os.getenv("WARMUP_GEMINI", "true").lower() == "true",
+            gemini_requests_per_minute=int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "1000")),
+            gemini_tokens_per_minute=int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000")),
+            gemini_max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "16")),
+            gemini_max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "3")),
+            gemini_hedge_enabled=os.getenv("GEMINI_HEDGE_ENABLED", "false").lower() == "true",
+            gemini_hedge_min_ms=int(os.getenv("GEMINI_HEDGE_MIN_MS", "300")),
+            gemini_hedge_default_ms=int(os.getenv("GEMINI_HEDGE_DEFAULT_MS", "2000")),
+            scraper_max_connections=int(os.getenv("SCRAPER_MAX_CONNECTIONS", "20")),
+            scraper_max_connections_per_host=int(os.getenv("SCRAPER_MAX_CONNECTIONS_PER_HOST", "6")),
+            scraper_http2=os.getenv("SCRAPER_HTTP2", "true").lower() == "true",
+            scraper_dns_cache_ttl=int(os.getenv("SCRAPER_DNS_CACHE_TTL", "300")),
+            scraper_cache_path=os.getenv("SCRAPER_CACHE_PATH", "cache/http_cache.sqlite") or None,
+            scraper_max_page_bytes=int(os.getenv("SCRAPER_MAX_PAGE_BYTES", str(5 * 1024 * 1024))),
+            scraper_max_document_bytes=int(os.getenv("SCRAPER_MAX_DOCUMENT_BYTES", str(50 * 1024 * 1024))),
+            web_chunk_tokens=int(os.getenv("WEB_CHUNK_TOKENS", "256")),
+            crawl_max_depth=int(os.getenv("CRAWL_MAX_DEPTH", "2")),
+            crawl_max_pages=int(os.getenv("CRAWL_MAX_PAGES", "100")),
+            crawl_concurrency=int(os.getenv("CRAWL_CONCURRENCY", "8")),
+            crawl_delay=float(os.getenv("CRAWL_DELAY", "0.5")),
+            sitemap_urls=tuple(u.strip() for u in os.getenv("SITEMAP_URLS", "").split(",") if u.strip()),
+            sitemap_collection=os.getenv("SITEMAP_COLLECTION", "university_corpus"),
+            sitemap_interval=int(os.getenv("SITEMAP_INTERVAL", "3600")),
+            sitemap_max_pages=int(os.getenv("SITEMAP_MAX_PAGES", "500")),
+            sitemap_max_age=int(os.getenv("SITEMAP_MAX_AGE", "604800")),
+            dedup_enabled=os.getenv("DEDUP_ENABLED", "true").lower() == "true",
+            dedup_threshold=float(os.getenv("DEDUP_THRESHOLD", "0.8")),
+            dedup_max_collections=int(os.getenv("DEDUP_MAX_COLLECTIONS", "256")),
+            dedup_idle_ttl=int(os.getenv("DEDUP_IDLE_TTL", "86400"))
         )
\ No newline at end of file
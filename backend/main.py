@@ -1,9 +1,13 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from routes.chat import router
+from routes.metrics import router as metrics_router
 from langsmith.middleware import TracingMiddleware
 from config.app_config import AppConfig
 from config.logging_config import setup_logging
+from services.services_manager import get_service_manager
 from utils.logger import get_logger
 
 # Setup logging first
@@ -23,7 +27,16 @@ except Exception as e:
     logger.critical(f"❌ Failed to load configuration: {e}")
     raise
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    service_manager = get_service_manager(config)
+    await service_manager.startup()
+    try:
+        yield
+    finally:
+        await service_manager.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add middleware if LangSmith tracing is enabled
 if config.langsmith_tracing:
@@ -42,6 +55,16 @@ def health():
     logger.info("Health check endpoint called")
     return {"status": "running", "tracing": config.langsmith_tracing}
 
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once startup warmup has finished, 503 until then."""
+    service_manager = get_service_manager(config)
+    content = {"status": service_manager.readiness, "warmup": service_manager.warmup_status}
+    if service_manager.ready:
+        return content
+    return JSONResponse(status_code=503, content=content)
+
 app.include_router(router)
+app.include_router(metrics_router)
 logger.info("✅ FastAPI application started successfully")
 
@@ -3,27 +3,77 @@ from typing import Optional, List
 from fastapi import APIRouter, UploadFile, File, Request, Body, Form
 from fastapi.responses import JSONResponse, StreamingResponse
 from config.app_config import AppConfig
-from services.services_manager import ServiceManager
+from services.services_manager import get_service_manager
+from services.gemini_scheduler import Priority
+from utils.cancellation import CancellationToken, GenerationCancelled
 from utils.context import get_history, save_message
-from services.parser.pdf_parser import PDFParser
 from anyio import to_thread
 from utils.logger import get_logger
 import json
 import shutil
 import asyncio
+import tempfile
 import uuid
 import os
 
 # Initialize configuration and services
 config = AppConfig.from_env()
-service_manager = ServiceManager(config)
+service_manager = get_service_manager(config)
 rag_service = service_manager.rag_service
 gemini_client = service_manager.gemini_client
-pdf_parser = PDFParser()
+suggested_questions_service = service_manager.suggested_questions
 
 router = APIRouter()
 logger = get_logger("chat_routes")
 
+DISCONNECT_POLL_INTERVAL = 0.5
+
+async def watch_disconnect(request: Request, disconnected: asyncio.Event, cancel_token: CancellationToken):
+    """Flag a client disconnect and cancel the upstream work tied to the request."""
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+    disconnected.set()
+    cancel_token.cancel()
+
+async def run_until_disconnected(disconnected: asyncio.Event, func, *args):
+    """
+    Run a blocking call in a worker thread, giving up as soon as the client disconnects.
+    The thread is abandoned rather than killed; cancellation tokens make it finish early.
+    """
+    work = asyncio.ensure_future(to_thread.run_sync(func, *args, abandon_on_cancel=True))
+    waiter = asyncio.ensure_future(disconnected.wait())
+    try:
+        await asyncio.wait({work, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        if work.done():
+            return work.result()
+        raise GenerationCancelled()
+    finally:
+        waiter.cancel()
+        if not work.done():
+            work.cancel()
+
+def indexing_response(summary: dict, session_id: str, kind: str) -> JSONResponse:
+    """Report an upload's indexing summary; a re-upload of indexed content adds nothing and says so."""
+    counts = {"chunks_indexed": summary["indexed"], "duplicates_skipped": summary["duplicates"]}
+    if not summary["indexed"] and not summary["duplicates"]:
+        logger.error(f"❌ Nothing could be indexed for session {session_id}")
+        return JSONResponse({"error": "No content could be indexed from the uploaded files"}, status_code=422)
+    if not summary["indexed"]:
+        logger.info(f"♻️ {kind} uploaded for session {session_id} were already indexed")
+        return JSONResponse({
+            "message": f"{kind} were already indexed; no new content was added",
+            "status": "unchanged",
+            "session_id": session_id,
+            **counts
+        })
+    logger.info(f"✅ Successfully indexed {kind} for session {session_id}")
+    return JSONResponse({
+        "message": f"{kind} indexed successfully",
+        "status": "completed",
+        "session_id": session_id,
+        **counts
+    })
+
 @router.post("/upload-pdfs")
 async def upload_pdfs(request: Request, files: List[UploadFile] = File(...)):
     logger.info("Upload PDFs endpoint called")
@@ -31,12 +81,12 @@ async def upload_pdfs(request: Request, files: List[UploadFile] = File(...)):
     form = await request.form()
     session_id = form.get("session_id") or str(uuid.uuid4())
     collection_name = f"user-session-{session_id}"
-    temp_dir = "temp"
+    os.makedirs("temp", exist_ok=True)
+    temp_dir = tempfile.mkdtemp(dir="temp")
     
     try:
         pdf_paths = []
         file_names = []
-        os.makedirs(temp_dir, exist_ok=True)
         
         for file in files:
             file_path = os.path.join(temp_dir, file.filename)
@@ -47,16 +97,15 @@ async def upload_pdfs(request: Request, files: List[UploadFile] = File(...)):
             logger.debug(f"Saved PDF file: {file.filename}")
 
         logger.info(f"Starting PDF indexing for session: {session_id}")
-        await to_thread.run_sync(
-            lambda: rag_service.index_documents_to_qdrant(pdf_paths, file_names, collection_name)
+        summary = await to_thread.run_sync(
+            lambda: rag_service.index_documents_to_qdrant(
+                pdf_paths, file_names, collection_name,
+                on_document_parsed=lambda name, text: suggested_questions_service.record_document(session_id, name, text)
+            )
         )
-        logger.info(f"✅ Successfully indexed PDFs for session {session_id}")
-        
-        return JSONResponse({
-            "message": "PDFs indexed successfully",
-            "status": "completed",
-            "session_id": session_id
-        })
+        if summary["indexed"] or summary["duplicates"]:
+            suggested_questions_service.schedule(session_id, get_history(session_id))
+        return indexing_response(summary, session_id, "PDFs")
         
     except Exception as e:
         logger.error(f"❌ PDF indexing failed for session {session_id}: {str(e)}")
@@ -72,12 +121,12 @@ async def upload_docs(request: Request, files: List[UploadFile] = File(...)):
     form = await request.form()
     session_id = form.get("session_id") or str(uuid.uuid4())
     collection_name = f"user-session-{session_id}"
-    temp_dir = "temp"
+    os.makedirs("temp", exist_ok=True)
+    temp_dir = tempfile.mkdtemp(dir="temp")
     
     try:
         file_paths = []
         file_names = []
-        os.makedirs(temp_dir, exist_ok=True)
 
         for file in files:
             file_path = os.path.join(temp_dir, file.filename)
@@ -88,16 +137,15 @@ async def upload_docs(request: Request, files: List[UploadFile] = File(...)):
             logger.debug(f"Saved document: {file.filename}")
 
         logger.info(f"Starting document indexing for session: {session_id}")
-        await to_thread.run_sync(
-            lambda: rag_service.index_documents_to_qdrant(file_paths, file_names, collection_name)
+        summary = await to_thread.run_sync(
+            lambda: rag_service.index_documents_to_qdrant(
+                file_paths, file_names, collection_name,
+                on_document_parsed=lambda name, text: suggested_questions_service.record_document(session_id, name, text)
+            )
         )
-        logger.info(f"✅ Successfully indexed documents for session {session_id}")
-        
-        return JSONResponse({
-            "message": "Documents indexed successfully",
-            "status": "completed",
-            "session_id": session_id
-        })
+        if summary["indexed"] or summary["duplicates"]:
+            suggested_questions_service.schedule(session_id, get_history(session_id))
+        return indexing_response(summary, session_id, "Documents")
         
     except Exception as e:
         logger.error(f"❌ Document indexing failed for session {session_id}: {str(e)}")
@@ -121,19 +169,35 @@ async def upload_urls(
 
     try:
         logger.info(f"Starting URL indexing for session: {session_id}")
-        for url in urls:
-            if not url:
-                continue
-            logger.debug(f"Processing URL: {url}")
-            await rag_service.index_scraped_url_to_qdrant(url, selectors, collection_name)
-            logger.info(f"✅ Scraped and indexed URL: {url}")
+        urls = [url for url in urls if url]
+        if not urls:
+            return JSONResponse({"error": "No URLs provided"}, status_code=400)
+        
+        results = await rag_service.index_scraped_urls_to_qdrant(
+            urls, selectors, collection_name,
+            on_document_parsed=lambda source, text: suggested_questions_service.record_document(session_id, source, text)
+        )
+        
+        indexed = [url for url, result in results.items() if result["status"] == "indexed"]
+        failed = [url for url, result in results.items() if result["status"] == "failed"]
+        if len(failed) == len(results):
+            logger.error(f"❌ No URLs could be indexed for session {session_id}")
+            return JSONResponse({
+                "error": "None of the URLs could be indexed",
+                "status": "failed",
+                "session_id": session_id,
+                "results": results
+            }, status_code=502)
         
-        logger.info(f"✅ Successfully indexed all URLs for session {session_id}")
+        # Unchanged pages are already indexed from an earlier scrape; empty pages had nothing to index
+        logger.info(f"✅ Indexed {len(indexed)}/{len(results)} URLs for session {session_id} ({len(failed)} failed)")
+        suggested_questions_service.schedule(session_id, get_history(session_id))
         
         return JSONResponse({
-            "message": "URLs indexed successfully",
-            "status": "completed",
+            "message": "URLs indexed successfully" if not failed else "Some URLs could not be indexed",
+            "status": "completed" if not failed else "partial",
             "session_id": session_id,
+            "results": results
         })
         
     except Exception as e:
@@ -142,6 +206,65 @@ async def upload_urls(
             {"error": f"URL ingestion failed: {str(e)}"}, status_code=500
         )
 
+@router.post("/crawl-urls")
+async def crawl_urls(
+    request: Request,
+    urls: List[str] = Form(...),
+    selectors: Optional[List[str]] = Form(default=["*"]),
+    max_depth: Optional[int] = Form(default=None),
+    max_pages: Optional[int] = Form(default=None),
+    session_id: Optional[str] = Form(default=None)
+):
+    logger.info("Crawl URLs endpoint called")
+    
+    session_id = session_id or str(uuid.uuid4())
+    collection_name = f"user-session-{session_id}"
+    seeds = [url for url in urls if url]
+    if not seeds:
+        return JSONResponse({"error": "No URLs provided"}, status_code=400)
+    
+    # Requests may lower the configured limits but not raise them
+    if max_depth is not None:
+        max_depth = max(0, min(max_depth, config.crawl_max_depth))
+    if max_pages is not None:
+        max_pages = max(1, min(max_pages, config.crawl_max_pages))
+    
+    try:
+        logger.info(f"Starting crawl for session {session_id} from {len(seeds)} seed(s)")
+        results = await rag_service.crawl_and_index_to_qdrant(
+            seeds, selectors, collection_name,
+            on_document_parsed=lambda source, text: suggested_questions_service.record_document(session_id, source, text),
+            max_depth=max_depth,
+            max_pages=max_pages
+        )
+        
+        indexed = [url for url, result in results.items() if result["status"] == "indexed"]
+        failed = [url for url, result in results.items() if result["status"] == "failed"]
+        if len(failed) == len(results):
+            logger.error(f"❌ Crawl indexed no pages for session {session_id}")
+            return JSONResponse({
+                "error": "No pages could be indexed",
+                "status": "failed",
+                "session_id": session_id,
+                "results": results
+            }, status_code=502)
+        
+        logger.info(f"✅ Crawled {len(results)} pages, indexed {len(indexed)} for session {session_id}")
+        suggested_questions_service.schedule(session_id, get_history(session_id))
+        
+        return JSONResponse({
+            "message": f"Indexed {len(indexed)} of {len(results)} crawled pages",
+            "status": "completed",
+            "session_id": session_id,
+            "pages_crawled": len(results),
+            "pages_indexed": len(indexed),
+            "results": results
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Crawl failed for session {session_id}: {str(e)}")
+        return JSONResponse({"error": f"Crawl failed: {str(e)}"}, status_code=500)
+
 @router.post("/chat")
 async def chat(payload: dict = Body(...)):
     logger.info("Chat endpoint called")
@@ -165,9 +288,10 @@ async def chat(payload: dict = Body(...)):
         )
         logger.debug(f"Retrieved {len(context_chunks)} context chunks")
         
-        full_answer = "".join(gemini_client.stream_answer(
-            context_chunks, query, metadata, history
-        ))
+        # Runs off the event loop: the call may wait in the Gemini scheduler queue
+        full_answer = await to_thread.run_sync(lambda: "".join(gemini_client.stream_answer(
+            context_chunks, query, metadata, history, priority=Priority.INTERACTIVE
+        )))
         
         save_message(session_id, "bot", full_answer.strip())
         logger.info(f"✅ Successfully generated answer for session {session_id}")
@@ -198,16 +322,30 @@ async def chat_stream(request: Request):
     history = get_history(session_id)
 
     async def bot_streamer():
+        # A disconnect aborts pending retrieval and the upstream Gemini stream
+        cancel_token = CancellationToken()
+        disconnected = asyncio.Event()
+        watcher = asyncio.create_task(watch_disconnect(request, disconnected, cancel_token))
+        
         try:
             logger.info(f"Starting stream processing for session {session_id}: '{query[:50]}...'")
             
-            context_chunks, metadata = await to_thread.run_sync(
+            context_chunks, metadata = await run_until_disconnected(
+                disconnected,
                 lambda: rag_service.query_rag(query, collection_name=collection_name, top_k=3)
             )
             logger.debug(f"Retrieved {len(context_chunks)} context chunks for streaming")
 
             full_answer = ""
-            for chunk in gemini_client.stream_answer(context_chunks, query, metadata, history):
+            # Pull chunks in a worker thread so blocking Gemini reads don't stall the event loop
+            stream = gemini_client.stream_answer(
+                context_chunks, query, metadata, history, cancel_token=cancel_token
+            )
+            end_of_stream = object()
+            while True:
+                chunk = await run_until_disconnected(disconnected, next, stream, end_of_stream)
+                if chunk is end_of_stream:
+                    break
                 full_answer += chunk
                 yield f"data: {json.dumps({'chunk': chunk})}\n\n"
                 await asyncio.sleep(0.1)  # Reduced sleep for better streaming
@@ -215,58 +353,70 @@ async def chat_stream(request: Request):
             save_message(session_id, "bot", full_answer.strip())
             logger.info(f"✅ Stream processing completed for session {session_id}")
             
+        except GenerationCancelled:
+            logger.info(f"🛑 Client disconnected, cancelled stream for session {session_id}")
+            
         except Exception as e:
             error_msg = f"Stream processing failed: {str(e)}"
             logger.error(f"❌ {error_msg}")
             yield f"data: {json.dumps({'error': error_msg})}\n\n"
+        
+        finally:
+            watcher.cancel()
+            cancel_token.cancel()
 
     return StreamingResponse(bot_streamer(), media_type="text/event-stream")
 
 @router.post("/generate-suggested-questions")
-async def generate_suggested_questions(request: Request, files: List[UploadFile] = File(...)):
+async def generate_suggested_questions(request: Request, files: Optional[List[UploadFile]] = File(default=None)):
     logger.info("Generate suggested questions endpoint called")
     
     form = await request.form()
     session_id = form.get("session_id") or str(uuid.uuid4())
-    temp_dir = "temp"
-    all_text = ""
+    temp_dir = None
 
     try:
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        for file in files:
-            file_path = os.path.join(temp_dir, file.filename)
-            with open(file_path, "wb") as f:
-                f.write(await file.read())
-            
-            logger.debug(f"Processing file for questions: {file.filename}")
-            pages = await to_thread.run_sync(lambda: pdf_parser.extract_text_from_pdf(file_path))
-            all_text += pages[:3000]
-        
-        logger.debug(f"Extracted {len(all_text)} characters for question generation")
-
-        query_object = {
-            "task": "generate suggested questions based on the provided text",
-            "size": "short not more than 1 line without numbering",
-            "length": "10 words",
-            "tone": "questionnaire and informative",
-            "example": "What courses are available?, How to apply for admission?, What is the tuition fee?, Are there scholarships?, What hostel facilities are available?"
-        }
+        # Questions are generated in the background at ingestion; serve them from memory
+        suggested_questions = await suggested_questions_service.get_questions(session_id)
 
-        formatted_query = json.dumps(query_object, indent=2)
-        history = get_history(session_id)
-        previous_context = "\n".join(msg["content"] for msg in history[-5:] if msg["role"] == "bot")
-        combined_context = previous_context + "\n" + all_text
+        if suggested_questions is None and not suggested_questions_service.is_generating(session_id):
+            if files and not suggested_questions_service.has_documents(session_id):
+                # Fallback for files that were never ingested in this session
+                logger.info(f"No ingested documents for session {session_id}, parsing uploaded files")
+                os.makedirs("temp", exist_ok=True)
+                temp_dir = tempfile.mkdtemp(dir="temp")
+                
+                for file in files:
+                    file_path = os.path.join(temp_dir, file.filename)
+                    with open(file_path, "wb") as f:
+                        f.write(await file.read())
+                    
+                    logger.debug(f"Processing file for questions: {file.filename}")
+                    text = await to_thread.run_sync(
+                        lambda: rag_service.parser_dispatcher.dispatch_parser(file_path)
+                    )
+                    suggested_questions_service.record_document(session_id, file.filename, text)
+            
+            if suggested_questions_service.schedule(session_id, get_history(session_id)) is not None:
+                suggested_questions = await suggested_questions_service.get_questions(session_id)
 
-        prompt = f"""Based on the following text from a university brochure,
-{formatted_query}
-suggest 5 relevant questions a student might ask:\n\n{combined_context}"""
+        if suggested_questions is None and suggested_questions_service.is_generating(session_id):
+            # Don't supersede the generation in flight; the client polls again
+            logger.info(f"⏳ Suggested questions for session {session_id} are still being generated")
+            return JSONResponse(
+                {"status": "pending", "questions": [], "session_id": session_id},
+                status_code=202
+            )
 
-        logger.info("Generating suggested questions using Gemini")
-        suggested_questions = gemini_client.generate_suggested_questions(prompt)
+        if suggested_questions is None:
+            logger.warning(f"No suggested questions available for session {session_id}")
+            return JSONResponse(
+                {"error": "No documents have been ingested for this session", "session_id": session_id},
+                status_code=404
+            )
         
         save_message(session_id, "bot", "\n".join(suggested_questions))
-        logger.info(f"✅ Generated {len(suggested_questions)} suggested questions for session {session_id}")
+        logger.info(f"✅ Returned {len(suggested_questions)} suggested questions for session {session_id}")
 
         return {
             "questions": suggested_questions,
@@ -277,8 +427,9 @@ suggest 5 relevant questions a student might ask:\n\n{combined_context}"""
         logger.error(f"❌ Suggested questions generation failed: {str(e)}")
         return JSONResponse({"error": f"LLM generation failed: {str(e)}"}, status_code=500)
     finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
-        logger.debug("Cleaned up temporary directory")
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            logger.debug("Cleaned up temporary directory")
 
 @router.post("/cleanup-session")
 async def cleanup_session(request: Request):
@@ -296,6 +447,7 @@ async def cleanup_session(request: Request):
         logger.info(f"Cleaning up collection for session: {session_id}")
         
         rag_service.cleanup_collection(collection_name)
+        suggested_questions_service.clear(session_id)
         logger.info(f"✅ Successfully cleaned up collection for session {session_id}")
         
         return JSONResponse({"status": "collection deleted"})
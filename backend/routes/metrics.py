@@ -0,0 +1,11 @@
+# backend/routes/metrics.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from utils.metrics import REGISTRY
+
+router = APIRouter()
+
+@router.get("/metrics")
+def metrics():
+    """Stage latency histograms and Gemini scheduler state in Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,30 +1,87 @@
 # backend/services/chatbot.py
-from typing import List, Dict, Tuple, Optional
-# import numpy as np
+from typing import Any, Iterable, Iterator, List, Dict, Tuple, Optional, Callable
+from itertools import islice
+import numpy as np
 import logging
+import threading
 from langsmith import traceable
 
 from .parser.dispatcher import ParserDispatcher
-from .chunker import TextChunker
+from .chunker import ChunkSpan, SemanticChunker, TextChunker, TokenAwareChunker
 from .embedder import Embedder
 from .vector_store_qdrant import QdrantVectorStore
 from .gemini_client import GeminiClient
-from .scraper import WebScraper
+from .scraper import WebScraper, NOT_MODIFIED
+from .crawler import SiteCrawler
+from .sitemap import SitemapReader
+from .dedup import NearDuplicateFilter, DedupResult
+from .ingest_pool import ParsePool, as_pages
+from .embedding_batcher import QueryEmbeddingBatcher
 from config.app_config import AppConfig
+from utils.metrics import RAG_QUERY_MS
+from utils.cancellation import CancellationToken
+from anyio import to_thread
+
+# Chunks embedded and uploaded per batch when indexing
+INDEX_BATCH_CHUNKS = 512
+
+# Pages scraped and indexed together when working through a sitemap
+SITEMAP_BATCH_PAGES = 50
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
 
 class RAGService:
     """
     A class that orchestrates the RAG pipeline including document indexing,
     query processing, and response generation.
     """
-    def __init__(self, config: AppConfig, embedder: Embedder, vector_store: QdrantVectorStore, gemini_client: GeminiClient):
+    def __init__(
+        self,
+        config: AppConfig,
+        embedder: Embedder,
+        vector_store: QdrantVectorStore,
+        gemini_client: GeminiClient,
+        scraper: Optional[WebScraper] = None
+    ):
         self.logger = logging.getLogger(__name__)
         self.parser_dispatcher = ParserDispatcher()
-        self.text_chunker = TextChunker(chunk_size=config.chunk_size, overlap=config.chunk_overlap)
+        if config.chunk_mode == "words":
+            self.text_chunker = TextChunker(
+                chunk_size=config.chunk_size, overlap=config.chunk_overlap, pack_sections=config.chunk_pack_sections
+            )
+        elif config.chunk_mode == "semantic":
+            self.text_chunker = SemanticChunker(
+                embedder, max_tokens=config.chunk_tokens, min_tokens=config.chunk_min_tokens,
+                breakpoint_percentile=config.chunk_breakpoint_percentile,
+                pool_embeddings=config.chunk_pool_embeddings, pack_sections=config.chunk_pack_sections
+            )
+        else:
+            # Chunks sized with the embedder's tokenizer so nothing stored is truncated when embedded
+            self.text_chunker = TokenAwareChunker(
+                embedder, max_tokens=config.chunk_tokens, overlap=config.chunk_overlap_tokens,
+                pack_sections=config.chunk_pack_sections
+            )
         self.embedding_generator = embedder
         self.vector_store = vector_store
         self.gemini_client = gemini_client
-        self.scraper = WebScraper()
+        self.config = config
+        self.scraper = scraper or WebScraper.from_config(config)
+        self.deduplicator = NearDuplicateFilter(
+            threshold=config.dedup_threshold,
+            max_collections=config.dedup_max_collections,
+            idle_ttl=config.dedup_idle_ttl or None
+        ) if config.dedup_enabled else None
+        self._parse_pool: Optional[ParsePool] = None
+        self._parse_pool_lock = threading.Lock()
+        self.query_batcher = QueryEmbeddingBatcher(
+            embedder, max_batch_size=config.query_batch_max_size, max_wait_ms=config.query_batch_max_wait_ms
+        ) if config.query_batching else None
         self.logger.info("✅ Chatbot initialized with AppConfig + injected services")
     # def __init__(
     #     self,
@@ -61,7 +118,13 @@ class RAGService:
     #     self.logger.info("✅ Chatbot initialized with all components")
     
     @traceable
-    async def index_scraped_url_to_qdrant(self, url: str, selectors: List[str], collection_name: str) -> bool:
+    async def index_scraped_url_to_qdrant(
+        self,
+        url: str,
+        selectors: List[str],
+        collection_name: str,
+        on_document_parsed: Optional[Callable[[str, str], None]] = None
+    ) -> bool:
         """
         Scrape a URL and index the content into Qdrant.
         
@@ -69,37 +132,313 @@ class RAGService:
             url: URL to scrape
             selectors: CSS selectors for scraping
             collection_name: Name of the Qdrant collection
+            on_document_parsed: Optional callback receiving (source, text) of the scraped page
             
         Returns:
-            True if successful, False otherwise
+            True if the page is indexed (including unchanged since the last scrape), False otherwise
         """
-        try:
-            scraped_data = await self.scraper.scrape_page(url, selectors)
-            chunks = self.scraper.flatten_scraped_data(scraped_data, url)
+        results = await self.index_scraped_urls_to_qdrant([url], selectors, collection_name, on_document_parsed)
+        return results[url]["status"] in ("indexed", "unchanged")
+    
+    @traceable
+    async def index_scraped_urls_to_qdrant(
+        self,
+        urls: List[str],
+        selectors: List[str],
+        collection_name: str,
+        on_document_parsed: Optional[Callable[[str, str], None]] = None,
+        concurrency: int = 8,
+        incremental: bool = True
+    ) -> Dict[str, Dict]:
+        """
+        Scrape URLs concurrently and index their content into Qdrant.
+        
+        Pages are fetched in parallel; embedding and upload then run in a worker
+        thread, batched across pages so the event loop is never blocked.
+        
+        Args:
+            urls: URLs to scrape
+            selectors: CSS selectors for scraping
+            collection_name: Name of the Qdrant collection
+            on_document_parsed: Optional callback receiving (source, text) of each scraped page
+            concurrency: Maximum number of pages fetched at once
+            incremental: Use the scraper's HTTP cache to skip pages unchanged since they
+                were indexed into this collection, and replace the points of changed ones
             
-            if not chunks:
-                self.logger.warning(f"⚠️ No content scraped from URL: {url}")
-                return False
+        Returns:
+            Per-URL result: {"status": "indexed" | "unchanged" | "empty" | "failed", "chunks": int, "error"?: str}
+        """
+        cache_scope = collection_name if incremental and self.scraper.cache is not None else None
+        errors: Dict[str, str] = {}
+        scraped = await self.scraper.scrape_multiple_pages(
+            urls, selectors, concurrency, errors=errors, cache_scope=cache_scope
+        )
+        
+        results: Dict[str, Dict] = {}
+        pages: Dict[str, Dict] = {}
+        for url in dict.fromkeys(urls):
+            if url in errors or url not in scraped:
+                results[url] = {"status": "failed", "chunks": 0, "error": errors.get(url, "Scrape failed")}
+            else:
+                results[url] = {}
+                pages[url] = scraped[url]
+        
+        await self._index_scraped_pages(collection_name, pages, results, on_document_parsed, cache_scope)
+        
+        indexed = sum(1 for r in results.values() if r["status"] == "indexed")
+        self.logger.info(f"🌐 Indexed {indexed}/{len(results)} URLs into '{collection_name}'")
+        return results
+    
+    @traceable
+    async def crawl_and_index_to_qdrant(
+        self,
+        seed_urls: List[str],
+        selectors: List[str],
+        collection_name: str,
+        on_document_parsed: Optional[Callable[[str, str], None]] = None,
+        max_depth: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        incremental: bool = True
+    ) -> Dict[str, Dict]:
+        """
+        Crawl a site breadth-first from seed URLs and index pages as they arrive.
+        
+        Chunks are embedded and uploaded whenever a full batch has accumulated,
+        while the crawler keeps fetching, so memory stays bounded by the batch size.
+        
+        Args:
+            seed_urls: Start URLs
+            selectors: CSS selectors for scraping
+            collection_name: Name of the Qdrant collection
+            on_document_parsed: Optional callback receiving (source, text) of each scraped page
+            max_depth: Link depth limit (defaults to config.crawl_max_depth)
+            max_pages: Page limit (defaults to config.crawl_max_pages)
+            incremental: Skip pages unchanged since the last crawl into this collection
             
-            embeddings = self.embedding_generator.get_embeddings_for_metadata(chunks)
+        Returns:
+            Per-URL result: {"status": "indexed" | "unchanged" | "empty" | "failed", "chunks": int, "depth": int, "error"?: str}
+        """
+        cache_scope = collection_name if incremental and self.scraper.cache is not None else None
+        crawler = SiteCrawler.from_config(self.scraper, self.config, max_depth=max_depth, max_pages=max_pages)
+        results: Dict[str, Dict] = {}
+        pending: Dict[str, Dict] = {}
+        pending_chunks = 0
+        
+        async for page in crawler.crawl(seed_urls, selectors, cache_scope=cache_scope):
+            results[page.url] = {"depth": page.depth}
+            if page.error:
+                results[page.url].update(status="failed", chunks=0, error=page.error)
+                continue
             
-            if embeddings.size == 0:
-                self.logger.error("❌ Failed to generate embeddings for scraped content")
-                return False
+            pending[page.url] = page.data
+            pending_chunks += sum(len(v) for k, v in page.data.items() if isinstance(v, list) and k not in ("links", "images", "blocks"))
+            if pending_chunks >= INDEX_BATCH_CHUNKS:
+                await self._index_scraped_pages(collection_name, pending, results, on_document_parsed, cache_scope)
+                pending, pending_chunks = {}, 0
+        
+        if pending:
+            await self._index_scraped_pages(collection_name, pending, results, on_document_parsed, cache_scope)
+        
+        indexed = sum(1 for r in results.values() if r["status"] == "indexed")
+        self.logger.info(f"🕸️ Crawled {len(results)} pages, indexed {indexed} into '{collection_name}'")
+        return results
+    
+    @traceable
+    async def index_sitemaps_to_qdrant(
+        self,
+        sitemap_urls: List[str],
+        selectors: List[str],
+        collection_name: str,
+        on_document_parsed: Optional[Callable[[str, str], None]] = None,
+        max_pages: Optional[int] = None,
+        max_age: Optional[float] = None
+    ) -> Dict[str, int]:
+        """
+        Index the pages listed in sitemaps that changed since the last run.
+        
+        Sitemaps (and sitemap index files) are streamed, and only pages that are
+        new, have a newer <lastmod> than their last indexing, or lack <lastmod>
+        and are older than max_age are scraped; those are then revalidated with
+        conditional requests and re-indexed only if their content changed.
+        
+        Args:
+            sitemap_urls: sitemap.xml or sitemap index URLs
+            selectors: CSS selectors for scraping
+            collection_name: Name of the Qdrant collection
+            on_document_parsed: Optional callback receiving (source, text) of each scraped page
+            max_pages: Maximum number of pages scraped in this run; the rest stay due
+            max_age: Seconds after which pages without <lastmod> are revalidated
             
-            # Create collection and upload data
-            self.vector_store.create_collection_if_not_exists(collection_name, embeddings.shape[1])
-            uploaded_count = self.vector_store.upload_points(collection_name, embeddings, chunks)
+        Returns:
+            Counts of due pages and of pages per status (indexed, unchanged, empty, failed)
+        """
+        cache_scope = collection_name if self.scraper.cache is not None else None
+        if cache_scope is None:
+            self.logger.warning("⚠️ No HTTP cache configured; every sitemap page is treated as changed")
+        
+        reader = SitemapReader(self.scraper)
+        summary = {"due": 0, "indexed": 0, "unchanged": 0, "empty": 0, "failed": 0}
+        seen = set()
+        remaining = max_pages
+        
+        async for batch in reader.iter_due(sitemap_urls, cache_scope, max_age):
+            urls = [entry.url for entry in batch.entries if entry.url not in seen]
+            complete = True
+            if remaining is not None and len(urls) > remaining:
+                urls, complete = urls[:remaining], False
+            seen.update(urls)
+            summary["due"] += len(urls)
             
-            self.logger.info(f"🌐 Scraped content from '{url}' indexed into '{collection_name}'. Uploaded {uploaded_count} points.")
-            return True
+            for start in range(0, len(urls), SITEMAP_BATCH_PAGES):
+                results = await self.index_scraped_urls_to_qdrant(
+                    urls[start:start + SITEMAP_BATCH_PAGES], selectors, collection_name, on_document_parsed
+                )
+                for result in results.values():
+                    summary[result["status"]] += 1
+                    complete = complete and result["status"] != "failed"
             
-        except Exception as e:
-            self.logger.error(f"❌ Failed to index scraped URL {url}: {e}")
-            return False
+            # Sitemaps with leftover or failed pages are read again next run
+            if complete:
+                await reader.mark_read(cache_scope, batch.sitemap_url)
+            if remaining is not None:
+                remaining -= len(urls)
+                if remaining <= 0:
+                    break
+        
+        self.logger.info(f"🗺️ Sitemap run for '{collection_name}': {summary}")
+        return summary
+    
+    async def _index_scraped_pages(
+        self,
+        collection_name: str,
+        pages: Dict[str, Dict],
+        results: Dict[str, Dict],
+        on_document_parsed: Optional[Callable[[str, str], None]],
+        cache_scope: Optional[str]
+    ) -> None:
+        """
+        Chunk, embed and upload scraped pages, filling in each page's entry in results.
+        
+        With a cache_scope, unchanged pages are skipped, the previous points of
+        re-indexed pages are replaced, and cache entries are committed only once
+        a page's points are stored.
+        """
+        all_chunks: List[Dict] = []
+        replaced: List[str] = []
+        for url, data in pages.items():
+            if data.get(NOT_MODIFIED):
+                results[url].update(status="unchanged", chunks=0)
+                continue
+            
+            replaced.append(url)
+            chunks = self.scraper.flatten_scraped_data(data, url)
+            if not chunks:
+                self.logger.warning(f"⚠️ No content scraped from URL: {url}")
+                results[url].update(status="empty", chunks=0)
+                continue
+            
+            if on_document_parsed is not None:
+                on_document_parsed(url, "\n".join(chunk["text"] for chunk in chunks))
+            
+            results[url].update(status="indexed", chunks=len(chunks))
+            all_chunks.extend(chunks)
+        
+        if cache_scope is not None and replaced:
+            deleted = await to_thread.run_sync(self.vector_store.delete_points_by_source, collection_name, replaced)
+            if not deleted:
+                # Leave the cache untouched so the next run retries these pages
+                for url in replaced:
+                    results[url].update(status="failed", chunks=0, error="Failed to replace previous points")
+                return
+            if self.deduplicator is not None:
+                self.deduplicator.remove_sources(collection_name, replaced)
+        
+        # Incrementally re-indexed pages may be deleted later, so they must not hide other pages' chunks
+        dedup = await to_thread.run_sync(self._deduplicate, collection_name, all_chunks, cache_scope is not None)
+        if dedup is not None and dedup.removed:
+            all_chunks = dedup.kept
+            kept: Dict[str, int] = {}
+            for chunk in all_chunks:
+                kept[chunk["source"]] = kept.get(chunk["source"], 0) + 1
+            for url in replaced:
+                if results[url]["status"] == "indexed":
+                    results[url].update(chunks=kept.get(url, 0), duplicates=results[url]["chunks"] - kept.get(url, 0))
+        
+        failed: Dict[str, str] = {}
+        if all_chunks:
+            failed = await to_thread.run_sync(self._embed_and_upload, collection_name, all_chunks)
+            for url, error in failed.items():
+                results[url].update(status="failed", chunks=0, error=error)
+        self._commit_dedup(collection_name, dedup, failed)
+        
+        if cache_scope is not None:
+            committed = {url: pages[url] for url in replaced if url not in failed}
+            await to_thread.run_sync(self.scraper.commit_cache, cache_scope, committed)
+    
+    def _deduplicate(self, collection_name: str, chunks: List[Dict], replaceable: bool = False) -> Optional[DedupResult]:
+        """
+        Drop chunks that repeat each other or content already in the collection.
+        
+        Args:
+            collection_name: Name of the Qdrant collection
+            chunks: Chunk dictionaries
+            replaceable: The chunks' sources may later be replaced (see NearDuplicateFilter)
+        
+        Returns:
+            The filter result (commit it once the kept chunks are stored), or None when disabled
+        """
+        if self.deduplicator is None or not chunks:
+            return None
+        return self.deduplicator.filter(collection_name, chunks, replaceable)
+    
+    def _commit_dedup(self, collection_name: str, dedup: Optional[DedupResult], failed: Dict[str, str]) -> None:
+        # Only chunks that were stored may hide later duplicates
+        if dedup is not None:
+            self.deduplicator.commit(collection_name, dedup._replace(
+                pending=[(chunk, sig) for chunk, sig in dedup.pending if chunk["source"] not in failed]
+            ))
+    
+    def _embed_and_upload(self, collection_name: str, chunks: List[Dict]) -> Dict[str, str]:
+        """
+        Embed and upload chunks in batches spanning pages.
+        
+        Returns:
+            Error message per source whose chunks could not be indexed
+        """
+        failed: Dict[str, str] = {}
+        # Reused by every batch once the embedding size is known (uploads copy the vectors)
+        buffer: Optional[np.ndarray] = None
+        for start in range(0, len(chunks), INDEX_BATCH_CHUNKS):
+            batch = chunks[start:start + INDEX_BATCH_CHUNKS]
+            # Chunks may carry pooled embeddings from the chunker; never store them in the payload
+            pooled = [chunk.pop("embedding", None) for chunk in batch]
+            try:
+                if all(vector is not None for vector in pooled):
+                    embeddings = np.vstack(pooled)
+                else:
+                    embeddings = self.embedding_generator.get_embeddings_for_metadata(batch, out=buffer)
+                    if buffer is None and embeddings.size and len(chunks) > INDEX_BATCH_CHUNKS:
+                        buffer = np.empty((INDEX_BATCH_CHUNKS, embeddings.shape[1]), dtype=np.float32)
+                if embeddings.size == 0:
+                    raise RuntimeError("Failed to generate embeddings")
+                
+                self.vector_store.create_collection_if_not_exists(collection_name, embeddings.shape[1])
+                uploaded_count = self.vector_store.upload_points(collection_name, embeddings, batch)
+                self.logger.debug(f"Uploaded {uploaded_count} points to '{collection_name}'")
+            except Exception as e:
+                self.logger.error(f"❌ Failed to index batch: {e}")
+                for chunk in batch:
+                    failed.setdefault(chunk["source"], str(e))
+        return failed
     
     @traceable
-    def index_documents_to_qdrant(self, file_paths: List[str], file_names: List[str], collection_name: str) -> int:
+    def index_documents_to_qdrant(
+        self,
+        file_paths: List[str],
+        file_names: List[str],
+        collection_name: str,
+        on_document_parsed: Optional[Callable[[str, str], None]] = None
+    ) -> Dict[str, int]:
         """
         Index multiple documents into Qdrant.
         
@@ -107,55 +446,139 @@ class RAGService:
             file_paths: List of file paths
             file_names: List of file names for metadata
             collection_name: Name of the Qdrant collection
+            on_document_parsed: Optional callback receiving (file_name, text) for each parsed
+                document, so later steps can reuse the text without parsing again
             
         Returns:
-            Number of chunks successfully indexed
+            Summary with the chunks created, indexed and skipped as duplicates of
+            content already in the collection (a re-upload indexes nothing new)
         """
         if len(file_paths) != len(file_names):
             raise ValueError("Number of file paths must match number of file names")
         
-        all_chunks = []
+        # Chunks stay offsets into the parsed text until their batch is embedded,
+        # so only one batch of chunk texts and payloads is alive at a time
+        spans = self._document_spans(file_paths, file_names, on_document_parsed)
+        created = uploaded_count = removed = 0
+        
+        for batch in _batched(spans, INDEX_BATCH_CHUNKS):
+            created += len(batch)
+            chunks = []
+            for span in batch:
+                chunk = span.to_dict()
+                if span.embedding is not None:
+                    chunk["embedding"] = span.embedding
+                chunks.append(chunk)
+            
+            # Drop repeated headers, footers and boilerplate before paying for embeddings
+            dedup = self._deduplicate(collection_name, chunks)
+            if dedup is not None:
+                chunks = dedup.kept
+                removed += dedup.removed
+            if not chunks:
+                continue
+            
+            failed = self._embed_and_upload(collection_name, chunks)
+            uploaded_count += sum(1 for chunk in chunks if chunk["source"] not in failed)
+            self._commit_dedup(collection_name, dedup, failed)
+        
+        summary = {"chunks": created, "indexed": uploaded_count, "duplicates": removed}
+        if not created:
+            self.logger.error("❌ No chunks were created from the documents")
+            return summary
+        if not uploaded_count and not removed:
+            self.logger.error("❌ Failed to generate embeddings")
+            return summary
+        
+        skipped = f" ({removed} duplicate chunks skipped)" if removed else ""
+        self.logger.info(f"✅ Collection '{collection_name}' indexed with {uploaded_count} points{skipped}. Ready for questions.")
+        return summary
+    
+    def _get_parse_pool(self) -> ParsePool:
+        # Shared by concurrent uploads (each indexing in its own worker thread)
+        with self._parse_pool_lock:
+            if self._parse_pool is None:
+                if isinstance(self.text_chunker, SemanticChunker):
+                    # Sentence embeddings need the model, so workers only parse
+                    chunker = None
+                elif isinstance(self.text_chunker, TokenAwareChunker):
+                    chunker = self.text_chunker.detached()
+                else:
+                    chunker = self.text_chunker
+                self._parse_pool = ParsePool(self.config.ingest_workers, chunker, sections=self.text_chunker.pack_sections)
+            return self._parse_pool
+    
+    def _document_spans(
+        self,
+        file_paths: List[str],
+        file_names: List[str],
+        on_document_parsed: Optional[Callable[[str, str], None]]
+    ) -> Iterator[ChunkSpan]:
+        """Parse documents (in the worker pool if configured) and yield their chunks as offsets."""
+        if self.config.ingest_workers > 1 and len(file_paths) > 1:
+            yield from self._pooled_document_spans(file_paths, file_names, on_document_parsed)
+            return
         
         for path, name in zip(file_paths, file_names):
             try:
-                # Parse document
-                parsed_content = self.parser_dispatcher.dispatch_parser(path)
-                
-                # Chunk text with metadata
-                if isinstance(parsed_content, list) and all(isinstance(item, tuple) and len(item) == 2 for item in parsed_content):
-                    # Handle (page_num, text) format
-                    chunks = self.text_chunker.chunk_text_with_metadata(parsed_content, name)
-                elif isinstance(parsed_content, str):
-                    # Handle plain text format - convert to list of (1, text)
-                    chunks = self.text_chunker.chunk_text_with_metadata([(1, parsed_content)], name)
-                else:
+                # Parse document (into pages/sections when the chunker packs them)
+                pages = as_pages(self._parse_document(path))
+                if pages is None:
                     self.logger.warning(f"⚠️ Unsupported parsed content format for {name}")
                     continue
                 
-                all_chunks.extend(chunks)
-                self.logger.info(f"✅ Processed {name}: {len(chunks)} chunks")
+                if on_document_parsed is not None:
+                    on_document_parsed(name, "\n".join(t for _, t in pages))
+                
+                count = 0
+                for span in self.text_chunker.iter_spans(pages, name):
+                    count += 1
+                    yield span
+                self.logger.info(f"✅ Processed {name}: {count} chunks")
                 
             except Exception as e:
                 self.logger.warning(f"⚠️ Failed to parse {name}: {str(e)}")
                 continue
-        
-        if not all_chunks:
-            self.logger.error("❌ No chunks were created from the documents")
-            return 0
-        
-        # Generate embeddings and upload to Qdrant
-        embeddings = self.embedding_generator.get_embeddings_for_metadata(all_chunks)
-        
-        if embeddings.size == 0:
-            self.logger.error("❌ Failed to generate embeddings")
-            return 0
-        
-        # Create collection and upload data
-        self.vector_store.create_collection_if_not_exists(collection_name, embeddings.shape[1])
-        uploaded_count = self.vector_store.upload_points(collection_name, embeddings, all_chunks)
-        
-        self.logger.info(f"✅ Collection '{collection_name}' indexed with {uploaded_count} points. Ready for questions.")
-        return uploaded_count
+    
+    def _parse_document(self, path: str):
+        if self.text_chunker.pack_sections:
+            return self.parser_dispatcher.dispatch_sections(path)
+        return self.parser_dispatcher.dispatch_parser(path)
+    
+    def _pooled_document_spans(
+        self,
+        file_paths: List[str],
+        file_names: List[str],
+        on_document_parsed: Optional[Callable[[str, str], None]]
+    ) -> Iterator[ChunkSpan]:
+        documents = self._get_parse_pool().iter_documents(file_paths, file_names, with_text=on_document_parsed is not None)
+        for document in documents:
+            if document.error is not None:
+                self.logger.warning(f"⚠️ Failed to parse {document.name}: {document.error}")
+                continue
+            try:
+                if on_document_parsed is not None:
+                    on_document_parsed(document.name, document.text)
+                spans = document.spans
+                if spans is None:
+                    spans = list(self.text_chunker.iter_spans(document.pages, document.name))
+            except Exception as e:
+                self.logger.warning(f"⚠️ Failed to chunk {document.name}: {str(e)}")
+                continue
+            self.logger.info(f"✅ Processed {document.name}: {len(spans)} chunks")
+            yield from spans
+    
+    def _stop_parse_pool(self) -> None:
+        with self._parse_pool_lock:
+            pool, self._parse_pool = self._parse_pool, None
+        if pool is not None:
+            pool.shutdown()
+    
+    def close(self) -> None:
+        """Stop the parse worker pool and the query embedding batcher."""
+        self._stop_parse_pool()
+        if self.query_batcher is not None:
+            self.query_batcher.close()
     
     @traceable
     def query_rag(self, user_query: str, collection_name: str, top_k: int = 3) -> Tuple[List[str], List[Dict]]:
@@ -170,9 +593,16 @@ class RAGService:
         Returns:
             Tuple of (context_texts, metadata_list)
         """
+        with RAG_QUERY_MS.time():
+            return self._query_rag(user_query, collection_name, top_k)
+    
+    def _query_rag(self, user_query: str, collection_name: str, top_k: int) -> Tuple[List[str], List[Dict]]:
         try:
-            # Generate query embedding
-            query_embedding = self.embedding_generator.get_embeddings([user_query])
+            # Generate query embedding (batched with concurrent queries when enabled)
+            if self.query_batcher is not None:
+                query_embedding = self.query_batcher.embed(user_query)
+            else:
+                query_embedding = self.embedding_generator.get_embeddings([user_query])
             
             if query_embedding.size == 0:
                 self.logger.error("❌ Failed to generate query embedding")
@@ -188,7 +618,7 @@ class RAGService:
             # Extract context and metadata
             context_texts = [chunk.get("text", "") for chunk in retrieved_chunks]
             metadata = [
-                {"source": chunk.get("source", "Unknown"), "page": chunk.get("page", "Unknown")}
+                {"source": chunk.get("source", "Unknown"), "page": self._page_label(chunk)}
                 for chunk in retrieved_chunks
             ]
             
@@ -198,6 +628,12 @@ class RAGService:
             self.logger.error(f"❌ RAG query failed: {e}")
             return [], []
     
+    @staticmethod
+    def _page_label(chunk: Dict) -> Any:
+        # Packed chunks cover a range of sections ("12-15")
+        page, page_end = chunk.get("page", "Unknown"), chunk.get("page_end")
+        return f"{page}-{page_end}" if page_end is not None and page_end != page else page
+    
     @traceable
     def generate_response(
         self,
@@ -231,7 +667,8 @@ class RAGService:
         user_query: str,
         collection_name: str,
         history: Optional[List[Dict[str, str]]] = None,
-        top_k: int = 3
+        top_k: int = 3,
+        cancel_token: Optional[CancellationToken] = None
     ):
         """
         Stream a response using RAG and Gemini.
@@ -241,6 +678,7 @@ class RAGService:
             collection_name: Name of the Qdrant collection to search
             history: Conversation history
             top_k: Number of context chunks to retrieve
+            cancel_token: Optional token that aborts generation when cancelled
             
         Yields:
             Response text chunks
@@ -251,7 +689,10 @@ class RAGService:
             yield "I couldn't find relevant information to answer your question. Please try asking something else."
             return
         
-        for chunk in self.gemini_client.stream_answer(context_texts, user_query, metadata, history):
+        if cancel_token is not None and cancel_token.cancelled:
+            return
+        
+        for chunk in self.gemini_client.stream_answer(context_texts, user_query, metadata, history, cancel_token=cancel_token):
             yield chunk
     
     def cleanup_collection(self, collection_name: str) -> bool:
@@ -265,6 +706,10 @@ class RAGService:
             True if deletion was successful, False otherwise
         """
         try:
+            if self.scraper.cache is not None:
+                self.scraper.cache.delete_collection(collection_name)
+            if self.deduplicator is not None:
+                self.deduplicator.clear(collection_name)
             return self.vector_store.delete_collection(collection_name)
         except Exception as e:
             self.logger.error(f"❌ Failed to delete collection {collection_name}: {e}")
@@ -300,10 +745,16 @@ class RAGService:
         """
         if chunk_size is not None or chunk_overlap is not None:
             self.text_chunker.update_chunking_parameters(chunk_size, chunk_overlap)
+            # Parse workers hold a copy of the chunker; restart them with the new settings
+            self._stop_parse_pool()
             self.logger.info(f"🔄 Updated chunking parameters: size={chunk_size}, overlap={chunk_overlap}")
         
         if embedding_model is not None:
             self.embedding_generator.update_model(embedding_model)
+            if isinstance(self.text_chunker, TokenAwareChunker):
+                # Chunks are sized with the model's tokenizer and max_seq_length
+                self.text_chunker.reset_model()
+                self._stop_parse_pool()
             self.logger.info(f"🔄 Updated embedding model: {embedding_model}")
         
         if gemini_model is not None:
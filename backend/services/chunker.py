@@ -1,21 +1,200 @@
 # backend/services/chunker.py
-from typing import List, Dict, Tuple
+from array import array
+from bisect import bisect_right
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Tuple, Optional
+import copy
+import logging
+import re
+import numpy as np
+
+_HEADING = re.compile(r"^h([1-6])$")
+
+# Sentence ends and paragraph breaks; overlap is snapped to these
+_SEGMENT_BREAK = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n\s*\n")
+_WORD_PIECE = re.compile(r"\w+|[^\w\s]")
+_WORD = re.compile(r"\S+")
+
+# Sentences embedded per call by SemanticChunker
+SENTENCE_BATCH = 1024
+
+# Joins packed sections; a paragraph break, so sections stay separate segments
+_SECTION_JOIN = "\n\n"
+
+def estimate_tokens(text: str) -> int:
+    """Rough word-piece count (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+def _pack_sections(
+    pages: Iterable[Tuple[int, str]],
+    is_small: Optional[Callable[[str], bool]]
+) -> Iterator[Tuple[int, str, Optional[Tuple[List[int], array]]]]:
+    """
+    Merge runs of consecutive small sections into one text.
+    
+    Parsers that emit a section per paragraph (DOCX) or per line (TXT) would
+    otherwise get at least one chunk per section. Sections that are not small
+    (e.g. PDF pages) pass through untouched and end a run.
+    
+    Yields:
+        (first_section, text, sections) where sections is None for a single
+        section, else (section_numbers, start offsets in text)
+    """
+    run: List[Tuple[int, str]] = []
+    
+    def packed():
+        if len(run) == 1:
+            return run[0][0], run[0][1], None
+        starts = array("L")
+        offset = 0
+        for _, text in run:
+            starts.append(offset)
+            offset += len(text) + len(_SECTION_JOIN)
+        return run[0][0], _SECTION_JOIN.join(text for _, text in run), ([num for num, _ in run], starts)
+    
+    for page_num, text in pages:
+        if is_small is not None and is_small(text):
+            run.append((page_num, text))
+            continue
+        if run:
+            yield packed()
+            run = []
+        yield page_num, text, None
+    if run:
+        yield packed()
+
+class ChunkSpan:
+    """
+    A chunk as character offsets into its page's text.
+    
+    Holds a reference to the page string rather than a copy, so a document's
+    chunks cost a few machine words each until their text is actually needed
+    (for embedding or as payload).
+    """
+    __slots__ = ("source", "page", "page_end", "index", "start", "end", "tokens", "embedding", "_page_text", "_sections")
+    
+    def __init__(self, source: str, page: int, index: int, start: int, end: int, page_text: str, tokens: Optional[int] = None):
+        self.source = source
+        self.page = page
+        self.page_end = page
+        self.index = index
+        self.start = start
+        self.end = end
+        self.tokens = tokens
+        self.embedding: Optional[np.ndarray] = None
+        self._page_text = page_text
+        self._sections = None
+    
+    def _section_bounds(self) -> Tuple[int, int]:
+        starts = self._sections[1]
+        return bisect_right(starts, self.start) - 1, bisect_right(starts, self.end - 1) - 1
+    
+    def locate(self, sections: Tuple[List[int], array]) -> "ChunkSpan":
+        """Map a span over packed sections back to the section range it covers."""
+        self._sections = sections
+        first, last = self._section_bounds()
+        self.page = sections[0][first]
+        self.page_end = sections[0][last]
+        return self
+    
+    @property
+    def text(self) -> str:
+        return self._page_text[self.start:self.end]
+    
+    @property
+    def chunk_id(self) -> str:
+        return f"{self.source}_p{self.page}_c{self.index}"
+    
+    def to_dict(self) -> Dict:
+        """Chunk dictionary in the format the embedder and vector store expect."""
+        chunk = {
+            "text": self.text,
+            "page": self.page,
+            "source": self.source,
+            "chunk_id": self.chunk_id,
+            "char_start": self.start,
+            "char_end": self.end
+        }
+        if self._sections is not None:
+            # Offsets into the first and last covered section, not the packed text
+            first, last = self._section_bounds()
+            starts = self._sections[1]
+            chunk["char_start"] = self.start - starts[first]
+            chunk["char_end"] = self.end - starts[last]
+            chunk["page_end"] = self.page_end
+        if self.tokens is not None:
+            chunk["tokens"] = self.tokens
+        return chunk
+    
+    def __repr__(self) -> str:
+        return f"ChunkSpan({self.chunk_id!r}, {self.start}:{self.end})"
+
+class RegexTokenizer:
+    """
+    Dependency-free stand-in for a fast tokenizer: words and punctuation marks
+    count as one token each. Used when the embedding model exposes no tokenizer.
+    """
+    is_fast = True
+    
+    def num_special_tokens_to_add(self, pair: bool = False) -> int:
+        return 0
+    
+    def __call__(self, texts: List[str], add_special_tokens: bool = False, return_offsets_mapping: bool = False, **kwargs) -> Dict:
+        offsets = [[m.span() for m in _WORD_PIECE.finditer(text)] for text in texts]
+        encoded = {"input_ids": [[0] * len(spans) for spans in offsets]}
+        if return_offsets_mapping:
+            encoded["offset_mapping"] = offsets
+        return encoded
 
 class TextChunker:
     """
     A class for splitting text into chunks with metadata tagging.
     """
     
-    def __init__(self, chunk_size: int = 500, overlap: int = 50):
+    def __init__(self, chunk_size: int = 500, overlap: int = 50, pack_sections: bool = False):
         """
         Initialize the TextChunker with default chunking parameters.
         
         Args:
             chunk_size: Number of words per chunk (default: 500)
             overlap: Number of overlapping words between chunks (default: 50)
+            pack_sections: Merge consecutive sections shorter than a chunk
+                (paragraphs, lines) so chunks can span them
         """
         self.chunk_size = chunk_size
         self.overlap = overlap
+        self.pack_sections = pack_sections
+    
+    def _is_small(self, text: str) -> bool:
+        return len(text.split()) < self.chunk_size
+    
+    def iter_spans(self, pages: Iterable[Tuple[int, str]], source_file: str) -> Iterator[ChunkSpan]:
+        """
+        Yield word-window chunks as offsets into each page's text.
+        
+        Each page is scanned once; only word boundaries are kept (in compact
+        arrays), and no chunk text is built until it is asked for.
+        
+        Args:
+            pages: Iterable of (page_number, text) tuples
+            source_file: Source file identifier for metadata
+            
+        Yields:
+            ChunkSpan per chunk, in document order
+        """
+        step = max(1, self.chunk_size - self.overlap)
+        for page_num, text, sections in _pack_sections(pages, self._is_small if self.pack_sections else None):
+            starts = array("L")
+            ends = array("L")
+            for match in _WORD.finditer(text):
+                starts.append(match.start())
+                ends.append(match.end())
+            
+            for chunk_index, start in enumerate(range(0, len(starts), step)):
+                end = min(start + self.chunk_size, len(starts)) - 1
+                span = ChunkSpan(source_file, page_num, chunk_index, starts[start], ends[end], text)
+                yield span.locate(sections) if sections else span
+                if end == len(starts) - 1:
+                    break
     
     def chunk_text_with_metadata(self, pages: List[Tuple[int, str]], source_file: str) -> List[Dict]:
         """
@@ -28,40 +207,479 @@ class TextChunker:
         Returns:
             List of dictionaries containing chunk data and metadata
         """
-        all_chunks = []
+        return [span.to_dict() for span in self.iter_spans(pages, source_file)]
+    
+    def update_chunking_parameters(self, chunk_size: int = None, overlap: int = None):
+        """
+        Update the chunking parameters.
+        
+        Args:
+            chunk_size: New chunk size (if provided)
+            overlap: New overlap size (if provided)
+        """
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+        if overlap is not None:
+            self.overlap = overlap
+            
 
-        for page_num, text in pages:
-            words = text.split()
+class TokenAwareChunker:
+    """
+    Splits text into chunks that fit the embedding model's sequence limit.
+    
+    Text is cut into sentences (and paragraphs), which are tokenized in one
+    batch with the embedder's own tokenizer and packed greedily up to the
+    limit, so nothing that gets stored is silently truncated at embedding
+    time. Overlap is measured in tokens and snapped to whole sentences.
+    Chunks are exact slices of the source text.
+    """
+    
+    def __init__(
+        self,
+        source: Any = None,
+        max_tokens: Optional[int] = None,
+        overlap: int = 32,
+        tokenizer: Any = None,
+        pack_sections: bool = False
+    ):
+        """
+        Initialize the TokenAwareChunker.
+        
+        Args:
+            source: Object providing get_tokenizer() and max_seq_length (the Embedder);
+                both are resolved on first use so the model loads lazily
+            max_tokens: Maximum tokens per chunk (capped at the model's max_seq_length)
+            overlap: Tokens of trailing sentences repeated at the start of the next chunk
+            tokenizer: Explicit tokenizer (overrides source); RegexTokenizer if neither is available
+            pack_sections: Merge consecutive sections shorter than a chunk
+                (paragraphs, lines) so chunks can span them
+        """
+        self.source = source
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.pack_sections = pack_sections
+        self._tokenizer = tokenizer
+        self._explicit_tokenizer = tokenizer is not None
+        self._budget: Optional[int] = None
+    
+    def reset_model(self) -> None:
+        """Forget the tokenizer and budget resolved from source (e.g. after the embedding model changed)."""
+        if not self._explicit_tokenizer:
+            self._tokenizer = None
+        self._budget = None
+    
+    def _get_tokenizer(self):
+        if self._tokenizer is None:
+            tokenizer = self.source.get_tokenizer() if self.source is not None else None
+            self._tokenizer = tokenizer if tokenizer is not None else RegexTokenizer()
+        return self._tokenizer
+    
+    def _get_budget(self) -> int:
+        # Content tokens per chunk, leaving room for [CLS]/[SEP]
+        if self._budget is None:
+            tokenizer = self._get_tokenizer()
+            limit = getattr(self.source, "max_seq_length", None) or self.max_tokens or 256
+            if self.max_tokens:
+                limit = min(limit, self.max_tokens)
+            special = tokenizer.num_special_tokens_to_add(pair=False) if hasattr(tokenizer, "num_special_tokens_to_add") else 2
+            self._budget = max(8, limit - special)
+        return self._budget
+    
+    def detached(self) -> "TokenAwareChunker":
+        """
+        Copy with tokenizer and budget resolved and no reference to the
+        embedder, so it can be pickled to worker processes.
+        """
+        self._get_budget()
+        clone = copy.copy(self)
+        clone.source = None
+        return clone
+    
+    @staticmethod
+    def _segments(text: str) -> List[Tuple[int, int]]:
+        spans = []
+        start = 0
+        for match in _SEGMENT_BREAK.finditer(text):
+            if match.start() > start:
+                spans.append((start, match.start()))
+            start = match.end()
+        if start < len(text):
+            spans.append((start, len(text)))
+        # Trim surrounding whitespace inside each span
+        trimmed = []
+        for s, e in spans:
+            piece = text[s:e]
+            left = len(piece) - len(piece.lstrip())
+            right = len(piece.rstrip())
+            if right > left:
+                trimmed.append((s + left, s + right))
+        return trimmed
+    
+    def _measure(self, text: str, spans: List[Tuple[int, int]], budget: int) -> Tuple[List[Tuple[int, int]], List[int]]:
+        """Token counts per span; spans longer than the budget are split at token boundaries."""
+        tokenizer = self._get_tokenizer()
+        fast = getattr(tokenizer, "is_fast", False)
+        encoded = tokenizer(
+            [text[s:e] for s, e in spans],
+            add_special_tokens=False,
+            return_offsets_mapping=fast
+        )
+        out_spans: List[Tuple[int, int]] = []
+        counts: List[int] = []
+        for index, (s, e) in enumerate(spans):
+            count = len(encoded["input_ids"][index])
+            if count <= budget:
+                out_spans.append((s, e))
+                counts.append(count)
+                continue
+            
+            if fast:
+                offsets = [o for o in encoded["offset_mapping"][index] if o[1] > o[0]]
+                for start in range(0, len(offsets), budget):
+                    piece = offsets[start:start + budget]
+                    out_spans.append((s + piece[0][0], s + piece[-1][1]))
+                    counts.append(len(piece))
+            else:
+                # Slow tokenizers have no offsets: cut on words in proportion
+                words = [(m.start(), m.end()) for m in re.finditer(r"\S+", text[s:e])]
+                step = max(1, len(words) * budget // count)
+                for start in range(0, len(words), step):
+                    piece = words[start:start + step]
+                    out_spans.append((s + piece[0][0], s + piece[-1][1]))
+                    counts.append(min(budget, count * len(piece) // len(words) + 1))
+        return out_spans, counts
+    
+    def iter_spans(self, pages: Iterable[Tuple[int, str]], source_file: str) -> Iterator[ChunkSpan]:
+        """
+        Yield token-bounded chunks as offsets into each page's text.
+        
+        Args:
+            pages: Iterable of (page_number, text) tuples
+            source_file: Source file identifier for metadata
+            
+        Yields:
+            ChunkSpan per chunk (with its token count), in document order
+        """
+        budget = self._get_budget()
+        overlap = min(self.overlap, budget // 2)
+        is_small = (lambda text: estimate_tokens(text) < budget) if self.pack_sections else None
+        
+        for page_num, text, sections in _pack_sections(pages, is_small):
+            spans = self._segments(text)
+            if not spans:
+                continue
+            spans, counts = self._measure(text, spans, budget)
+            
             start = 0
             chunk_index = 0
-
-            while start < len(words):
-                end = start + self.chunk_size
-                chunk_words = words[start:end]
-                chunk_text = " ".join(chunk_words)
-
-                all_chunks.append({
-                    "text": chunk_text,
-                    "page": page_num,
-                    "source": source_file,
-                    "chunk_id": f"{source_file}_p{page_num}_c{chunk_index}"
-                })
-
-                start += self.chunk_size - self.overlap
+            while start < len(spans):
+                end = start
+                total = 0
+                while end < len(spans) and total + counts[end] <= budget:
+                    total += counts[end]
+                    end += 1
+                
+                span = ChunkSpan(source_file, page_num, chunk_index, spans[start][0], spans[end - 1][1], text, total)
+                yield span.locate(sections) if sections else span
                 chunk_index += 1
-
-        return all_chunks
+                if end >= len(spans):
+                    break
+                
+                # Start the next chunk with whole trailing sentences worth <= overlap tokens
+                next_start = end
+                carried = 0
+                while next_start - 1 > start and carried + counts[next_start - 1] <= overlap:
+                    next_start -= 1
+                    carried += counts[next_start]
+                start = next_start
+    
+    def chunk_text_with_metadata(self, pages: List[Tuple[int, str]], source_file: str) -> List[Dict]:
+        """
+        Splits each page's text into token-bounded chunks and tags each with metadata.
+        
+        Args:
+            pages: List of tuples containing (page_number, text)
+            source_file: Source file identifier for metadata
+            
+        Returns:
+            List of dictionaries containing chunk data and metadata (incl. "tokens")
+        """
+        return [span.to_dict() for span in self.iter_spans(pages, source_file)]
     
     def update_chunking_parameters(self, chunk_size: int = None, overlap: int = None):
         """
         Update the chunking parameters.
         
         Args:
-            chunk_size: New chunk size (if provided)
-            overlap: New overlap size (if provided)
+            chunk_size: New maximum tokens per chunk (if provided)
+            overlap: New overlap in tokens (if provided)
         """
         if chunk_size is not None:
-            self.chunk_size = chunk_size
+            self.max_tokens = chunk_size
+            self._budget = None
         if overlap is not None:
             self.overlap = overlap
-            
\ No newline at end of file
+
+class SemanticChunker(TokenAwareChunker):
+    """
+    Splits text at topic shifts found with sentence embeddings.
+    
+    Sentences of a whole document are embedded in large batches with the
+    Embedder, and the cosine distance between each pair of neighbours is
+    computed in one vectorized step. A chunk ends at the first boundary whose
+    distance is in the document's top percentile once it holds min_tokens;
+    when the token budget runs out first, it ends at the largest shift seen
+    so far. Chunks do not overlap, since boundaries fall between topics.
+    
+    With pool_embeddings, each chunk also gets the token-weighted mean of its
+    sentence embeddings, so indexing needs no second embedding pass. Pooled
+    vectors are close to, but not the same as, embedding the chunk text.
+    """
+    
+    def __init__(
+        self,
+        embedder: Any,
+        max_tokens: Optional[int] = None,
+        min_tokens: int = 64,
+        breakpoint_percentile: float = 90.0,
+        pool_embeddings: bool = False,
+        tokenizer: Any = None,
+        pack_sections: bool = False
+    ):
+        """
+        Initialize the SemanticChunker.
+        
+        Args:
+            embedder: Embedder used for sentence embeddings (and its tokenizer and sequence limit)
+            max_tokens: Maximum tokens per chunk (capped at the model's max_seq_length)
+            min_tokens: Tokens a chunk holds before a topic shift may end it
+            breakpoint_percentile: Percentile of a document's sentence distances
+                above which a boundary counts as a topic shift
+            pool_embeddings: Attach mean-pooled sentence embeddings to each chunk
+            tokenizer: Explicit tokenizer (overrides the embedder's)
+            pack_sections: Merge consecutive sections shorter than a chunk
+        """
+        super().__init__(embedder, max_tokens=max_tokens, overlap=0, tokenizer=tokenizer, pack_sections=pack_sections)
+        self.min_tokens = min_tokens
+        self.breakpoint_percentile = breakpoint_percentile
+        self.pool_embeddings = pool_embeddings
+        self.logger = logging.getLogger(__name__)
+    
+    def _embed_sentences(self, texts: List[str]) -> np.ndarray:
+        """Unit-length sentence embeddings, or an empty array if embedding failed."""
+        parts = []
+        for start in range(0, len(texts), SENTENCE_BATCH):
+            embeddings = self.source.get_embeddings(texts[start:start + SENTENCE_BATCH])
+            if embeddings.size == 0:
+                return np.empty((0, 0), dtype=np.float32)
+            parts.append(embeddings)
+        vectors = np.vstack(parts).astype(np.float32, copy=False)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+    
+    def _cuts(self, counts: List[int], distances: np.ndarray, threshold: float, budget: int) -> Iterator[Tuple[int, int]]:
+        """(start, end) sentence ranges of one page's chunks."""
+        start = 0
+        while start < len(counts):
+            end = start
+            total = 0
+            shift = False
+            while end < len(counts) and total + counts[end] <= budget:
+                total += counts[end]
+                end += 1
+                if end < len(counts) and total >= self.min_tokens and distances[end - 1] >= threshold:
+                    shift = True
+                    break
+            
+            if end < len(counts) and not shift:
+                # Out of budget: end at the largest shift after min_tokens
+                filled = np.cumsum(counts[start:end - 1])
+                allowed = np.nonzero(filled >= self.min_tokens)[0]
+                if allowed.size:
+                    end = start + 1 + int(allowed[np.argmax(distances[start + allowed])])
+            
+            yield start, max(end, start + 1)
+            start = max(end, start + 1)
+    
+    def iter_spans(self, pages: Iterable[Tuple[int, str]], source_file: str) -> Iterator[ChunkSpan]:
+        """
+        Yield topic-bounded chunks as offsets into each page's text.
+        
+        A document's sentences are embedded together, so its pages are
+        collected before the first chunk is yielded.
+        
+        Args:
+            pages: Iterable of (page_number, text) tuples
+            source_file: Source file identifier for metadata
+            
+        Yields:
+            ChunkSpan per chunk (with token count, and embedding if pooling), in document order
+        """
+        pages = list(pages)
+        budget = self._get_budget()
+        is_small = (lambda text: estimate_tokens(text) < budget) if self.pack_sections else None
+        
+        measured = []
+        for page_num, text, sections in _pack_sections(pages, is_small):
+            spans = self._segments(text)
+            if spans:
+                spans, counts = self._measure(text, spans, budget)
+                measured.append((page_num, text, sections, spans, counts))
+        if not measured:
+            return
+        
+        vectors = self._embed_sentences([text[s:e] for _, text, _, spans, _ in measured for s, e in spans])
+        if vectors.size == 0:
+            self.logger.warning(f"⚠️ Sentence embedding failed for {source_file}; falling back to token-window chunks")
+            yield from super().iter_spans(pages, source_file)
+            return
+        
+        # Cosine distance of every sentence to the next (unit vectors); page ends are never compared
+        distances = 1.0 - np.einsum("ij,ij->i", vectors[:-1], vectors[1:])
+        page_ends = np.cumsum([len(spans) for *_, spans, _ in measured])[:-1] - 1
+        within = np.delete(distances, page_ends)
+        threshold = float(np.percentile(within, self.breakpoint_percentile)) if within.size else np.inf
+        
+        offset = 0
+        for page_num, text, sections, spans, counts in measured:
+            page_distances = distances[offset:offset + len(spans) - 1]
+            for chunk_index, (start, end) in enumerate(self._cuts(counts, page_distances, threshold, budget)):
+                span = ChunkSpan(source_file, page_num, chunk_index, spans[start][0], spans[end - 1][1], text, sum(counts[start:end]))
+                if self.pool_embeddings:
+                    weights = np.asarray(counts[start:end], dtype=np.float32)
+                    pooled = weights @ vectors[offset + start:offset + end]
+                    span.embedding = pooled / max(float(np.linalg.norm(pooled)), 1e-12)
+                yield span.locate(sections) if sections else span
+            offset += len(spans)
+    
+    def update_chunking_parameters(self, chunk_size: int = None, overlap: int = None):
+        """
+        Update the chunking parameters.
+        
+        Args:
+            chunk_size: New maximum tokens per chunk (if provided)
+            overlap: Ignored; semantic chunks do not overlap
+        """
+        super().update_chunking_parameters(chunk_size=chunk_size)
+
+class WebContentChunker:
+    """
+    Structure-aware chunker for scraped web pages.
+    
+    Consecutive blocks under the same heading are merged up to a target
+    token size instead of producing one chunk per element, and every chunk
+    carries its heading path ("Admissions > Tuition and fees") both as
+    metadata and as a first line of text for retrieval context.
+    """
+    
+    def __init__(self, target_tokens: int = 256, respect_selectors: bool = False):
+        """
+        Initialize the WebContentChunker.
+        
+        Args:
+            target_tokens: Maximum estimated tokens per chunk
+            respect_selectors: Never merge blocks matched by different selectors
+        """
+        self.target_tokens = target_tokens
+        self.respect_selectors = respect_selectors
+    
+    def chunk_blocks(self, blocks: List[Dict[str, str]], url: str) -> List[Dict]:
+        """
+        Merge extracted blocks into chunks.
+        
+        Args:
+            blocks: Blocks in document order, as {"selector", "tag", "text"}
+            url: Source URL for metadata
+            
+        Returns:
+            List of dictionaries containing chunk data and metadata
+        """
+        chunks: List[Dict] = []
+        # Open headings as [level, text, has_body]
+        headings: List[List] = []
+        current: List[str] = []
+        current_tokens = 0
+        current_selectors: List[str] = []
+        # Heading path of the text in current; text under different paths is never merged
+        current_path = ""
+        
+        def heading_path() -> str:
+            return " > ".join(heading[1] for heading in headings)
+        
+        def budget(path: str) -> int:
+            # The path is prepended to every chunk's text, so it counts against the target
+            return max(self.target_tokens // 2, self.target_tokens - estimate_tokens(path))
+        
+        def flush() -> None:
+            nonlocal current, current_tokens, current_selectors
+            if current:
+                self._emit(chunks, url, current_path, " ".join(current), current_selectors)
+            current, current_tokens, current_selectors = [], 0, []
+        
+        def add(text: str, tokens: int, path: str) -> None:
+            nonlocal current_tokens, current_path
+            if current and (path != current_path or current_tokens + tokens > budget(path)):
+                flush()
+            current_path = path
+            current.append(text)
+            current_tokens += tokens
+        
+        for block in blocks:
+            text = block["text"]
+            tokens = estimate_tokens(text)
+            match = _HEADING.match(block.get("tag", ""))
+            if match:
+                # A heading starts a new section
+                if current_selectors:
+                    flush()
+                level = int(match.group(1))
+                while headings and headings[-1][0] >= level:
+                    closed = headings.pop()
+                    if not closed[2]:
+                        # Keep headings without body text (e.g. a list of titles) as content of their parent section
+                        add(closed[1], estimate_tokens(closed[1]), heading_path())
+                if headings:
+                    headings[-1][2] = True  # a subsection keeps its parent's title in its path
+                headings.append([level, text, False])
+                continue
+            
+            path = heading_path()
+            selector_changed = self.respect_selectors and current_selectors and block["selector"] not in current_selectors
+            if current and selector_changed:
+                flush()
+            if headings:
+                headings[-1][2] = True
+            
+            if tokens > budget(path):
+                # Oversized block: split on words into target-sized pieces
+                flush()
+                words = text.split()
+                step = max(1, len(words) * budget(path) // tokens)
+                for start in range(0, len(words), step):
+                    self._emit(chunks, url, path, " ".join(words[start:start + step]), [block["selector"]])
+                continue
+            
+            add(text, tokens, path)
+            if block["selector"] not in current_selectors:
+                current_selectors.append(block["selector"])
+        
+        if headings and not headings[-1][2]:
+            # A trailing heading without body is still kept, like the closed ones
+            closed = headings.pop()
+            add(closed[1], estimate_tokens(closed[1]), heading_path())
+        flush()
+        return chunks
+    
+    @staticmethod
+    def _emit(chunks: List[Dict], url: str, path: str, body: str, selectors: List[str]) -> None:
+        text = f"{path}\n{body}".strip() if path else body
+        if not text:
+            return
+        chunks.append({
+            "text": text,
+            "source": url,
+            "selector": ",".join(selectors) or "heading",
+            "heading_path": path,
+            "chunk_id": f"{url}_c{len(chunks)}",
+            "type": "web_content"
+        })
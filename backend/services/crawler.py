@@ -0,0 +1,271 @@
+# backend/services/crawler.py
+from typing import AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Set
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+import asyncio
+import logging
+import posixpath
+import re
+import time
+import httpx
+from .scraper import WebScraper
+
+# Query parameters that only track the visitor and never change page content
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "_ga"}
+
+# Links to these are not HTML pages and are not followed
+SKIP_EXTENSIONS = {
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".zip", ".rar",
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico",
+    ".mp3", ".mp4", ".avi", ".mov", ".css", ".js", ".json", ".xml", ".ics"
+}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# robots.txt larger than this is ignored (crawling is allowed), as Google caps it at 500 KiB
+MAX_ROBOTS_BYTES = 512 * 1024
+
+def canonicalize_url(url: str) -> Optional[str]:
+    """
+    Normalize a URL so equivalent spellings deduplicate to one key.
+
+    Lowercases scheme and host, drops default ports, fragments and tracking
+    parameters, collapses duplicate slashes and sorts the query string.
+
+    Args:
+        url: Absolute URL
+
+    Returns:
+        Canonical URL, or None for non-HTTP(S) or malformed URLs
+    """
+    try:
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return None
+
+    if scheme not in DEFAULT_PORTS or not host:
+        return None
+
+    if ":" in host:
+        host = f"[{host}]"
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+    path = re.sub(r"/{2,}", "/", parts.path) or "/"
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+def _site_key(host: str) -> str:
+    return host[4:] if host.startswith("www.") else host
+
+class CrawlResult(NamedTuple):
+    url: str
+    depth: int
+    data: Dict
+    error: Optional[str] = None
+
+class SiteCrawler:
+    """
+    Bounded breadth-first crawler built on WebScraper.
+
+    Pages are yielded as soon as they are scraped, so callers can index them
+    while the crawl continues; a small result queue applies backpressure
+    instead of accumulating the whole site in memory.
+    """
+
+    def __init__(
+        self,
+        scraper: WebScraper,
+        max_depth: int = 2,
+        max_pages: int = 100,
+        same_domain: bool = True,
+        concurrency: int = 8,
+        politeness_delay: float = 0.5,
+        respect_robots: bool = True
+    ):
+        """
+        Initialize the SiteCrawler.
+
+        Args:
+            scraper: WebScraper used for fetching (shares its HTTP client)
+            max_depth: Maximum link distance from a seed URL
+            max_pages: Maximum number of pages fetched per crawl
+            same_domain: Only follow links within the seeds' domains (subdomains included)
+            concurrency: Maximum number of pages fetched at once across all hosts
+            politeness_delay: Minimum seconds between requests to the same host
+                (raised to the robots.txt Crawl-delay when that is larger)
+            respect_robots: Skip URLs disallowed by robots.txt
+        """
+        self.scraper = scraper
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.same_domain = same_domain
+        self.concurrency = concurrency
+        self.politeness_delay = politeness_delay
+        self.respect_robots = respect_robots
+        self.logger = logging.getLogger(__name__)
+        self._robots: Dict[str, RobotFileParser] = {}
+        self._robots_locks: Dict[str, asyncio.Lock] = {}
+        self._host_locks: Dict[str, asyncio.Lock] = {}
+        self._next_fetch: Dict[str, float] = {}
+
+    @classmethod
+    def from_config(cls, scraper: WebScraper, config, **overrides) -> "SiteCrawler":
+        settings = {
+            "max_depth": config.crawl_max_depth,
+            "max_pages": config.crawl_max_pages,
+            "concurrency": config.crawl_concurrency,
+            "politeness_delay": config.crawl_delay
+        }
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(scraper, **settings)
+
+    async def _load_robots(self, origin: str) -> RobotFileParser:
+        url = f"{origin}/robots.txt"
+        parser = RobotFileParser(url)
+        try:
+            # Through the scraper so the host slot and byte cap apply; a missing robots.txt is not retried
+            async with self.scraper._request_stream(url, max_retries=1) as response:
+                chunks = response.aiter_bytes()
+                body = self.scraper._capped_body(await anext(chunks, b""), chunks, MAX_ROBOTS_BYTES)
+                content, _ = await self.scraper._read_capped(body, url, truncate=False)
+            parser.parse(content.decode(response.charset_encoding or "utf-8", errors="replace").splitlines())
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in (401, 403):
+                parser.disallow_all = True
+            else:
+                parser.allow_all = True
+        except Exception as e:
+            self.logger.warning(f"⚠️ Could not fetch robots.txt for {origin}: {e}")
+            parser.allow_all = True
+        return parser
+
+    async def _robots_for(self, url: str) -> RobotFileParser:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        parser = self._robots.get(origin)
+        if parser is None:
+            lock = self._robots_locks.setdefault(origin, asyncio.Lock())
+            async with lock:
+                parser = self._robots.get(origin)
+                if parser is None:
+                    parser = self._robots[origin] = await self._load_robots(origin)
+        return parser
+
+    async def _wait_politely(self, url: str, delay: float) -> None:
+        host = urlsplit(url).netloc
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            wait = self._next_fetch.get(host, 0.0) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_fetch[host] = time.monotonic() + delay
+
+    async def _fetch(self, url: str, depth: int, selectors: Optional[List[str]], cache_scope: Optional[str]) -> CrawlResult:
+        delay = self.politeness_delay
+        if self.respect_robots:
+            robots = await self._robots_for(url)
+            if not robots.can_fetch(self.scraper.user_agent, url):
+                return CrawlResult(url, depth, {}, "Disallowed by robots.txt")
+            delay = max(delay, robots.crawl_delay(self.scraper.user_agent) or 0)
+
+        await self._wait_politely(url, delay)
+        try:
+            data = await self.scraper._scrape_page(url, selectors, True, False, cache_scope)
+            return CrawlResult(url, depth, data)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Failed to crawl {url}: {e}")
+            return CrawlResult(url, depth, {}, str(e) or type(e).__name__)
+
+    def _follow(self, page_url: str, href: str, sites: Set[str]) -> Optional[str]:
+        url = canonicalize_url(urljoin(page_url, href))
+        if url is None:
+            return None
+
+        parts = urlsplit(url)
+        if posixpath.splitext(parts.path)[1].lower() in SKIP_EXTENSIONS:
+            return None
+
+        if self.same_domain:
+            site = _site_key(parts.hostname or "")
+            if not any(site == s or site.endswith("." + s) for s in sites):
+                return None
+        return url
+
+    async def crawl(
+        self,
+        seeds: Iterable[str],
+        selectors: Optional[List[str]] = None,
+        cache_scope: Optional[str] = None
+    ) -> AsyncIterator[CrawlResult]:
+        """
+        Crawl breadth-first from the seed URLs.
+
+        Args:
+            seeds: Start URLs (depth 0)
+            selectors: CSS selectors for content extraction
+            cache_scope: Revalidate pages against the scraper's HTTP cache in this scope;
+                unchanged pages carry only their cached links, so the crawl still continues
+
+        Yields:
+            CrawlResult per fetched (or skipped) page, in completion order
+        """
+        frontier: asyncio.Queue = asyncio.Queue()
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        seen: Set[str] = set()
+        sites: Set[str] = set()
+
+        def enqueue(url: str, depth: int) -> None:
+            if url in seen or len(seen) >= self.max_pages:
+                return
+            seen.add(url)
+            frontier.put_nowait((url, depth))
+
+        for seed in seeds:
+            url = canonicalize_url(seed)
+            if url is None:
+                self.logger.warning(f"⚠️ Skipping invalid seed URL: {seed}")
+                continue
+            sites.add(_site_key(urlsplit(url).hostname or ""))
+            enqueue(url, 0)
+
+        async def worker() -> None:
+            while True:
+                url, depth = await frontier.get()
+                try:
+                    result = await self._fetch(url, depth, selectors, cache_scope)
+                    if depth < self.max_depth:
+                        for link in result.data.get("links", []):
+                            next_url = self._follow(url, link.get("url", ""), sites)
+                            if next_url:
+                                enqueue(next_url, depth + 1)
+                    await results.put(result)
+                finally:
+                    frontier.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        drained = asyncio.create_task(frontier.join())
+
+        try:
+            while True:
+                next_result = asyncio.ensure_future(results.get())
+                await asyncio.wait({next_result, drained}, return_when=asyncio.FIRST_COMPLETED)
+                if next_result.done():
+                    yield next_result.result()
+                    continue
+
+                # Every page has been processed; hand over what is still queued
+                next_result.cancel()
+                while not results.empty():
+                    yield results.get_nowait()
+                break
+        finally:
+            for task in workers + [drained]:
+                task.cancel()
+            await asyncio.gather(*workers, drained, return_exceptions=True)
+
+        self.logger.info(f"🕸️ Crawl finished: {len(seen)} pages from {len(sites)} site(s)")
@@ -0,0 +1,293 @@
+# backend/services/dedup.py
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+import hashlib
+import logging
+import re
+import threading
+import time
+import zlib
+import numpy as np
+from utils.metrics import DEDUP_REMOVED
+
+_MERSENNE_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_MAX_HASH = np.uint64(2 ** 32 - 1)
+_WORD = re.compile(r"\w+")
+
+def _normalize(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles, vectorized with NumPy.
+
+    Uses the universal hash family h(x) = (a * x + b) mod p on 32-bit CRC
+    shingle hashes; all products fit in uint64 without overflow.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 32 - 1, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.randint(0, 2 ** 32 - 1, size=(num_perm, 1), dtype=np.uint64)
+
+    def shingle_hashes(self, text: str) -> np.ndarray:
+        words = _normalize(text)
+        k = min(self.shingle_size, len(words)) or 1
+        shingles = {" ".join(words[i:i + k]) for i in range(max(1, len(words) - k + 1))}
+        return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = self.shingle_hashes(text)
+        permuted = (self._a * hashes[np.newaxis, :] + self._b) % _MERSENNE_PRIME
+        return np.minimum(permuted.min(axis=1), _MAX_HASH).astype(np.uint32)
+
+class MinHashLSH:
+    """
+    Banded LSH index over MinHash signatures.
+
+    With b bands of r rows, pairs with Jaccard similarity s collide with
+    probability 1 - (1 - s^r)^b; candidates are then verified against the
+    estimated similarity, so the band layout only affects recall and speed.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[bytes, Set[int]]] = [defaultdict(set) for _ in range(bands)]
+        self._signatures: Dict[int, np.ndarray] = {}
+
+    def _keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def insert(self, item_id: int, signature: np.ndarray) -> None:
+        self._signatures[item_id] = signature
+        for band, key in enumerate(self._keys(signature)):
+            self._buckets[band][key].add(item_id)
+
+    def remove(self, item_id: int) -> None:
+        signature = self._signatures.pop(item_id, None)
+        if signature is None:
+            return
+        for band, key in enumerate(self._keys(signature)):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def query(self, signature: np.ndarray, threshold: float) -> Optional[int]:
+        """Return an indexed item whose estimated Jaccard similarity is >= threshold."""
+        candidates: Set[int] = set()
+        for band, key in enumerate(self._keys(signature)):
+            candidates.update(self._buckets[band].get(key, ()))
+        for item_id in candidates:
+            if np.mean(self._signatures[item_id] == signature) >= threshold:
+                return item_id
+        return None
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+class DedupResult(NamedTuple):
+    kept: List[Dict]
+    removed: int
+    # Signatures of kept chunks, committed to the index once they are stored
+    pending: List[Tuple[Dict, np.ndarray]]
+    replaceable: bool = False
+
+class _ScopeIndex:
+    def __init__(self, num_perm: int, bands: int):
+        self.lsh = MinHashLSH(num_perm, bands)
+        self.exact: Dict[bytes, int] = {}
+        self.sources: Dict[int, str] = {}
+        self.next_id = 0
+
+class NearDuplicateFilter:
+    """
+    Drops exact and near-duplicate chunks before embedding.
+
+    Repeated headers, contact blocks and accreditation paragraphs are caught
+    within a batch and across everything already indexed into the same
+    collection. Within a batch, the kept chunk records the other sources in
+    "duplicate_sources" so citations aren't lost.
+
+    Chunks of replaceable sources (pages re-indexed incrementally, whose
+    points are deleted when they change) never hide chunks of other sources:
+    deleting the only stored copy would lose the content of pages that come
+    back unchanged. They are kept in a per-source scope and only suppress
+    repeats within their own source; chunks of permanent sources suppress
+    duplicates from any source.
+
+    The index lives in memory only. After a restart, or once a collection's
+    index is evicted (idle for idle_ttl, or least recently used beyond
+    max_collections), chunks already stored in that collection are unknown
+    and identical uploads are embedded and stored again; nothing is lost.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        max_collections: int = 256,
+        idle_ttl: Optional[float] = 86400.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the NearDuplicateFilter.
+
+        Args:
+            threshold: Estimated Jaccard similarity at or above which chunks are duplicates
+            num_perm: MinHash signature length
+            bands: LSH bands (num_perm / bands rows each)
+            shingle_size: Words per shingle
+            max_collections: Collections indexed at once; the least recently used is evicted
+            idle_ttl: Seconds after which an unused collection's index is evicted (None keeps it)
+            clock: Monotonic time source
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.max_collections = max_collections
+        self.idle_ttl = idle_ttl
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+        # Per collection, least recently used first: scope None for permanent sources,
+        # the source itself for replaceable ones
+        self._collections: "OrderedDict[str, Dict[Optional[str], _ScopeIndex]]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _scopes(self, collection_name: str) -> Dict[Optional[str], _ScopeIndex]:
+        """Scopes of a collection, marked as just used; evicts idle and surplus collections."""
+        now = self.clock()
+        scopes = self._collections.get(collection_name)
+        if scopes is None:
+            scopes = self._collections[collection_name] = {}
+        self._collections.move_to_end(collection_name)
+        self._last_used[collection_name] = now
+
+        while len(self._collections) > 1:
+            oldest = next(iter(self._collections))
+            idle = self.idle_ttl is not None and now - self._last_used[oldest] > self.idle_ttl
+            if not idle and len(self._collections) <= self.max_collections:
+                break
+            del self._collections[oldest], self._last_used[oldest]
+            self.logger.info(f"🧹 Evicted dedup index of '{oldest}'")
+        return scopes
+
+    def _index(self, collection_name: str, source: Optional[str] = None) -> _ScopeIndex:
+        scopes = self._scopes(collection_name)
+        index = scopes.get(source)
+        if index is None:
+            index = scopes[source] = _ScopeIndex(self.num_perm, self.bands)
+        return index
+
+    def _digest(self, text: str) -> bytes:
+        return hashlib.blake2b(" ".join(_normalize(text)).encode("utf-8"), digest_size=16).digest()
+
+    def filter(self, collection_name: str, chunks: List[Dict], replaceable: bool = False) -> DedupResult:
+        """
+        Remove duplicates of each other and of chunks already in the collection.
+
+        The index is not updated here; call commit() with the result once the
+        kept chunks are stored, so a failed upload doesn't hide them next time.
+
+        Args:
+            collection_name: Collection the chunks are indexed into
+            chunks: Chunk dictionaries with a "text" field
+            replaceable: The chunks' sources may later be deleted and re-indexed
+                individually, so they only suppress duplicates within their own source
+
+        Returns:
+            DedupResult with the kept chunks and how many were removed
+        """
+        kept: List[Dict] = []
+        pending: List[Tuple[Dict, np.ndarray]] = []
+        # Per scope (None: shared by all sources) within this batch: exact digests, LSH of kept positions
+        batch: Dict[Optional[str], Tuple[Dict[bytes, int], MinHashLSH]] = {}
+
+        with self._lock:
+            shared = self._index(collection_name)
+            scopes = self._collections[collection_name]
+            for chunk in chunks:
+                text = chunk.get("text", "")
+                scope = chunk.get("source", "") if replaceable else None
+                indexes = [shared]
+                if replaceable and scope in scopes:
+                    indexes.append(scopes[scope])
+                batch_exact, batch_lsh = batch.setdefault(scope, ({}, MinHashLSH(self.num_perm, self.bands)))
+
+                digest = self._digest(text)
+                if any(digest in index.exact for index in indexes):
+                    continue
+                if digest in batch_exact:
+                    self._merge_source(kept[batch_exact[digest]], chunk)
+                    continue
+
+                signature = self.hasher.signature(text)
+                if any(index.lsh.query(signature, self.threshold) is not None for index in indexes):
+                    continue
+                match = batch_lsh.query(signature, self.threshold)
+                if match is not None:
+                    self._merge_source(kept[match], chunk)
+                    continue
+
+                batch_exact[digest] = len(kept)
+                batch_lsh.insert(len(kept), signature)
+                kept.append(chunk)
+                pending.append((chunk, signature))
+
+        removed = len(chunks) - len(kept)
+        if removed:
+            DEDUP_REMOVED.inc(removed)
+            self.logger.info(f"🧬 Dropped {removed}/{len(chunks)} duplicate chunks for '{collection_name}'")
+        return DedupResult(kept, removed, pending, replaceable)
+
+    @staticmethod
+    def _merge_source(kept: Dict, duplicate: Dict) -> None:
+        source = duplicate.get("source")
+        if source and source != kept.get("source"):
+            sources = kept.setdefault("duplicate_sources", [])
+            if source not in sources:
+                sources.append(source)
+
+    def commit(self, collection_name: str, result: DedupResult) -> None:
+        """Add the kept chunks of a filter() result to the collection's index."""
+        with self._lock:
+            for chunk, signature in result.pending:
+                index = self._index(collection_name, chunk.get("source", "") if result.replaceable else None)
+                item_id = index.next_id
+                index.next_id += 1
+                index.exact[self._digest(chunk.get("text", ""))] = item_id
+                index.lsh.insert(item_id, signature)
+                index.sources[item_id] = chunk.get("source", "")
+
+    def remove_sources(self, collection_name: str, sources: List[str]) -> None:
+        """Forget chunks of sources whose points were deleted (e.g. pages being re-indexed)."""
+        wanted = set(sources)
+        with self._lock:
+            scopes = self._collections.get(collection_name)
+            if scopes is None:
+                return
+            for source in wanted:
+                scopes.pop(source, None)
+            index = scopes.get(None)
+            if index is None:
+                return
+            stale = {item_id for item_id, source in index.sources.items() if source in wanted}
+            for item_id in stale:
+                index.lsh.remove(item_id)
+                del index.sources[item_id]
+            index.exact = {digest: item_id for digest, item_id in index.exact.items() if item_id not in stale}
+
+    def clear(self, collection_name: str) -> None:
+        with self._lock:
+            self._collections.pop(collection_name, None)
+            self._last_used.pop(collection_name, None)
@@ -1,22 +1,85 @@
 # backend/services/embedder.py
-from typing import List, Dict, Optional, TYPE_CHECKING
+from typing import Any, List, Dict, Optional, TYPE_CHECKING
 import numpy as np
 import logging
+import os
+import threading
+import time
 from langsmith import traceable
 from config.app_config import AppConfig
+from utils.metrics import EMBED_MS, EMBED_TEXTS, EMBED_TEXTS_PER_SEC
+
+# Up to this many texts are encoded in one call, without length bucketing
+SMALL_BATCH = 16
+
+# Rough peak activation memory per padded token (6-layer, 384-d encoder at
+# up to 256 tokens, attention scores included); sizes the automatic token budget
+BYTES_PER_PADDED_TOKEN = 48 * 1024
+
+# Share of available memory one encode batch may use, and the bounds of the automatic budget
+BATCH_MEMORY_FRACTION = 0.05
+MIN_BATCH_TOKENS = 2048
+MAX_BATCH_TOKENS = 65536
+
+# Metadata embedding calls with fewer texts stay in-process even with worker processes configured
+POOL_MIN_TEXTS = 256
+
+def _available_memory(model) -> Optional[int]:
+    """Free bytes on the model's device (GPU memory or MemAvailable), if known."""
+    device = getattr(model, "device", None)
+    if getattr(device, "type", None) == "cuda":
+        try:
+            import torch
+            return torch.cuda.mem_get_info(device)[0]
+        except Exception:
+            return None
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def _is_out_of_memory(error: Exception) -> bool:
+    return isinstance(error, MemoryError) or "out of memory" in str(error).lower()
 
 if TYPE_CHECKING:
     from sentence_transformers import SentenceTransformer
+    from .embedding_pool import EmbeddingPool
 
 class Embedder:
     """
     A class for generating text embeddings using SentenceTransformers.
     Handles lazy model loading and provides embedding generation methods.
+    
+    With embedding_workers > 1, large get_embeddings_for_metadata calls
+    (ingestion) are encoded by an EmbeddingPool of worker processes; queries
+    always use the in-process model.
+    
+    The model runs on PyTorch, or (embedding_backend="onnx") on ONNX Runtime,
+    optionally with dynamic int8 quantization. ONNX exports are kept in
+    embedding_onnx_dir, so only the first start pays for exporting.
     """
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, model=None):
         self.model_name = "all-MiniLM-L6-v2"  # default
         # Allow override from config if you want later
-        self._model: Optional["SentenceTransformer"] = None
+        # A pre-built model (anything with a SentenceTransformer-style encode()) skips lazy loading
+        self._model: Optional["SentenceTransformer"] = model
+        self._prebuilt_model = model
+        self.backend = config.embedding_backend
+        self.quantization = config.embedding_quantization
+        self.threads = config.embedding_threads
+        self.onnx_dir = config.embedding_onnx_dir
+        self.batch_tokens = config.embedding_batch_tokens
+        self.max_batch_size = config.embedding_max_batch_size
+        self.config = config
+        self.workers = config.embedding_workers
+        self._pool: Optional["EmbeddingPool"] = None
+        # Bulk uploads run in worker threads; only one of them may build the pool
+        self._pool_lock = threading.Lock()
+        self.last_stats: Optional[Dict[str, float]] = None
         self.logger = logging.getLogger(__name__)
 
     # def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
@@ -39,11 +102,20 @@ class Embedder:
         """
         if self._model is None:
             try:
-                from sentence_transformers import SentenceTransformer
-                self._model = SentenceTransformer(self.model_name)
-                self.logger.info(f"✅ Loaded embedding model: {self.model_name}")
+                if self.backend == "onnx":
+                    self._model = self._load_onnx_model()
+                else:
+                    from sentence_transformers import SentenceTransformer
+                    if self.threads:
+                        import torch
+                        torch.set_num_threads(self.threads)
+                    self._model = SentenceTransformer(self.model_name)
+                self.logger.info(f"✅ Loaded embedding model: {self.model_name} ({self.describe_backend()})")
             except ImportError:
-                self.logger.error("❌ sentence-transformers package not installed")
+                if self.backend == "onnx":
+                    self.logger.error("❌ ONNX backend needs: pip install 'sentence-transformers[onnx]'")
+                else:
+                    self.logger.error("❌ sentence-transformers package not installed")
                 raise
             except Exception as e:
                 self.logger.error(f"❌ Failed to load model {self.model_name}: {e}")
@@ -51,35 +123,200 @@ class Embedder:
         
         return self._model
     
-    def get_embeddings(self, chunks: List[str]) -> np.ndarray:
+    def describe_backend(self) -> str:
+        if self.backend != "onnx":
+            return "torch"
+        return f"onnx int8/{self.quantization}" if self.quantization else "onnx fp32"
+    
+    def _onnx_model_kwargs(self) -> Dict[str, Any]:
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.threads:
+            # One request encodes at a time per session; spend the threads inside each operator
+            options.intra_op_num_threads = self.threads
+            options.inter_op_num_threads = 1
+        return {"provider": "CPUExecutionProvider", "session_options": options}
+    
+    def _load_onnx_model(self) -> "SentenceTransformer":
+        """
+        Load the model on ONNX Runtime, exporting (and quantizing) it on first use.
+        
+        Returns:
+            SentenceTransformer running on the ONNX backend
+        """
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+        
+        local_dir = os.path.join(self.onnx_dir, self.model_name.replace("/", "__"))
+        if not os.path.isdir(local_dir):
+            # Uses the hub's ONNX weights when published, otherwise exports from PyTorch
+            model = SentenceTransformer(self.model_name, backend="onnx", model_kwargs=self._onnx_model_kwargs())
+            model.save_pretrained(local_dir)
+            self.logger.info(f"💾 Saved ONNX export of {self.model_name} to {local_dir}")
+        
+        model_kwargs = self._onnx_model_kwargs()
+        if self.quantization:
+            file_name = f"onnx/model_qint8_{self.quantization}.onnx"
+            if not os.path.exists(os.path.join(local_dir, file_name)):
+                model = SentenceTransformer(local_dir, backend="onnx", model_kwargs=self._onnx_model_kwargs())
+                export_dynamic_quantized_onnx_model(model, self.quantization, local_dir)
+                self.logger.info(f"💾 Saved int8 ({self.quantization}) quantized model to {local_dir}")
+            model_kwargs["file_name"] = file_name
+        
+        return SentenceTransformer(local_dir, backend="onnx", model_kwargs=model_kwargs)
+    
+    def warmup(self) -> None:
+        """
+        Load the model and encode dummy batches (a query and a batch of mixed
+        lengths), so the first request doesn't pay for loading and one-time
+        kernel initialization.
+        """
+        texts = ["warmup"] + [" ".join(["warmup"] * n) for n in (16, 64, 256)]
+        for batch in ([texts[0]], texts):
+            if self.get_embeddings(batch).size == 0:
+                raise RuntimeError("Warmup encode failed")
+    
+    def get_tokenizer(self):
+        """
+        Return the model's tokenizer (a Hugging Face fast tokenizer for
+        SentenceTransformer models), or None if the model has none.
+        """
+        return getattr(self._get_model(), "tokenizer", None)
+    
+    @property
+    def max_seq_length(self) -> Optional[int]:
+        """Tokens the model embeds per text; anything longer is truncated."""
+        return getattr(self._get_model(), "max_seq_length", None)
+    
+    def _token_lengths(self, model, texts: List[str]) -> np.ndarray:
+        """Tokens each text occupies in a batch (after truncation), estimated without a fast tokenizer."""
+        limit = getattr(model, "max_seq_length", None) or 512
+        tokenizer = getattr(model, "tokenizer", None)
+        if tokenizer is not None and getattr(tokenizer, "is_fast", False):
+            encoded = tokenizer(texts, add_special_tokens=True, truncation=True, max_length=limit)
+            return np.fromiter((len(ids) for ids in encoded["input_ids"]), dtype=np.int64, count=len(texts))
+        return np.minimum(np.fromiter((len(t) // 4 + 2 for t in texts), dtype=np.int64, count=len(texts)), limit)
+    
+    def _get_batch_tokens(self, model) -> int:
+        # Padded tokens per encode batch: configured, or sized to the memory available now
+        if not self.batch_tokens:
+            available = _available_memory(model)
+            budget = int(available * BATCH_MEMORY_FRACTION / BYTES_PER_PADDED_TOKEN) if available else MIN_BATCH_TOKENS * 4
+            self.batch_tokens = min(MAX_BATCH_TOKENS, max(MIN_BATCH_TOKENS, budget))
+            self.logger.info(f"📏 Embedding batches sized to {self.batch_tokens} padded tokens")
+        return self.batch_tokens
+    
+    def _encode_bucketed(self, model, texts: List[str], out: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Encode texts longest first in batches of similar length.
+        
+        Each batch holds as many texts as fit the padded-token budget (so
+        batches of short texts are large and long ones small), results are
+        scattered back to the input order, and a batch that runs out of
+        memory is retried with half the budget.
+        """
+        started = time.perf_counter()
+        lengths = self._token_lengths(model, texts)
+        order = np.argsort(-lengths, kind="stable")
+        padded = 0
+        start = 0
+        while start < len(texts):
+            longest = max(1, int(lengths[order[start]]))
+            size = int(min(self.max_batch_size, max(1, self._get_batch_tokens(model) // longest), len(texts) - start))
+            index = order[start:start + size]
+            try:
+                vectors = model.encode([texts[i] for i in index], batch_size=size, show_progress_bar=False)
+            except Exception as e:
+                if size == 1 or not _is_out_of_memory(e):
+                    raise
+                self.batch_tokens = max(longest, self.batch_tokens // 2)
+                self.logger.warning(f"⚠️ Embedding batch of {size} ran out of memory; budget lowered to {self.batch_tokens} tokens")
+                continue
+            if out is None:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            out[index] = vectors
+            padded += size * longest
+            start += size
+        
+        elapsed = time.perf_counter() - started
+        real = int(lengths.sum())
+        self.last_stats = {
+            "texts": len(texts),
+            "seconds": round(elapsed, 3),
+            "texts_per_sec": round(len(texts) / max(elapsed, 1e-9), 1),
+            "tokens_per_sec": round(real / max(elapsed, 1e-9), 1),
+            "padding_ratio": round(1 - real / max(padded, 1), 3),
+        }
+        EMBED_TEXTS_PER_SEC.observe(self.last_stats["texts_per_sec"])
+        self.logger.debug(
+            f"Embedded {len(texts)} texts in {elapsed:.2f}s ({self.last_stats['texts_per_sec']} texts/s, "
+            f"{self.last_stats['tokens_per_sec']} tokens/s, {self.last_stats['padding_ratio']:.1%} padding)"
+        )
+        return out
+    
+    def get_embeddings(self, chunks: List[str], out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Converts list of text chunks into embeddings.
         
+        Larger lists are encoded in length buckets (see _encode_bucketed).
+        
         Args:
             chunks: List of text strings to embed
+            out: Optional preallocated float32 array of shape (num_chunks, embedding_dim)
+                to write the embeddings into (avoids allocating the result)
             
         Returns:
-            NumPy array of shape (num_chunks, embedding_dim)
+            NumPy array of shape (num_chunks, embedding_dim) (out, if given)
         """
         if not chunks:
             self.logger.warning("⚠️ Empty chunk list passed to get_embeddings")
             return np.empty((0, 0), dtype=np.float32)
+        if out is not None and (out.dtype != np.float32 or out.shape[0] != len(chunks)):
+            raise ValueError(f"out must be float32 with {len(chunks)} rows, got {out.dtype} {out.shape}")
 
         model = self._get_model()
         try:
-            embeddings = model.encode(chunks, show_progress_bar=True)
-            return np.array(embeddings, dtype=np.float32)
+            with EMBED_MS.time():
+                if len(chunks) <= SMALL_BATCH:
+                    embeddings = model.encode(chunks, batch_size=len(chunks), show_progress_bar=False)
+                    if out is None:
+                        out = np.asarray(embeddings, dtype=np.float32)
+                    else:
+                        out[:] = embeddings
+                else:
+                    out = self._encode_bucketed(model, chunks, out)
+            EMBED_TEXTS.inc(len(chunks))
+            return out
         except Exception as e:
             self.logger.error(f"❌ Embedding error: {e}")
             return np.empty((0, 0), dtype=np.float32)
     
+    def _get_pool(self) -> Optional["EmbeddingPool"]:
+        with self._pool_lock:
+            if self._pool is None and self.workers > 1:
+                from .embedding_pool import EmbeddingPool
+                self._pool = EmbeddingPool(self.config, self.workers, self.model_name, model=self._prebuilt_model)
+            return self._pool
+    
+    def _encode_in_pool(self, texts: List[str], out: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Encode texts in the worker processes; None if the pool failed."""
+        try:
+            with EMBED_MS.time():
+                out = self._get_pool().encode(texts, out=out)
+            EMBED_TEXTS.inc(len(texts))
+            return out
+        except Exception as e:
+            self.logger.error(f"❌ Embedding pool failed, encoding in-process: {e}")
+            return None
+    
     @traceable
-    def get_embeddings_for_metadata(self, chunks: List[Dict]) -> np.ndarray:
+    def get_embeddings_for_metadata(self, chunks: List[Dict], out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Converts list of chunk dicts into embeddings using 'text' field.
         
         Args:
             chunks: List of dictionaries containing chunk data
+            out: Optional preallocated float32 array with at least one row per chunk
             
         Returns:
             NumPy array of shape (num_chunks, embedding_dim)
@@ -90,7 +327,12 @@ class Embedder:
                 self.logger.warning("⚠️ No valid text found in metadata chunks")
                 return np.empty((0, 0), dtype=np.float32)
 
-            return self.get_embeddings(texts)
+            out = out[:len(texts)] if out is not None else None
+            if len(texts) >= POOL_MIN_TEXTS and self._get_pool() is not None:
+                embeddings = self._encode_in_pool(texts, out)
+                if embeddings is not None:
+                    return embeddings
+            return self.get_embeddings(texts, out=out)
 
         except Exception as e:
             self.logger.error(f"❌ Error while generating metadata embeddings: {e}")
@@ -106,5 +348,13 @@ class Embedder:
         if model_name != self.model_name:
             self.model_name = model_name
             self._model = None  # Force reload on next use
+            self._prebuilt_model = None
+            self.close()
             self.logger.info(f"🔄 Model updated to: {model_name}")
-            
\ No newline at end of file
+    
+    def close(self) -> None:
+        """Stop the embedding worker processes, if any."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
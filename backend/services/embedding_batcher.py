@@ -0,0 +1,110 @@
+# backend/services/embedding_batcher.py
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, List, Optional, Tuple
+import logging
+import threading
+import time
+import numpy as np
+from utils.metrics import QUERY_EMBED_BATCH, QUERY_EMBED_WAIT_MS
+
+class QueryEmbeddingBatcher:
+    """
+    Dynamic micro-batching of query embeddings across concurrent requests.
+
+    Callers (request worker threads) enqueue a query and block on a future; a
+    single background thread drains the queue and encodes everything queued
+    in one Embedder.get_embeddings call. A batch is flushed when it reaches
+    max_batch_size or when its oldest query has waited max_wait_ms.
+
+    The wait only applies while traffic is concurrent (the previous batch held
+    more than one query); an isolated request is encoded as soon as it arrives,
+    so single-request latency is unchanged.
+    """
+
+    def __init__(self, embedder, max_batch_size: int = 32, max_wait_ms: float = 2.0):
+        """
+        Initialize the QueryEmbeddingBatcher (the worker thread starts on first use).
+
+        Args:
+            embedder: Embedder used for encoding
+            max_batch_size: Maximum queries encoded together
+            max_wait_ms: Longest a query waits for others to join its batch
+        """
+        self.embedder = embedder
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.logger = logging.getLogger(__name__)
+        self._queue: Deque[Tuple[str, Future, float]] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._last_batch_size = 0
+
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Embed one query, batched with concurrent callers.
+
+        Args:
+            text: Query text
+
+        Returns:
+            Array of shape (1, embedding_dim), like Embedder.get_embeddings([text])
+            (empty if encoding failed)
+        """
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("QueryEmbeddingBatcher is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="query-embedding-batcher", daemon=True)
+                self._thread.start()
+            self._queue.append((text, future, time.perf_counter()))
+            if len(self._queue) == 1 or len(self._queue) >= self.max_batch_size:
+                self._cond.notify()
+        return future.result()
+
+    def _next_batch(self) -> List[Tuple[str, Future, float]]:
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if self._last_batch_size > 1:
+                # Concurrent traffic: give other queries a few ms to join
+                deadline = self._queue[0][2] + self.max_wait if self._queue else 0.0
+                while self._queue and len(self._queue) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            return [self._queue.popleft() for _ in range(min(len(self._queue), self.max_batch_size))]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return  # closed and drained
+            self._last_batch_size = len(batch)
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[str, Future, float]]) -> None:
+        started = time.perf_counter()
+        QUERY_EMBED_BATCH.observe(len(batch))
+        for _, _, enqueued in batch:
+            QUERY_EMBED_WAIT_MS.observe((started - enqueued) * 1000)
+        try:
+            embeddings = self.embedder.get_embeddings([text for text, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        for row, (_, future, _) in enumerate(batch):
+            future.set_result(embeddings[row:row + 1] if embeddings.size else embeddings)
+
+    def close(self) -> None:
+        """Stop the worker thread once queued queries are answered."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
@@ -0,0 +1,157 @@
+# backend/services/embedding_pool.py
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import replace
+from multiprocessing import shared_memory
+from typing import Any, List, Optional, Tuple
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import numpy as np
+from config.app_config import AppConfig
+
+# Texts per shard at least; shards are small enough that every worker gets several
+MIN_SHARD_TEXTS = 64
+SHARDS_PER_WORKER = 4
+
+# Per-process state of pool workers, created once by _init_worker
+_embedder = None
+
+def _init_worker(config: AppConfig, model_name: str, model: Any) -> None:
+    global _embedder
+    from .embedder import Embedder
+    _embedder = Embedder(config, model=model)
+    _embedder.model_name = model_name
+    _embedder.warmup()
+
+def _dimension() -> int:
+    return int(_embedder.get_embeddings(["dimension"]).shape[1])
+
+def _encode_shard(shm_name: str, shape: tuple, rows: np.ndarray, texts: List[str]) -> int:
+    embeddings = _embedder.get_embeddings(texts)
+    if embeddings.size == 0:
+        raise RuntimeError("Embedding worker failed to encode its shard")
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        np.ndarray(shape, dtype=np.float32, buffer=shm.buf)[rows] = embeddings
+    finally:
+        shm.close()
+    return len(texts)
+
+class EmbeddingPool:
+    """
+    Process pool of embedding workers for bulk (ingestion) encoding.
+
+    Each worker loads the model once and encodes shards of the input with its
+    own Embedder (length bucketing included), using cpu_count / workers
+    intra-op threads unless embedding_threads is set. Workers write their
+    vectors straight into one shared-memory array, so only the input texts and
+    row indices are pickled; the parent copies the finished array out once.
+    """
+
+    def __init__(self, config: AppConfig, workers: int, model_name: str, model: Any = None):
+        """
+        Initialize the EmbeddingPool (worker processes start on first use).
+
+        Args:
+            config: Application configuration for the workers' Embedders
+            workers: Number of worker processes
+            model_name: SentenceTransformer model the workers load
+            model: Optional picklable pre-built model (e.g. an offline stand-in)
+        """
+        self.workers = workers
+        threads = config.embedding_threads or max(1, (os.cpu_count() or 1) // workers)
+        self.config = replace(config, embedding_threads=threads, embedding_workers=0)
+        self.model_name = model_name
+        self.model = model
+        self.logger = logging.getLogger(__name__)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._dim: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Tuple[ProcessPoolExecutor, int]:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs an event loop and threads is unsafe
+                executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.config, self.model_name, self.model)
+                )
+                try:
+                    self._dim = executor.submit(_dimension).result()
+                except BaseException:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+                self._executor = executor
+                self.logger.info(
+                    f"✅ Started embedding pool with {self.workers} workers "
+                    f"({self.config.embedding_threads} threads each)"
+                )
+            return self._executor, self._dim
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is not broken:
+                return  # already replaced by a concurrent caller
+            self._executor = None
+        self.logger.warning("⚠️ Embedding worker died; restarting the pool on next use")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def encode(self, texts: List[str], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encode texts in the worker processes.
+
+        Texts are sorted by length and cut into shards, so each shard pads
+        little and long and short shards spread over all workers.
+
+        Args:
+            texts: Texts to embed
+            out: Optional preallocated float32 array of shape (len(texts), embedding_dim)
+
+        Returns:
+            NumPy array of shape (len(texts), embedding_dim) (out, if given)
+
+        Raises:
+            Exception: If a worker fails or dies (a dead pool is restarted on next use)
+        """
+        executor, dim = self._get_executor()
+        shape = (len(texts), dim)
+        order = np.argsort(-np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts)), kind="stable")
+        shard_size = max(MIN_SHARD_TEXTS, math.ceil(len(texts) / (self.workers * SHARDS_PER_WORKER)))
+
+        shm = shared_memory.SharedMemory(create=True, size=max(1, shape[0] * shape[1] * 4))
+        try:
+            futures = []
+            try:
+                for start in range(0, len(texts), shard_size):
+                    rows = order[start:start + shard_size]
+                    futures.append(executor.submit(_encode_shard, shm.name, shape, rows, [texts[i] for i in rows]))
+                for future in futures:
+                    future.result()
+            except BaseException as e:
+                # Only this call's shards; the executor may be shared with other callers
+                for future in futures:
+                    future.cancel()
+                if isinstance(e, BrokenProcessPool):
+                    self._restart(executor)
+                raise
+            result = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+            if out is None:
+                out = result.copy()
+            else:
+                out[:] = result
+            del result
+        finally:
+            shm.close()
+            shm.unlink()
+        return out
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -1,38 +1,64 @@
 # backend/services/gemini_client.py
 import google.generativeai as genai
-from typing import List, Dict, Generator, Optional
+from typing import List, Dict, Generator, Iterator, Optional
+from collections import deque
 import json
+import queue
+import threading
+import time
 from dotenv import load_dotenv
 # import os
 from langsmith import traceable
 import logging
 from config.app_config import AppConfig
+from .gemini_scheduler import GeminiScheduler, Priority
+from utils.cancellation import CancellationToken, GenerationCancelled
+from utils.metrics import TTFT_MS, TOKENS_PER_SEC, HEDGED_REQUESTS, HEDGE_WINS, CANCELLED_STREAMS
 
 load_dotenv()
 
+# Output budget assumed when estimating a call's token cost up front
+EXPECTED_OUTPUT_TOKENS = 512
+
+# Hedging needs this many TTFT samples before trusting the observed p95
+MIN_HEDGE_SAMPLES = 20
+
+_STREAM_DONE = object()
+
 class GeminiClient:
     """
     A class for handling interactions with Google's Gemini AI model.
     Provides RAG prompt formatting, response generation, and suggested questions.
     """
     
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, model=None, scheduler: Optional[GeminiScheduler] = None):
         """
         Initialize the Gemini service.
         
         Args:
-            model_name: Name of the Gemini model to use
-            api_key: Gemini API key (defaults to GEMINI_API_KEY env var)
+            config: Application configuration (provides the Gemini API key)
+            model: Optional pre-built model exposing generate_content(), e.g. an
+                offline stand-in for load testing. Skips API configuration when given.
+            scheduler: Optional request scheduler (built from config by default)
         """
         self.model_name = "gemini-2.5-flash"
         self.api_key = config.gemini_api_key
+        self.logger = logging.getLogger(__name__)
+        self.scheduler = scheduler or GeminiScheduler.from_config(config)
+        self.hedge_enabled = config.gemini_hedge_enabled
+        self.hedge_min_ms = config.gemini_hedge_min_ms
+        self.hedge_default_ms = config.gemini_hedge_default_ms
+        self._ttft_samples = deque(maxlen=200)
+        
+        if model is not None:
+            self.model = model
+            return
         
         if not self.api_key:
             raise ValueError("Gemini API key must be provided or set in GEMINI_API_KEY environment variable")
         
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel(self.model_name)
-        self.logger = logging.getLogger(__name__)
     
     def format_rag_prompt(self, context_chunks: List[str], user_query: str, metadata: List[Dict]) -> str:
         """
@@ -77,19 +103,40 @@ class GeminiClient:
                     """
         return prompt
     
+    @staticmethod
+    def estimate_tokens(prompt: str) -> int:
+        """
+        Rough token cost of a call (~4 characters per token plus the output budget).
+        
+        Args:
+            prompt: Prompt text
+            
+        Returns:
+            Estimated prompt + output tokens
+        """
+        return len(prompt) // 4 + EXPECTED_OUTPUT_TOKENS
+    
+    def _generate(self, prompt: str, priority: Priority):
+        return self.scheduler.submit(
+            lambda: self.model.generate_content(prompt),
+            priority,
+            self.estimate_tokens(prompt)
+        )
+    
     @traceable(name="generate_suggested_questions_gemini", run_type="llm")
-    def generate_suggested_questions(self, prompt: str) -> List[str]:
+    def generate_suggested_questions(self, prompt: str, priority: Priority = Priority.BACKGROUND) -> List[str]:
         """
         Generates suggested questions based on the provided prompt.
         
         Args:
             prompt: Input prompt for generating suggested questions
+            priority: Scheduling class (background by default)
             
         Returns:
             List of suggested questions
         """
         try:
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, priority)
             return response.text.splitlines()
         except Exception as e:
             self.logger.error(f"❌ Failed to generate suggested questions: {e}")
@@ -101,7 +148,10 @@ class GeminiClient:
         context_chunks: List[str], 
         user_query: str, 
         metadata: List[Dict], 
-        history: Optional[List[Dict[str, str]]] = None
+        history: Optional[List[Dict[str, str]]] = None,
+        priority: Priority = Priority.INTERACTIVE_STREAM,
+        cancel_token: Optional[CancellationToken] = None,
+        hedge: Optional[bool] = None
     ) -> Generator[str, None, None]:
         """
         Streams Gemini's answer with context and conversation history.
@@ -111,6 +161,10 @@ class GeminiClient:
             user_query: User's current query
             metadata: Metadata associated with each context chunk
             history: Conversation history as list of message dictionaries
+            priority: Scheduling class (use Priority.INTERACTIVE when the answer is not streamed to a client)
+            cancel_token: Optional token; cancelling it aborts the upstream stream (e.g. on client disconnect)
+            hedge: Send a second request if no token arrives within the p95-based deadline
+                (defaults to the configured setting)
             
         Yields:
             Text chunks from the streaming response
@@ -121,22 +175,141 @@ class GeminiClient:
             history_text = "\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in history])
             prompt = f"Conversation History:\n{history_text}\n\n{prompt}"
 
+        start = time.perf_counter()
+        first_token_at = None
+        output_chars = 0
+        output_tokens = None
+        
+        use_hedge = self.hedge_enabled if hedge is None else hedge
+        
         try:
-            response = self.model.generate_content(prompt, stream=True)
+            if use_hedge:
+                response = self._hedged_stream(prompt, priority, cancel_token)
+            else:
+                response = self._stream(prompt, priority, cancel_token)
             
             for chunk in response:
+                usage = getattr(chunk, "usage_metadata", None)
+                output_tokens = getattr(usage, "candidates_token_count", None) or output_tokens
                 if chunk.parts:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        ttft_ms = (first_token_at - start) * 1000
+                        TTFT_MS.observe(ttft_ms)
+                        self._ttft_samples.append(ttft_ms)
+                    output_chars += len(chunk.text)
                     yield chunk.text
+            
+            self._observe_token_rate(first_token_at, output_tokens or output_chars // 4)
+        except GenerationCancelled:
+            # Nobody is reading any more; don't emit an apology
+            CANCELLED_STREAMS.inc()
+            self.logger.info("🛑 Gemini stream cancelled")
         except Exception as e:
             self.logger.error(f"❌ Failed to stream Gemini response: {e}")
             yield "I apologize, but I'm having trouble generating a response at the moment."
     
+    def _stream(self, prompt: str, priority: Priority, cancel_token: Optional[CancellationToken]) -> Iterator:
+        return self.scheduler.stream(
+            lambda: self.model.generate_content(prompt, stream=True),
+            priority,
+            self.estimate_tokens(prompt),
+            cancel_token
+        )
+    
+    def hedge_deadline(self) -> float:
+        """
+        Seconds to wait for a first token before sending a hedge request.
+        
+        Returns:
+            p95 of recent time-to-first-token, floored at hedge_min_ms
+            (hedge_default_ms until enough samples exist)
+        """
+        samples = sorted(self._ttft_samples)
+        if len(samples) < MIN_HEDGE_SAMPLES:
+            return self.hedge_default_ms / 1000
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return max(p95, self.hedge_min_ms) / 1000
+    
+    def _hedged_stream(self, prompt: str, priority: Priority, cancel_token: Optional[CancellationToken]) -> Iterator:
+        """
+        Stream with a hedge: if the primary request produces nothing before the
+        deadline, a second identical request is sent and whichever yields first
+        wins; the other is cancelled.
+        """
+        attempt_tokens = [CancellationToken(), CancellationToken()]
+        cancel_attempts = lambda: [token.cancel() for token in attempt_tokens]
+        results: queue.Queue = queue.Queue()
+        
+        def run(index: int) -> None:
+            try:
+                for chunk in self._stream(prompt, priority, attempt_tokens[index]):
+                    results.put((index, chunk))
+                results.put((index, _STREAM_DONE))
+            except Exception as e:
+                results.put((index, e))
+        
+        def start(index: int) -> None:
+            threading.Thread(target=run, args=(index,), daemon=True, name=f"gemini-hedge-{index}").start()
+        
+        if cancel_token is not None:
+            cancel_token.add_callback(cancel_attempts)
+        
+        hedge_at = time.monotonic() + self.hedge_deadline()
+        started = 1
+        finished = set()
+        winner = None
+        start(0)
+        
+        try:
+            while True:
+                timeout = max(0.0, hedge_at - time.monotonic()) if winner is None and started == 1 else None
+                try:
+                    index, item = results.get(timeout=timeout)
+                except queue.Empty:
+                    self.logger.info("⏱️ No Gemini token before hedge deadline, sending hedge request")
+                    HEDGED_REQUESTS.inc()
+                    start(1)
+                    started = 2
+                    continue
+                
+                if winner is not None and index != winner:
+                    continue
+                
+                if item is _STREAM_DONE or isinstance(item, Exception):
+                    finished.add(index)
+                    if winner is None and len(finished) < started:
+                        continue  # the other attempt may still succeed
+                    if isinstance(item, Exception):
+                        raise item
+                    return
+                
+                if winner is None:
+                    winner = index
+                    attempt_tokens[1 - index].cancel()
+                    if index == 1:
+                        HEDGE_WINS.inc()
+                yield item
+        finally:
+            cancel_attempts()
+            if cancel_token is not None:
+                cancel_token.remove_callback(cancel_attempts)
+    
+    @staticmethod
+    def _observe_token_rate(first_token_at: Optional[float], output_tokens: int) -> None:
+        if first_token_at is None or output_tokens <= 0:
+            return
+        elapsed = time.perf_counter() - first_token_at
+        if elapsed > 0:
+            TOKENS_PER_SEC.observe(output_tokens / elapsed)
+    
     def generate_answer(
         self,
         context_chunks: List[str],
         user_query: str,
         metadata: List[Dict],
-        history: Optional[List[Dict[str, str]]] = None
+        history: Optional[List[Dict[str, str]]] = None,
+        priority: Priority = Priority.INTERACTIVE
     ) -> str:
         """
         Generates a complete answer without streaming.
@@ -146,6 +319,7 @@ class GeminiClient:
             user_query: User's current query
             metadata: Metadata associated with each context chunk
             history: Conversation history as list of message dictionaries
+            priority: Scheduling class
             
         Returns:
             Complete response text
@@ -157,12 +331,21 @@ class GeminiClient:
             prompt = f"Conversation History:\n{history_text}\n\n{prompt}"
 
         try:
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, priority)
             return response.text
         except Exception as e:
             self.logger.error(f"❌ Failed to generate Gemini response: {e}")
             return "I apologize, but I'm having trouble generating a response at the moment."
     
+    def warmup(self) -> None:
+        """
+        Open the API connection with a (free) count_tokens call, so the first
+        answer doesn't pay for DNS, TLS and client setup. No-op for stand-in
+        models without count_tokens.
+        """
+        if hasattr(self.model, "count_tokens"):
+            self.model.count_tokens("warmup")
+    
     def update_model(self, model_name: str) -> None:
         """
         Update the Gemini model to use.
@@ -0,0 +1,447 @@
+# backend/services/gemini_scheduler.py
+from enum import IntEnum
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from utils.cancellation import CancellationToken, GenerationCancelled
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """Scheduling classes for Gemini calls; lower values are served first."""
+    INTERACTIVE_STREAM = 0
+    INTERACTIVE = 1
+    BACKGROUND = 2
+
+
+def _retryable_exception_types() -> tuple:
+    try:
+        from google.api_core import exceptions as api_exceptions
+    except ImportError:
+        return ()
+    return (
+        api_exceptions.ResourceExhausted,
+        api_exceptions.TooManyRequests,
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.InternalServerError,
+        api_exceptions.DeadlineExceeded,
+    )
+
+
+_RETRYABLE_TYPES = _retryable_exception_types()
+
+
+def is_retryable(error: Exception) -> bool:
+    """Quota, overload and transient server errors are worth retrying."""
+    if _RETRYABLE_TYPES and isinstance(error, _RETRYABLE_TYPES):
+        return True
+    message = str(error).lower()
+    return "429" in message or "resource has been exhausted" in message or "503" in message
+
+
+def is_quota_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return "429" in message or "exhausted" in message or "quota" in message
+
+
+def close_stream(stream) -> None:
+    """
+    Best-effort abort of an upstream response stream.
+    google-generativeai wraps the gRPC call in `_iterator`; cancelling it stops
+    token generation server-side instead of letting it run to completion.
+    """
+    for target in (getattr(stream, "_iterator", None), stream):
+        if target is None:
+            continue
+        for method in ("cancel", "close"):
+            fn = getattr(target, method, None)
+            if callable(fn):
+                try:
+                    fn()
+                except Exception:
+                    pass
+                break
+
+
+class TokenBucket:
+    """
+    Classic token bucket. Not thread-safe on its own; the scheduler holds its lock.
+    """
+
+    def __init__(self, rate_per_sec: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = clock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be consumed (0 if available now)."""
+        self._refill(now)
+        missing = amount - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate if self.rate > 0 else float("inf")
+
+    def consume(self, amount: float) -> None:
+        # May go negative when actual usage exceeds the estimate; the debt is repaid by refill
+        self.tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class _Ticket:
+    __slots__ = ("priority", "tokens", "granted", "enqueued_at")
+
+    def __init__(self, priority: Priority, tokens: int, enqueued_at: float):
+        self.priority = priority
+        self.tokens = tokens
+        self.granted = False
+        self.enqueued_at = enqueued_at
+
+
+class GeminiScheduler:
+    """
+    Rate-limit-aware scheduler for Gemini calls.
+
+    Requests wait in a priority queue and are admitted when the request and
+    token buckets allow it and a concurrency slot is free. Retryable errors are
+    retried with jittered exponential backoff, and a quota error pauses all
+    admissions for the backoff period so queued work doesn't hammer the API.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 1000,
+        tokens_per_minute: int = 1_000_000,
+        max_concurrency: int = 16,
+        max_retries: int = 3,
+        base_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            requests_per_minute: Request quota
+            tokens_per_minute: Token quota (prompt + output)
+            max_concurrency: Maximum Gemini calls in flight
+            max_retries: Retries per call for retryable errors
+            base_backoff: Initial backoff in seconds
+            max_backoff: Backoff ceiling in seconds
+            clock: Monotonic time source for buckets and cooldowns
+            sleep: Called with the backoff delay between retries (without a cancel token)
+        """
+        self.clock = clock
+        self.sleep = sleep
+        self.request_bucket = TokenBucket(requests_per_minute / 60.0, max(1, requests_per_minute / 60.0), clock)
+        self.token_bucket = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute, clock)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.logger = logging.getLogger(__name__)
+
+        self._cond = threading.Condition()
+        self._queue: List = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._cooldown_until = 0.0
+
+        # Metrics
+        self._queue_depth = {p: 0 for p in Priority}
+        self._max_queue_depth = {p: 0 for p in Priority}
+        self._admitted = {p: 0 for p in Priority}
+        self._wait_seconds = {p: 0.0 for p in Priority}
+        self._retries = 0
+        self._quota_errors = 0
+        self._failures = 0
+
+    @classmethod
+    def from_config(cls, config) -> "GeminiScheduler":
+        return cls(
+            requests_per_minute=config.gemini_requests_per_minute,
+            tokens_per_minute=config.gemini_tokens_per_minute,
+            max_concurrency=config.gemini_max_concurrency,
+            max_retries=config.gemini_max_retries
+        )
+
+    # --- admission -------------------------------------------------------
+
+    def _admit_locked(self) -> float:
+        """
+        Admit queued tickets in priority order while capacity allows.
+        Strict priority: a blocked head also blocks lower classes, so large
+        interactive requests can't be starved by a stream of small background ones.
+
+        Returns:
+            Seconds until the head of the queue could be admitted (0 if queue empty)
+        """
+        while self._queue:
+            ticket = self._queue[0][2]
+            if self._in_flight >= self.max_concurrency:
+                return 0.0  # woken by release()
+
+            now = self.clock()
+            delay = max(
+                self._cooldown_until - now,
+                self.request_bucket.time_until(1, now),
+                self.token_bucket.time_until(ticket.tokens, now)
+            )
+            if delay > 0:
+                return delay
+
+            heapq.heappop(self._queue)
+            self.request_bucket.consume(1)
+            self.token_bucket.consume(ticket.tokens)
+            self._in_flight += 1
+            self._queue_depth[ticket.priority] -= 1
+            self._admitted[ticket.priority] += 1
+            self._wait_seconds[ticket.priority] += now - ticket.enqueued_at
+            ticket.granted = True
+            self._cond.notify_all()
+        return 0.0
+
+    def _wake(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def acquire(self, priority: Priority, tokens: int, cancel_token: Optional[CancellationToken] = None) -> _Ticket:
+        """
+        Block until the call may proceed.
+
+        Args:
+            priority: Scheduling class
+            tokens: Estimated prompt + output tokens
+            cancel_token: Optional token; cancelling it removes the call from the queue
+
+        Returns:
+            Ticket to pass to release()
+
+        Raises:
+            GenerationCancelled: If cancelled while still queued
+        """
+        # A single call larger than the bucket would otherwise wait forever
+        ticket = _Ticket(priority, min(max(tokens, 1), int(self.token_bucket.capacity)), self.clock())
+        if cancel_token is not None:
+            cancel_token.add_callback(self._wake)
+        try:
+            with self._cond:
+                entry = (int(priority), next(self._seq), ticket)
+                heapq.heappush(self._queue, entry)
+                self._queue_depth[priority] += 1
+                self._max_queue_depth[priority] = max(self._max_queue_depth[priority], self._queue_depth[priority])
+
+                while not ticket.granted:
+                    delay = self._admit_locked()
+                    if ticket.granted:
+                        break
+                    if cancel_token is not None and cancel_token.cancelled:
+                        self._queue.remove(entry)
+                        heapq.heapify(self._queue)
+                        self._queue_depth[priority] -= 1
+                        self._admit_locked()
+                        raise GenerationCancelled()
+                    self._cond.wait(timeout=delay if delay > 0 else None)
+        finally:
+            if cancel_token is not None:
+                cancel_token.remove_callback(self._wake)
+        return ticket
+
+    def release(self, ticket: _Ticket, actual_tokens: Optional[int] = None) -> None:
+        """
+        Return the concurrency slot and reconcile the token estimate.
+
+        Args:
+            ticket: Ticket returned by acquire()
+            actual_tokens: Tokens actually used, when the response reports them
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if actual_tokens is not None:
+                difference = actual_tokens - ticket.tokens
+                if difference > 0:
+                    self.token_bucket.consume(difference)
+                else:
+                    self.token_bucket.refund(-difference)
+            self._admit_locked()
+            self._cond.notify_all()
+
+    # --- retries ---------------------------------------------------------
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+        with self._cond:
+            self._retries += 1
+            if is_quota_error(error):
+                self._quota_errors += 1
+                # Pause every admission, not just this caller
+                self._cooldown_until = max(self._cooldown_until, self.clock() + delay)
+        return delay
+
+    @staticmethod
+    def _usage(response) -> Optional[int]:
+        usage = getattr(response, "usage_metadata", None)
+        total = getattr(usage, "total_token_count", None) if usage is not None else None
+        return total if isinstance(total, int) and total > 0 else None
+
+    def submit(self, call: Callable[[], T], priority: Priority, estimated_tokens: int) -> T:
+        """
+        Run a blocking Gemini call under the scheduler, retrying retryable errors.
+
+        Args:
+            call: Zero-argument callable performing the request
+            priority: Scheduling class
+            estimated_tokens: Estimated prompt + output tokens
+
+        Returns:
+            The call's result
+        """
+        for attempt in range(self.max_retries + 1):
+            ticket = self.acquire(priority, estimated_tokens)
+            actual = None
+            try:
+                result = call()
+                actual = self._usage(result)
+                return result
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    with self._cond:
+                        self._failures += 1
+                    raise
+                delay = self._backoff(attempt, e)
+                self.logger.warning(f"⚠️ Gemini call failed ({e}); retry {attempt + 1} in {delay:.2f}s")
+            finally:
+                self.release(ticket, actual)
+            self.sleep(delay)
+
+    def stream(
+        self,
+        open_stream: Callable[[], Iterable],
+        priority: Priority,
+        estimated_tokens: int,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Iterator:
+        """
+        Run a streaming Gemini call under the scheduler.
+        Retries only happen before the first chunk, so callers never see duplicated output.
+
+        Args:
+            open_stream: Zero-argument callable returning the response iterator
+            priority: Scheduling class
+            estimated_tokens: Estimated prompt + output tokens
+            cancel_token: Optional token; cancelling it dequeues the call or aborts the
+                upstream stream, even while a worker thread is blocked reading it
+
+        Yields:
+            Raw response chunks
+
+        Raises:
+            GenerationCancelled: If cancelled before the stream completed
+        """
+        for attempt in range(self.max_retries + 1):
+            ticket = self.acquire(priority, estimated_tokens, cancel_token)
+            started = False
+            completed = False
+            actual = None
+            upstream = None
+            abort = lambda: close_stream(upstream)
+            try:
+                upstream = open_stream()
+                if cancel_token is not None:
+                    cancel_token.add_callback(abort)
+                for chunk in upstream:
+                    if cancel_token is not None and cancel_token.cancelled:
+                        break
+                    started = True
+                    actual = self._usage(chunk) or actual
+                    yield chunk
+                else:
+                    completed = True
+                if not completed:
+                    raise GenerationCancelled()
+                return
+            except Exception as e:
+                if cancel_token is not None and cancel_token.cancelled:
+                    raise GenerationCancelled() from e
+                if started or attempt >= self.max_retries or not is_retryable(e):
+                    with self._cond:
+                        self._failures += 1
+                    raise
+                delay = self._backoff(attempt, e)
+                self.logger.warning(f"⚠️ Gemini stream failed ({e}); retry {attempt + 1} in {delay:.2f}s")
+            finally:
+                if cancel_token is not None:
+                    cancel_token.remove_callback(abort)
+                if upstream is not None and not completed:
+                    # Consumer stopped early (cancelled, closed or errored): stop paying for tokens
+                    close_stream(upstream)
+                self.release(ticket, actual)
+            if cancel_token is not None and cancel_token.wait(delay):
+                raise GenerationCancelled()
+            elif cancel_token is None:
+                self.sleep(delay)
+
+    # --- metrics ---------------------------------------------------------
+
+    def snapshot(self) -> Dict:
+        """
+        Current scheduler metrics.
+
+        Returns:
+            Dictionary with queue depth per priority, in-flight calls and counters
+        """
+        with self._cond:
+            return {
+                "queue_depth": {p.name.lower(): self._queue_depth[p] for p in Priority},
+                "max_queue_depth": {p.name.lower(): self._max_queue_depth[p] for p in Priority},
+                "admitted": {p.name.lower(): self._admitted[p] for p in Priority},
+                "wait_seconds_total": {p.name.lower(): round(self._wait_seconds[p], 3) for p in Priority},
+                "in_flight": self._in_flight,
+                "retries": self._retries,
+                "quota_errors": self._quota_errors,
+                "failures": self._failures,
+            }
+
+    def register_metrics(self, registry) -> None:
+        """
+        Export scheduler state through a metrics registry (see utils.metrics).
+
+        Args:
+            registry: MetricsRegistry to register callback metrics on
+        """
+        registry.callback(
+            "gemini_queue_depth", "Gemini calls waiting for admission",
+            lambda: self.snapshot()["queue_depth"], labelname="priority"
+        )
+        registry.callback(
+            "gemini_in_flight", "Gemini calls currently running",
+            lambda: self.snapshot()["in_flight"]
+        )
+        registry.callback(
+            "gemini_admitted_total", "Gemini calls admitted by the scheduler",
+            lambda: self.snapshot()["admitted"], kind="counter", labelname="priority"
+        )
+        registry.callback(
+            "gemini_queue_wait_seconds_total", "Total time Gemini calls spent queued",
+            lambda: self.snapshot()["wait_seconds_total"], kind="counter", labelname="priority"
+        )
+        registry.callback(
+            "gemini_retries_total", "Gemini calls retried after a retryable error",
+            lambda: self.snapshot()["retries"], kind="counter"
+        )
+        registry.callback(
+            "gemini_quota_errors_total", "Gemini quota (429) errors",
+            lambda: self.snapshot()["quota_errors"], kind="counter"
+        )
@@ -0,0 +1,233 @@
+# backend/services/html_extractor.py
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+from urllib.parse import urljoin
+import re
+import lxml.html
+
+# Never content: dropped together with everything inside them
+DROP_TAGS = {
+    "nav", "aside", "script", "style", "noscript", "template", "form",
+    "svg", "iframe", "button", "select", "dialog"
+}
+
+# Page chrome when outside the main content (an <article> may have its own header)
+CHROME_TAGS = {"header", "footer"}
+CONTENT_TAGS = {"main", "article", "section"}
+CHROME_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search"}
+
+# Inline elements never own text; it flows into the enclosing block
+INLINE_TAGS = {
+    "a", "abbr", "b", "bdi", "bdo", "br", "cite", "code", "data", "dfn", "em", "font",
+    "i", "kbd", "label", "mark", "q", "s", "samp", "small", "span", "strong",
+    "sub", "sup", "time", "u", "var", "wbr"
+}
+
+_SIMPLE_SELECTOR = re.compile(r"^(?P<tag>[a-zA-Z][\w-]*|\*)?(?P<rest>(?:[.#][\w-]+)*)$")
+
+class SimpleSelector(NamedTuple):
+    text: str
+    tag: Optional[str]
+    id: Optional[str]
+    classes: Tuple[str, ...]
+
+    @property
+    def universal(self) -> bool:
+        return self.tag is None and self.id is None and not self.classes
+
+    def matches(self, tag: str, attrib) -> bool:
+        if self.tag is not None and self.tag != tag:
+            return False
+        if self.id is not None and attrib.get("id") != self.id:
+            return False
+        if self.classes:
+            element_classes = attrib.get("class", "").split()
+            return all(cls in element_classes for cls in self.classes)
+        return True
+
+@lru_cache(maxsize=128)
+def parse_selectors(selectors: Tuple[str, ...]) -> Optional[Tuple[SimpleSelector, ...]]:
+    """
+    Parse tag / .class / #id selectors (and combinations like "div.news").
+
+    Returns:
+        Parsed selectors, or None if any selector needs a full CSS engine
+    """
+    parsed = []
+    for text in selectors:
+        match = _SIMPLE_SELECTOR.match(text.strip())
+        if not match or not text.strip():
+            return None
+        tag = match.group("tag")
+        rest = match.group("rest")
+        ids = re.findall(r"#([\w-]+)", rest)
+        if len(ids) > 1:
+            return None
+        parsed.append(SimpleSelector(
+            text,
+            None if tag in (None, "*") else tag.lower(),
+            ids[0] if ids else None,
+            tuple(re.findall(r"\.([\w-]+)", rest))
+        ))
+    return tuple(parsed)
+
+def _normalize(parts: List[str]) -> str:
+    return " ".join(" ".join(parts).split())
+
+class HTMLExtractor:
+    """
+    Single-pass lxml text extraction.
+
+    Every text node is assigned to the innermost element matching one of the
+    selectors, so nested matches (a <p> inside a <section>) never extract the
+    same sentence twice. Navigation, scripts and page header/footer chrome are
+    skipped. Only simple selectors are supported; callers fall back to a full
+    CSS engine when parse_selectors() returns None.
+    """
+
+    def supports(self, selectors: Sequence[str]) -> bool:
+        return parse_selectors(tuple(selectors)) is not None
+
+    @staticmethod
+    def parse(html: Union[str, bytes], encoding: Optional[str] = None):
+        if isinstance(html, bytes):
+            parser = lxml.html.HTMLParser(encoding=encoding) if encoding else None
+            return lxml.html.document_fromstring(html, parser=parser)
+        # lxml rejects str input that still carries an XML encoding declaration
+        return lxml.html.document_fromstring(html.encode("utf-8"), parser=lxml.html.HTMLParser(encoding="utf-8"))
+
+    def _claim(self, selectors: Tuple[SimpleSelector, ...], tag: str, attrib) -> Optional[int]:
+        universal = None
+        for index, selector in enumerate(selectors):
+            if selector.matches(tag, attrib):
+                if not selector.universal:
+                    return index
+                if universal is None and tag not in INLINE_TAGS:
+                    universal = index
+        return universal
+
+    @staticmethod
+    def _is_chrome(tag: str, attrib, in_content: bool) -> bool:
+        if tag in DROP_TAGS:
+            return True
+        if "hidden" in attrib or attrib.get("aria-hidden") == "true":
+            return True
+        if in_content:
+            return False
+        return tag in CHROME_TAGS or attrib.get("role") in CHROME_ROLES
+
+    def extract_text(self, root, selectors: Sequence[str], with_blocks: bool = False) -> Dict[str, List]:
+        """
+        Walk the tree once and collect text per selector, in document order.
+
+        Args:
+            root: lxml document root
+            selectors: Simple CSS selectors (see parse_selectors)
+            with_blocks: Also return "blocks": every extracted text in document order
+                as {"selector", "tag", "text"}, so structure (headings) can be used for chunking
+
+        Returns:
+            Dictionary mapping each selector to its extracted texts
+        """
+        parsed = parse_selectors(tuple(selectors))
+        if parsed is None:
+            raise ValueError(f"Unsupported selectors: {selectors}")
+
+        # slots[i] = (selector index, tag, text parts); results keep each slot's start position
+        slots: List[Tuple[int, str, List[str]]] = []
+        body = root.find("body")
+        # Stack items: (kind, node-or-text, owner slot, in_content)
+        stack: List[Tuple] = [("open", body if body is not None else root, None, False)]
+
+        while stack:
+            kind, item, owner, in_content = stack.pop()
+
+            if kind == "text":
+                if owner is not None:
+                    slots[owner][2].append(item)
+                continue
+
+            el = item
+            tag = el.tag if isinstance(el.tag, str) else None
+            if el.tail and el.tail.strip():
+                stack.append(("text", el.tail, owner, in_content))
+
+            # Comments / processing instructions and chrome: drop content, keep tail
+            if tag is None or self._is_chrome(tag, el.attrib, in_content):
+                continue
+
+            claim = self._claim(parsed, tag, el.attrib)
+            if claim is not None:
+                slots.append((claim, tag, []))
+                owner = len(slots) - 1
+            in_content = in_content or tag in CONTENT_TAGS
+
+            if el.text and el.text.strip() and owner is not None:
+                slots[owner][2].append(el.text)
+            for child in reversed(el):
+                stack.append(("open", child, owner, in_content))
+
+        results: Dict[str, List] = {selector.text: [] for selector in parsed}
+        blocks: List[Dict[str, str]] = []
+        for index, tag, parts in slots:
+            text = _normalize(parts)
+            if text:
+                results[parsed[index].text].append(text)
+                if with_blocks:
+                    blocks.append({"selector": parsed[index].text, "tag": tag, "text": text})
+        if with_blocks:
+            results["blocks"] = blocks
+        return results
+
+    @staticmethod
+    def extract_links(root, base_url: str) -> List[Dict]:
+        links = []
+        for link in root.iter("a"):
+            href = (link.get("href") or "").strip()
+            if not href or href.startswith("#") or href.lower().startswith(("javascript:", "mailto:", "tel:")):
+                continue
+            links.append({
+                "text": _normalize([link.text_content()]),
+                "url": urljoin(base_url, href),
+                "title": link.get("title", "")
+            })
+        return links
+
+    @staticmethod
+    def extract_images(root, base_url: str) -> List[Dict]:
+        images = []
+        for img in root.iter("img"):
+            src = img.get("src")
+            if not src:
+                continue
+            images.append({
+                "src": urljoin(base_url, src),
+                "alt": img.get("alt", ""),
+                "title": img.get("title", ""),
+                "width": img.get("width"),
+                "height": img.get("height")
+            })
+        return images
+
+    @staticmethod
+    def extract_metadata(root, url: str) -> Dict:
+        metadata = {"url": url}
+        head = root.find("head")
+        if head is None:
+            return metadata
+
+        title = head.find("title")
+        if title is not None and title.text_content().strip():
+            metadata["title"] = title.text_content().strip()
+
+        for meta in head.iter("meta"):
+            content = meta.get("content")
+            if not content:
+                continue
+            name = (meta.get("name") or "").lower()
+            prop = (meta.get("property") or "").lower()
+            if name in ("description", "keywords"):
+                metadata.setdefault(name, content)
+            elif prop in ("og:title", "og:description", "og:image", "og:url", "og:type"):
+                metadata.setdefault(prop.replace(":", "_"), content)
+        return metadata
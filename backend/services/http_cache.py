@@ -0,0 +1,129 @@
+# backend/services/http_cache.py
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+class CacheEntry(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: Optional[str]
+    links: List[str]
+    fetched_at: float
+
+class HTTPCache:
+    """
+    On-disk record of what was last indexed per (collection, URL).
+
+    Stores the HTTP validators (ETag, Last-Modified) and a content hash so
+    re-scrapes can send conditional requests and skip unchanged pages.
+    Outgoing links are kept too, so a crawl can continue through pages
+    that were not re-downloaded.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite file path, or ":memory:"
+        """
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                collection TEXT NOT NULL,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                links TEXT,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (collection, url)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, collection: str, url: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, links, fetched_at FROM pages WHERE collection = ? AND url = ?",
+                (collection, url)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, content_hash, links, fetched_at = row
+        return CacheEntry(etag, last_modified, content_hash, json.loads(links or "[]"), fetched_at)
+
+    def put(
+        self,
+        collection: str,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        content_hash: Optional[str],
+        links: Optional[List[str]] = None
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (collection, url, etag, last_modified, content_hash, json.dumps(links or []), time.time())
+            )
+            self._conn.commit()
+
+    def put_many(
+        self,
+        collection: str,
+        entries: List[Tuple[str, Optional[str], Optional[str], Optional[str], Optional[List[str]]]]
+    ) -> None:
+        """Store (url, etag, last_modified, content_hash, links) entries in one transaction."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(collection, url, etag, last_modified, content_hash, json.dumps(links or []), now)
+                 for url, etag, last_modified, content_hash, links in entries]
+            )
+            self._conn.commit()
+
+    def fetched_at(self, collection: str, urls: List[str]) -> Dict[str, float]:
+        """Return when each of the given URLs was last fetched (URLs never cached are absent)."""
+        found: Dict[str, float] = {}
+        with self._lock:
+            for start in range(0, len(urls), 500):
+                batch = urls[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._conn.execute(
+                    f"SELECT url, fetched_at FROM pages WHERE collection = ? AND url IN ({placeholders})",
+                    (collection, *batch)
+                ).fetchall())
+        return found
+
+    def touch(self, collection: str, url: str) -> None:
+        """Record that an unchanged page was re-validated."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ? WHERE collection = ? AND url = ?",
+                (time.time(), collection, url)
+            )
+            self._conn.commit()
+
+    def delete_collection(self, collection: str) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM pages WHERE collection = ?", (collection,))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
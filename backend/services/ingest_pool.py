@@ -0,0 +1,169 @@
+# backend/services/ingest_pool.py
+from collections import deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Iterator, List, NamedTuple, Optional, Tuple
+import logging
+import multiprocessing
+import threading
+
+# Per-process state of pool workers, created once by _init_worker
+_dispatcher = None
+_chunker = None
+
+class ParsedDocument(NamedTuple):
+    name: str
+    spans: Optional[list]  # ChunkSpans when the worker chunked the document
+    pages: Optional[List[Tuple[int, str]]]  # parsed pages when it did not
+    text: Optional[str]  # full text, only when requested
+    error: Optional[str]
+
+def as_pages(parsed_content: Any) -> Optional[List[Tuple[int, str]]]:
+    """Normalize parser output to (page_num, text) tuples, or None if unsupported."""
+    if isinstance(parsed_content, list) and all(isinstance(item, tuple) and len(item) == 2 for item in parsed_content):
+        # Handle (page_num, text) format
+        return parsed_content
+    if isinstance(parsed_content, str):
+        # Handle plain text format - convert to list of (1, text)
+        return [(1, parsed_content)]
+    return None
+
+def _init_worker(chunker) -> None:
+    global _dispatcher, _chunker
+    from .parser.dispatcher import ParserDispatcher
+    _dispatcher = ParserDispatcher()
+    _chunker = chunker
+
+def _parse_and_chunk(path: str, name: str, with_text: bool, sections: bool) -> ParsedDocument:
+    try:
+        parse = _dispatcher.dispatch_sections if sections else _dispatcher.dispatch_parser
+        pages = as_pages(parse(path))
+        if pages is None:
+            return ParsedDocument(name, None, None, None, "Unsupported parsed content format")
+        text = "\n".join(t for _, t in pages) if with_text else None
+        if _chunker is None:
+            return ParsedDocument(name, None, pages, text, None)
+        # Spans of a page share its text, which pickle sends only once
+        return ParsedDocument(name, list(_chunker.iter_spans(pages, name)), None, text, None)
+    except Exception as e:
+        return ParsedDocument(name, None, None, None, str(e))
+
+def _finished(future) -> bool:
+    return future.done() and not future.cancelled() and future.exception() is None
+
+class ParsePool:
+    """
+    Long-lived process pool for the parse+chunk stage of document ingestion.
+
+    Each worker builds its ParserDispatcher once, so parsers and their lazily
+    loaded OCR readers are reused across files and uploads. Documents come back
+    as chunk offsets over the parsed text rather than chunk dicts. Errors are
+    returned per file; if a worker dies (e.g. a crash inside a native parser),
+    the pool is restarted and the files that were in flight are retried once.
+
+    One pool is shared by concurrent uploads: creating and restarting the
+    executor is locked, and a broken executor is only replaced once, by the
+    first caller that notices it.
+    """
+
+    def __init__(self, workers: int, chunker: Any = None, sections: bool = False):
+        """
+        Initialize the ParsePool (worker processes start on first use).
+
+        Args:
+            workers: Number of worker processes
+            chunker: Picklable chunker run in the workers (None ships parsed pages back unchunked)
+            sections: Parse files into pages/sections (ParserDispatcher.dispatch_sections)
+        """
+        self.workers = workers
+        self.chunker = chunker
+        self.sections = sections
+        self.logger = logging.getLogger(__name__)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs an event loop and threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.chunker,)
+                )
+                self.logger.info(f"✅ Started parse pool with {self.workers} workers")
+            return self._executor
+
+    def _submit(self, path: str, name: str, with_text: bool) -> Tuple[Any, ProcessPoolExecutor]:
+        # Returns the future with the executor it runs on, so a failure restarts only that executor
+        while True:
+            executor = self._get_executor()
+            try:
+                return executor.submit(_parse_and_chunk, path, name, with_text, self.sections), executor
+            except (BrokenProcessPool, RuntimeError):
+                # Broken, or shut down by a concurrent restart
+                self._restart(executor)
+
+    def iter_documents(self, file_paths: List[str], file_names: List[str], with_text: bool = False) -> Iterator[ParsedDocument]:
+        """
+        Parse and chunk files in the worker processes.
+
+        At most two files per worker are in flight, so results waiting to be
+        consumed stay bounded.
+
+        Args:
+            file_paths: Paths of the files
+            file_names: Names used as chunk sources
+            with_text: Also return each document's full text
+
+        Yields:
+            ParsedDocument per file, in input order
+        """
+        todo = deque(zip(file_paths, file_names))
+        in_flight: deque = deque()
+        window = self.workers * 2
+
+        while todo or in_flight:
+            while todo and len(in_flight) < window:
+                path, name = todo.popleft()
+                in_flight.append((path, name, 0, *self._submit(path, name, with_text)))
+
+            path, name, attempt, pending, executor = in_flight.popleft()
+            if isinstance(pending, ParsedDocument):
+                yield pending
+                continue
+            try:
+                result = pending.result()
+            except (BrokenProcessPool, CancelledError):
+                # Cancelled: another upload restarted the shared pool while this file was queued on it
+                self._restart(executor)
+                # Resubmit files that were lost with the pool; the one that crashed fails on its second attempt
+                lost = [(path, name, attempt, pending, executor)] + list(in_flight)
+                in_flight.clear()
+                for p, n, a, item, e in lost:
+                    if isinstance(item, ParsedDocument) or (e is not executor and not item.cancelled()):
+                        # Done, or queued on a newer (healthy) executor
+                        in_flight.append((p, n, a, item, e))
+                    elif _finished(item):
+                        in_flight.append((p, n, a, item.result(), e))
+                    elif a >= 1:
+                        in_flight.append((p, n, a, ParsedDocument(n, None, None, None, "Parser worker crashed"), e))
+                    else:
+                        in_flight.append((p, n, a + 1, *self._submit(p, n, with_text)))
+                continue
+            yield result
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is not broken:
+                return  # already replaced by a concurrent caller
+            self._executor = None
+        self.logger.warning("⚠️ Parse worker died; restarting the pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -1,6 +1,7 @@
 # backend/services/parser/dispatcher.py
-from typing import Dict, Callable, Optional
+from typing import Dict, Callable, List, Optional, Tuple, Union
 import logging
+from utils.metrics import PARSE_MS
 from .pdf_parser import PDFParser
 from .doc_parser import DOCXParser
 from .img_parser import ImageParser
@@ -16,20 +17,43 @@ class ParserDispatcher:
         Initialize the parser dispatcher with available parsers.
         """
         self.parsers: Dict[str, Callable] = {}
+        # Parsers returning (page/section number, text) tuples, used by dispatch_sections
+        self.section_parsers: Dict[str, Callable] = {}
         self.logger = logging.getLogger(__name__)
         self._initialize_parsers()
     
     def _initialize_parsers(self) -> None:
         """Initialize all available parsers."""
+        # One instance per parser, so extensions share its OCR reader
+        pdf_parser = PDFParser()
+        docx_parser = DOCXParser()
+        image_parser = ImageParser()
+        txt_parser = TXTParser()
         self.parsers = {
-            "pdf": PDFParser().extract_text,
-            "doc": DOCXParser().extract_text,
-            "docx": DOCXParser().extract_text,
-            "jpg": ImageParser().extract_text,
-            "jpeg": ImageParser().extract_text,
-            "png": ImageParser().extract_text,
-            "txt": TXTParser().extract_text
+            "pdf": pdf_parser.extract_text,
+            "doc": docx_parser.extract_text,
+            "docx": docx_parser.extract_text,
+            "jpg": image_parser.extract_text,
+            "jpeg": image_parser.extract_text,
+            "png": image_parser.extract_text,
+            "txt": txt_parser.extract_text
         }
+        self.section_parsers = {
+            "pdf": pdf_parser.extract_pages_with_ocr,
+            "doc": docx_parser.extract_text_with_ocr,
+            "docx": docx_parser.extract_text_with_ocr,
+            "jpg": image_parser.extract_text_with_ocr,
+            "jpeg": image_parser.extract_text_with_ocr,
+            "png": image_parser.extract_text_with_ocr,
+            "txt": txt_parser.extract_text_chunks
+        }
+    
+    def warmup_ocr(self) -> None:
+        """Load the OCR readers of all registered parsers that use OCR."""
+        parsers = {id(func.__self__): func.__self__ for func in self.parsers.values() if hasattr(func, "__self__")}
+        for parser in parsers.values():
+            if hasattr(parser, "_get_ocr_reader"):
+                parser._get_ocr_reader()
     
     def get_supported_extensions(self) -> list:
         """
@@ -53,11 +77,35 @@ class ParserDispatcher:
         Raises:
             ValueError: If file type is not supported
         """
+        return self._dispatch(file_path, self.parsers)
+    
+    def dispatch_sections(self, file_path: str) -> Union[List[Tuple[int, str]], str]:
+        """
+        Parse a file into its pages or sections: PDF pages, DOCX paragraphs,
+        tables and image texts, TXT lines. Used when the chunker packs small
+        sections, so chunks can cite page ranges.
+        
+        Args:
+            file_path: Path to the file to parse
+            
+        Returns:
+            List of (page/section number, text) tuples (or text, for
+            registered parsers without a section variant)
+            
+        Raises:
+            ValueError: If file type is not supported
+        """
+        ext = file_path.lower().split('.')[-1]
+        parsers = self.section_parsers if ext in self.section_parsers else self.parsers
+        return self._dispatch(file_path, parsers)
+    
+    def _dispatch(self, file_path: str, parsers: Dict[str, Callable]):
         ext = file_path.lower().split('.')[-1]
         
-        if ext in self.parsers:
+        if ext in parsers:
             self.logger.info(f"🔄 Dispatching {ext.upper()} file to parser: {file_path}")
-            return self.parsers[ext](file_path)
+            with PARSE_MS.time(format=ext):
+                return parsers[ext](file_path)
         else:
             error_msg = f"Unsupported file type: {ext}"
             self.logger.error(f"❌ {error_msg}")
@@ -72,6 +120,7 @@ class ParserDispatcher:
             parser_func: Parser function that takes file_path and returns text
         """
         self.parsers[extension.lower()] = parser_func
+        self.section_parsers.pop(extension.lower(), None)
         self.logger.info(f"✅ Registered parser for .{extension} files")
     
     def unregister_parser(self, extension: str) -> None:
@@ -83,6 +132,7 @@ class ParserDispatcher:
         """
         if extension.lower() in self.parsers:
             del self.parsers[extension.lower()]
+            self.section_parsers.pop(extension.lower(), None)
             self.logger.info(f"🗑️ Unregistered parser for .{extension} files")
 
             
\ No newline at end of file
@@ -7,6 +7,7 @@ import io
 import gc
 import numpy as np
 import logging
+from utils.metrics import OCR_PAGES
 
 class DOCXParser:
     """
@@ -144,6 +145,7 @@ class DOCXParser:
                         image = Image.open(image_stream).convert("RGB")
                         image_np = np.array(image)
                         
+                        OCR_PAGES.inc(parser="docx")
                         ocr_result = reader.readtext(image_np, detail=0)
                         if ocr_result:
                             image_texts.append("\n".join(ocr_result))
@@ -5,6 +5,7 @@ import numpy as np
 import gc
 import easyocr
 import logging
+from utils.metrics import OCR_PAGES
 
 class ImageParser:
     """
@@ -75,6 +76,7 @@ class ImageParser:
                 return [(1, "")]
             
             # Perform OCR
+            OCR_PAGES.inc(parser="image")
             ocr_result = reader.readtext(img_cv, detail=0)
             grouped_text = "\n".join(ocr_result)
             
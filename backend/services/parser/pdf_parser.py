@@ -8,6 +8,8 @@ import gc
 from typing import List, Tuple, Optional
 from langsmith import traceable
 import logging
+import time
+from utils.metrics import OCR_PAGES, PARSE_MS_PER_PAGE
 
 class PDFParser:
     """
@@ -199,9 +201,13 @@ class PDFParser:
             doc = fitz.open(pdf_path)
             
             for page_num, page in enumerate(doc):
+                page_start = time.perf_counter()
                 page_text = page.get_text().strip()
+                method = "native"
 
                 if not page_text:
+                    method = "ocr"
+                    OCR_PAGES.inc(parser="pdf")
                     self.logger.info(f"📄 Page {page_num + 1}: Using OCR fallback")
                     pix = page.get_pixmap(dpi=self.dpi)
                     img_bytes = pix.tobytes("png")
@@ -215,6 +221,7 @@ class PDFParser:
 
                 results.append((page_num + 1, page_text))
                 gc.collect()
+                PARSE_MS_PER_PAGE.observe((time.perf_counter() - page_start) * 1000, parser="pdf", method=method)
 
             doc.close()
             return results
@@ -0,0 +1,94 @@
+# backend/services/recrawl.py
+from typing import Dict, List, Optional
+import asyncio
+import logging
+
+class SitemapRecrawlJob:
+    """
+    Periodic background job keeping a collection in sync with site sitemaps.
+
+    Each cycle runs RAGService.index_sitemaps_to_qdrant, which only touches
+    pages that changed since the previous cycle. Cycles never overlap; a
+    failing cycle is logged and retried at the next interval.
+    """
+
+    def __init__(
+        self,
+        rag_service,
+        sitemap_urls: List[str],
+        collection_name: str,
+        interval: float = 3600.0,
+        selectors: Optional[List[str]] = None,
+        max_pages: Optional[int] = None,
+        max_age: Optional[float] = None
+    ):
+        """
+        Initialize the SitemapRecrawlJob.
+
+        Args:
+            rag_service: RAGService used for indexing
+            sitemap_urls: sitemap.xml or sitemap index URLs
+            collection_name: Collection kept up to date
+            interval: Seconds between the start of one cycle and the next
+            selectors: CSS selectors for scraping (the scraper defaults if None)
+            max_pages: Maximum pages scraped per cycle
+            max_age: Seconds after which pages without <lastmod> are revalidated
+        """
+        self.rag_service = rag_service
+        self.sitemap_urls = sitemap_urls
+        self.collection_name = collection_name
+        self.interval = interval
+        self.selectors = selectors
+        self.max_pages = max_pages
+        self.max_age = max_age
+        self.logger = logging.getLogger(__name__)
+        self.last_summary: Optional[Dict[str, int]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, rag_service, config) -> Optional["SitemapRecrawlJob"]:
+        """Build the job from config, or return None when no sitemaps are configured."""
+        if not config.sitemap_urls:
+            return None
+        return cls(
+            rag_service,
+            list(config.sitemap_urls),
+            config.sitemap_collection,
+            interval=config.sitemap_interval,
+            max_pages=config.sitemap_max_pages or None,
+            max_age=config.sitemap_max_age or None
+        )
+
+    async def run_once(self) -> Dict[str, int]:
+        selectors = self.selectors or self.rag_service.scraper.default_selectors
+        self.last_summary = await self.rag_service.index_sitemaps_to_qdrant(
+            self.sitemap_urls, selectors, self.collection_name,
+            max_pages=self.max_pages, max_age=self.max_age
+        )
+        return self.last_summary
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"❌ Sitemap recrawl of '{self.collection_name}' failed: {e}")
+            await asyncio.sleep(max(0.0, self.interval - (loop.time() - started)))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            self.logger.info(
+                f"🗺️ Sitemap recrawl scheduled every {self.interval:.0f}s for '{self.collection_name}' "
+                f"({len(self.sitemap_urls)} sitemap(s))"
+            )
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
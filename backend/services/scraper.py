@@ -1,10 +1,89 @@
 # backend/services/scraper.py
 import httpx
+import httpcore
+import anyio
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from anyio import to_thread
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+import hashlib
+import ipaddress
 import logging
 import asyncio
+import os
+import posixpath
+import socket
+import tempfile
+import time
+import lxml.html
 from urllib.parse import urlparse
+from .http_cache import HTTPCache, CacheEntry
+from .html_extractor import HTMLExtractor
+from .chunker import WebContentChunker
+from utils.metrics import SCRAPE_CACHE, SCRAPE_SKIPPED
+
+# Marker key of scrape results for pages that did not change since they were cached
+NOT_MODIFIED = "not_modified"
+
+HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml"}
+
+class _BodyTooLarge(Exception):
+    def __init__(self, limit: int):
+        super().__init__(f"Response body exceeds {limit} bytes")
+        self.limit = limit
+
+class CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """
+    httpcore network backend that caches DNS lookups for a TTL.
+    
+    Connections are opened to the cached address while TLS still uses the
+    original hostname for SNI and certificate checks (httpcore passes the
+    origin host to start_tls), so caching is transparent to HTTPS.
+    """
+    
+    def __init__(self, backend: Optional[httpcore.AsyncNetworkBackend] = None, ttl: float = 300.0):
+        self._backend = backend or httpcore.AnyIOBackend()
+        self.ttl = ttl
+        self._cache: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+    
+    async def _resolve(self, host: str, port: int) -> List[str]:
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+        
+        cached = self._cache.get((host, port))
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        infos = await anyio.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[(host, port)] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+    
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            addresses = await self._resolve(host, port)
+        except OSError as e:
+            raise httpcore.ConnectError(str(e)) from e
+        
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last_error = e
+        
+        # Addresses may have moved; resolve again next time
+        self._cache.pop((host, port), None)
+        raise last_error
+    
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+    
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
 
 class WebScraper:
     """
@@ -16,7 +95,16 @@ class WebScraper:
         timeout: int = 30,
         max_retries: int = 3,
         user_agent: Optional[str] = None,
-        default_selectors: Optional[List[str]] = None
+        default_selectors: Optional[List[str]] = None,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        max_connections_per_host: int = 6,
+        http2: bool = True,
+        dns_cache_ttl: float = 300.0,
+        cache: Optional[HTTPCache] = None,
+        chunker: Optional[WebContentChunker] = None,
+        max_page_bytes: int = 5 * 1024 * 1024,
+        max_document_bytes: int = 50 * 1024 * 1024
     ):
         """
         Initialize the WebScraper.
@@ -26,50 +114,159 @@ class WebScraper:
             max_retries: Maximum number of retry attempts
             user_agent: Custom user agent string
             default_selectors: Default CSS selectors to use if none provided
+            max_connections: Connection pool size of the shared HTTP client
+            max_keepalive_connections: Idle connections kept open for reuse
+            max_connections_per_host: Concurrent requests allowed per host
+            http2: Negotiate HTTP/2 where the server supports it
+            dns_cache_ttl: Seconds to cache DNS lookups (0 disables the cache)
+            cache: Optional HTTP cache enabling conditional re-scrapes
+            chunker: Structure-aware chunker for scraped pages (a 256-token
+                WebContentChunker by default)
+            max_page_bytes: HTML/text bytes read per page; larger pages are truncated
+            max_document_bytes: Maximum size of linked PDFs; larger ones are rejected
         """
         self.timeout = timeout
         self.max_retries = max_retries
         self.user_agent = user_agent or "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
         self.default_selectors = default_selectors or ["p", "h1", "h2", "h3", "li", "article", "section"]
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.http2 = http2
+        self.dns_cache_ttl = dns_cache_ttl
+        self.cache = cache
+        self.extractor = HTMLExtractor()
+        self.chunker = chunker or WebContentChunker()
+        self.max_page_bytes = max_page_bytes
+        self.max_document_bytes = max_document_bytes
+        self._pdf_parser = None
         self.logger = logging.getLogger(__name__)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+    
+    @classmethod
+    def from_config(cls, config) -> "WebScraper":
+        return cls(
+            max_connections=config.scraper_max_connections,
+            max_connections_per_host=config.scraper_max_connections_per_host,
+            http2=config.scraper_http2,
+            dns_cache_ttl=config.scraper_dns_cache_ttl,
+            cache=HTTPCache(config.scraper_cache_path) if config.scraper_cache_path else None,
+            chunker=WebContentChunker(config.web_chunk_tokens),
+            max_page_bytes=config.scraper_max_page_bytes,
+            max_document_bytes=config.scraper_max_document_bytes
+        )
+    
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                self.logger.warning("⚠️ h2 package not installed, falling back to HTTP/1.1")
+                http2 = False
+        
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=30.0
+        )
+        transport = httpx.AsyncHTTPTransport(http2=http2, limits=limits)
+        # httpx doesn't expose the network backend, so wrap the one its pool uses
+        pool = getattr(transport, "_pool", None)
+        if self.dns_cache_ttl > 0 and hasattr(pool, "_network_backend"):
+            pool._network_backend = CachingDNSBackend(pool._network_backend, ttl=self.dns_cache_ttl)
+        
+        return httpx.AsyncClient(
+            transport=transport,
+            headers={"User-Agent": self.user_agent},
+            timeout=self.timeout,
+            follow_redirects=True
+        )
+    
+    async def start(self) -> None:
+        """Open the shared HTTP client (called at app startup)."""
+        if self._client is None:
+            self._client = self._build_client()
+            self.logger.info(
+                f"🌐 Scraper HTTP client ready (http2={self.http2}, max_connections={self.max_connections}, "
+                f"per_host={self.max_connections_per_host})"
+            )
     
-    async def _make_request(self, url: str, client: httpx.AsyncClient) -> Optional[httpx.Response]:
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and its pooled connections (called at app shutdown)."""
+        client, self._client = self._client, None
+        self._host_semaphores.clear()
+        if client is not None:
+            await client.aclose()
+            self.logger.info("🌐 Scraper HTTP client closed")
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        # Lazily started for callers outside the app lifespan (scripts, benchmarks)
+        if self._client is None:
+            await self.start()
+        return self._client
+    
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._host_semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return semaphore
+    
+    @asynccontextmanager
+    async def _request_stream(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        max_retries: Optional[int] = None
+    ) -> AsyncIterator[httpx.Response]:
         """
-        Make HTTP request with retry logic.
+        Open a streamed GET request with retry logic; the body is not read yet.
+        
+        Connection errors and error statuses are retried before the response is
+        handed over; errors while the caller reads the body propagate.
         
         Args:
             url: URL to request
-            client: HTTPX async client
+            headers: Extra request headers (e.g. conditional request validators)
+            max_retries: Attempts for this request (defaults to the scraper's max_retries)
             
-        Returns:
-            Response object or None if failed
+        Yields:
+            Response (possibly 304 Not Modified) whose body can be read with aiter_bytes()
         """
-        headers = {"User-Agent": self.user_agent}
+        headers = {"User-Agent": self.user_agent, **(headers or {})}
+        client = await self._get_client()
+        attempts = max_retries or self.max_retries
         
-        for attempt in range(self.max_retries):
+        for attempt in range(attempts):
+            opened = False
             try:
-                response = await client.get(
-                    url,
-                    headers=headers,
-                    timeout=self.timeout,
-                    follow_redirects=True
-                )
-                response.raise_for_status()
-                return response
+                async with self._host_semaphore(url):
+                    async with client.stream("GET", url, headers=headers, timeout=self.timeout, follow_redirects=True) as response:
+                        if response.status_code != 304:
+                            response.raise_for_status()
+                        opened = True
+                        yield response
+                        return
                 
             except httpx.HTTPStatusError as e:
+                if opened:
+                    raise
                 self.logger.warning(f"⚠️ HTTP error {e.response.status_code} for {url} (attempt {attempt + 1})")
-                if attempt == self.max_retries - 1:
+                if attempt == attempts - 1:
                     raise
                 await asyncio.sleep(2 ** attempt)  # Exponential backoff
                 
             except httpx.RequestError as e:
+                if opened:
+                    raise
                 self.logger.warning(f"⚠️ Request error for {url}: {e} (attempt {attempt + 1})")
-                if attempt == self.max_retries - 1:
+                if attempt == attempts - 1:
                     raise
                 await asyncio.sleep(2 ** attempt)
         
-        return None
+        raise RuntimeError(f"Failed to fetch URL: {url}")
     
     async def scrape_page(
         self,
@@ -90,50 +287,306 @@ class WebScraper:
         Returns:
             Dictionary with selector keys and extracted content lists
         """
+        try:
+            return await self._scrape_page(url, selectors, extract_links, extract_images)
+        except Exception as e:
+            self.logger.error(f"❌ Failed to scrape {url}: {e}")
+            return {}
+    
+    async def _scrape_page(
+        self,
+        url: str,
+        selectors: Optional[List[str]],
+        extract_links: bool,
+        extract_images: bool,
+        cache_scope: Optional[str] = None
+    ) -> Dict[str, List[str]]:
+        # Same as scrape_page, but failures propagate so callers can report them.
+        # With a cache_scope, pages unchanged since they were cached in that scope
+        # come back as {NOT_MODIFIED: True, "links": <cached links>} without parsing.
         selectors = selectors or self.default_selectors
-        results = {}
         
+        cached = None
+        if self.cache is not None and cache_scope is not None:
+            # sqlite reads block; keep them off the event loop
+            cached = await to_thread.run_sync(self.cache.get, cache_scope, url)
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        
+        pdf_path = None
         try:
-            async with httpx.AsyncClient() as client:
-                response = await self._make_request(url, client)
-                
-                if response is None:
-                    self.logger.error(f"❌ Failed to fetch URL: {url}")
-                    return {}
-                
-                soup = BeautifulSoup(response.text, "lxml")
-                
-                # Extract content based on selectors
-                for selector in selectors:
-                    try:
-                        elements = soup.select(selector)
-                        texts = [
-                            el.get_text(strip=True) 
-                            for el in elements 
-                            if el.get_text(strip=True)
-                        ]
-                        results[selector] = texts
-                    except Exception as e:
-                        self.logger.warning(f"⚠️ Failed to extract with selector '{selector}': {e}")
-                        results[selector] = []
-                
-                # Extract links if requested
-                if extract_links:
-                    results["links"] = self._extract_links(soup, url)
-                
-                # Extract images if requested
-                if extract_images:
-                    results["images"] = self._extract_images(soup, url)
+            async with self._request_stream(url, headers=headers) as response:
+                if response.status_code == 304 and cached is not None:
+                    return await self._not_modified(cache_scope, url, cached, "not_modified")
                 
-                # Extract page metadata
-                results["metadata"] = self._extract_metadata(soup, url)
+                chunks = response.aiter_bytes()
+                first = await anext(chunks, b"")
+                kind = self._content_kind(response, url, first)
+                if kind is None:
+                    SCRAPE_SKIPPED.inc(reason="content_type")
+                    raise ValueError(f"Unsupported content type '{response.headers.get('content-type', '')}' for {url}")
                 
-                self.logger.info(f"✅ Successfully scraped {url}: {sum(len(v) for v in results.values())} elements")
-                return results
+                limit = self.max_document_bytes if kind == "pdf" else self.max_page_bytes
+                declared = response.headers.get("content-length", "")
+                if kind == "pdf" and declared.isdigit() and int(declared) > limit:
+                    SCRAPE_SKIPPED.inc(reason="too_large")
+                    raise ValueError(f"Document too large ({int(declared)} bytes > {limit}): {url}")
                 
-        except Exception as e:
-            self.logger.error(f"❌ Failed to scrape {url}: {e}")
-            return {}
+                body = self._capped_body(first, chunks, limit)
+                if kind == "pdf":
+                    pdf_path, content_hash = await self._spool_pdf(body, url)
+                    results = {}
+                elif kind == "text":
+                    results, content_hash = await self._scrape_text(body, response.charset_encoding, url)
+                elif self.extractor.supports(selectors):
+                    results, content_hash = await self._scrape_html(
+                        body, response.charset_encoding, url, selectors, extract_links, extract_images
+                    )
+                else:
+                    # Full CSS selectors need BeautifulSoup, which parses a complete string
+                    content, content_hash = await self._read_capped(body, url)
+                    results = None
+        
+        except BaseException:
+            if pdf_path is not None:
+                os.unlink(pdf_path)
+            raise
+        
+        if pdf_path is not None:
+            # Parsed after the stream is closed: OCR can take minutes and must not hold the connection or host slot
+            try:
+                if cached is None or cached.content_hash != content_hash:
+                    results = await self._parse_pdf(pdf_path, url)
+            finally:
+                os.unlink(pdf_path)
+        
+        if cached is not None and cached.content_hash == content_hash:
+            return await self._not_modified(cache_scope, url, cached, "unchanged")
+        if cache_scope is not None and self.cache is not None:
+            SCRAPE_CACHE.inc(result="changed" if cached is not None else "miss")
+        
+        if results is None:
+            html = content.decode(response.charset_encoding or "utf-8", errors="replace")
+            results = self._extract_with_soup(html, url, selectors, extract_links, extract_images)
+        
+        results["metadata"].update(
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+            content_hash=content_hash
+        )
+        
+        self.logger.info(f"✅ Successfully scraped {url}: {sum(len(v) for v in results.values())} elements")
+        return results
+    
+    @staticmethod
+    def _content_kind(response: httpx.Response, url: str, first: bytes) -> Optional[str]:
+        """Classify a response as "html", "pdf" or "text" (None if it can't be indexed)."""
+        content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type in HTML_CONTENT_TYPES:
+            return "html"
+        if content_type == "application/pdf" or first.startswith(b"%PDF-"):
+            return "pdf"
+        if content_type == "text/plain":
+            return "text"
+        if content_type in ("", "application/octet-stream"):
+            if urlparse(url).path.lower().endswith(".pdf"):
+                return "pdf"
+            return "html" if first.lstrip()[:1] == b"<" else None
+        return None
+    
+    async def _capped_body(self, first: bytes, chunks: AsyncIterator[bytes], limit: int) -> AsyncIterator[bytes]:
+        # Yields at most limit bytes, then raises _BodyTooLarge if more were sent
+        received = 0
+        chunk = first
+        while chunk:
+            if received + len(chunk) > limit:
+                remaining = limit - received
+                if remaining > 0:
+                    yield chunk[:remaining]
+                raise _BodyTooLarge(limit)
+            received += len(chunk)
+            yield chunk
+            chunk = await anext(chunks, b"")
+    
+    async def _scrape_html(
+        self,
+        body: AsyncIterator[bytes],
+        encoding: Optional[str],
+        url: str,
+        selectors: List[str],
+        extract_links: bool,
+        extract_images: bool
+    ) -> Tuple[Dict, str]:
+        # Feed the tree as bytes arrive; oversized pages are truncated rather than dropped
+        parser = lxml.html.HTMLParser(encoding=encoding) if encoding else lxml.html.HTMLParser()
+        hasher = hashlib.sha256()
+        try:
+            async for chunk in body:
+                hasher.update(chunk)
+                parser.feed(chunk)
+        except _BodyTooLarge as e:
+            SCRAPE_SKIPPED.inc(reason="truncated")
+            self.logger.warning(f"⚠️ {url} exceeds {e.limit} bytes; indexing the first {e.limit}")
+        root = parser.close()
+        if root is None:
+            raise ValueError(f"Empty HTML document: {url}")
+        return self._extract_from_root(root, url, selectors, extract_links, extract_images), hasher.hexdigest()
+    
+    async def _read_capped(self, body: AsyncIterator[bytes], url: str, truncate: bool = True) -> Tuple[bytes, str]:
+        # Without truncate, a body over the cap is an error instead of being cut short
+        content = bytearray()
+        hasher = hashlib.sha256()
+        try:
+            async for chunk in body:
+                hasher.update(chunk)
+                content += chunk
+        except _BodyTooLarge as e:
+            if not truncate:
+                raise ValueError(f"Response too large (> {e.limit} bytes): {url}") from e
+            SCRAPE_SKIPPED.inc(reason="truncated")
+            self.logger.warning(f"⚠️ {url} exceeds {e.limit} bytes; indexing the first {e.limit}")
+        return bytes(content), hasher.hexdigest()
+    
+    async def _scrape_text(self, body: AsyncIterator[bytes], encoding: Optional[str], url: str) -> Tuple[Dict, str]:
+        content, content_hash = await self._read_capped(body, url)
+        text = content.decode(encoding or "utf-8", errors="replace")
+        paragraphs = [" ".join(p.split()) for p in text.split("\n\n") if p.strip()]
+        results = {
+            "text": paragraphs,
+            "blocks": [{"selector": "text", "tag": "p", "text": p} for p in paragraphs],
+            "metadata": {"url": url, "title": posixpath.basename(urlparse(url).path) or url}
+        }
+        return results, content_hash
+    
+    async def _spool_pdf(self, body: AsyncIterator[bytes], url: str) -> Tuple[str, str]:
+        # Spool to disk (PDFParser reads files); a truncated PDF is useless, so oversize is an error
+        hasher = hashlib.sha256()
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                try:
+                    async for chunk in body:
+                        hasher.update(chunk)
+                        f.write(chunk)
+                except _BodyTooLarge as e:
+                    SCRAPE_SKIPPED.inc(reason="too_large")
+                    raise ValueError(f"Document too large (> {e.limit} bytes): {url}") from e
+        except BaseException:
+            os.unlink(path)
+            raise
+        return path, hasher.hexdigest()
+    
+    async def _parse_pdf(self, path: str, url: str) -> Dict:
+        pages = await to_thread.run_sync(self._get_pdf_parser().extract_pages_with_ocr, path, abandon_on_cancel=True)
+        texts = [text for _, text in pages if text.strip()]
+        results = {
+            "pdf": texts,
+            "blocks": [{"selector": "pdf", "tag": "p", "text": text} for text in texts],
+            "metadata": {"url": url, "title": posixpath.basename(urlparse(url).path) or url}
+        }
+        self.logger.info(f"📄 Parsed PDF {url}: {len(pages)} pages")
+        return results
+    
+    def _get_pdf_parser(self):
+        # Imported lazily: PyMuPDF/OpenCV are only needed once a PDF is linked
+        if self._pdf_parser is None:
+            from .parser.pdf_parser import PDFParser
+            self._pdf_parser = PDFParser()
+        return self._pdf_parser
+    
+    def _extract_from_root(
+        self,
+        root,
+        url: str,
+        selectors: List[str],
+        extract_links: bool,
+        extract_images: bool
+    ) -> Dict:
+        # Single tree walk; text goes to its innermost matching selector, boilerplate is skipped
+        results = self.extractor.extract_text(root, selectors, with_blocks=True)
+        if extract_links:
+            results["links"] = self.extractor.extract_links(root, url)
+        if extract_images:
+            results["images"] = self.extractor.extract_images(root, url)
+        results["metadata"] = self.extractor.extract_metadata(root, url)
+        return results
+    
+    def _extract_with_soup(
+        self,
+        html: str,
+        url: str,
+        selectors: List[str],
+        extract_links: bool,
+        extract_images: bool
+    ) -> Dict:
+        # Full CSS selector support for selectors the lxml extractor can't handle
+        results = {}
+        soup = BeautifulSoup(html, "lxml")
+        
+        # Extract content based on selectors
+        for selector in selectors:
+            try:
+                elements = soup.select(selector)
+                texts = [
+                    el.get_text(strip=True) 
+                    for el in elements 
+                    if el.get_text(strip=True)
+                ]
+                results[selector] = texts
+            except Exception as e:
+                self.logger.warning(f"⚠️ Failed to extract with selector '{selector}': {e}")
+                results[selector] = []
+        
+        # Extract links if requested
+        if extract_links:
+            results["links"] = self._extract_links(soup, url)
+        
+        # Extract images if requested
+        if extract_images:
+            results["images"] = self._extract_images(soup, url)
+        
+        # Extract page metadata
+        results["metadata"] = self._extract_metadata(soup, url)
+        return results
+    
+    async def _not_modified(self, cache_scope: str, url: str, cached: CacheEntry, result: str) -> Dict:
+        SCRAPE_CACHE.inc(result=result)
+        await to_thread.run_sync(self.cache.touch, cache_scope, url)
+        self.logger.info(f"♻️ {url} unchanged since last scrape ({result})")
+        return {NOT_MODIFIED: True, "links": [{"url": link} for link in cached.links]}
+    
+    def commit_cache(self, cache_scope: str, pages: Dict[str, Dict]) -> None:
+        """
+        Record scraped pages' validators once their content has been indexed,
+        so the next scrape in the same scope can skip them if unchanged.
+        
+        Writes all pages in one sqlite transaction; blocking, so call it off
+        the event loop.
+        
+        Args:
+            cache_scope: Cache namespace (the collection the pages were indexed into)
+            pages: Scrape result per page URL
+        """
+        if self.cache is None:
+            return
+        entries = []
+        for url, data in pages.items():
+            if data.get(NOT_MODIFIED):
+                continue
+            metadata = data.get("metadata", {})
+            entries.append((
+                url,
+                metadata.get("etag"),
+                metadata.get("last_modified"),
+                metadata.get("content_hash"),
+                [link["url"] for link in data.get("links", [])]
+            ))
+        if entries:
+            self.cache.put_many(cache_scope, entries)
     
     def _extract_links(self, soup: BeautifulSoup, base_url: str) -> List[Dict]:
         """
@@ -250,10 +703,15 @@ class WebScraper:
             List of chunk dictionaries
         """
         chunks = []
+        structured = bool(data.get("blocks")) and self.chunker is not None
+        
+        if structured:
+            # Merge blocks under the same heading up to the target size
+            chunks.extend(self.chunker.chunk_blocks(data["blocks"], url))
         
         for selector, texts in data.items():
-            # Skip non-content keys
-            if selector in ["links", "images", "metadata"]:
+            # Skip non-content keys (and per-selector lists already chunked from blocks)
+            if structured or selector in ["links", "images", "metadata", "blocks", NOT_MODIFIED]:
                 continue
                 
             for i, text in enumerate(texts):
@@ -284,7 +742,9 @@ class WebScraper:
         self,
         urls: List[str],
         selectors: Optional[List[str]] = None,
-        concurrency: int = 3
+        concurrency: int = 3,
+        errors: Optional[Dict[str, str]] = None,
+        cache_scope: Optional[str] = None
     ) -> Dict[str, Dict[str, List[str]]]:
         """
         Scrape multiple pages concurrently.
@@ -293,6 +753,9 @@ class WebScraper:
             urls: List of URLs to scrape
             selectors: CSS selectors for content extraction
             concurrency: Maximum number of concurrent requests
+            errors: Optional dict that receives an error message per failed URL
+            cache_scope: Send conditional requests against the cache in this scope;
+                unchanged pages are returned with the NOT_MODIFIED marker
             
         Returns:
             Dictionary mapping URLs to their scraped data
@@ -302,10 +765,16 @@ class WebScraper:
         
         async def scrape_with_semaphore(url):
             async with semaphore:
-                data = await self.scrape_page(url, selectors)
+                try:
+                    data = await self._scrape_page(url, selectors, False, False, cache_scope)
+                except Exception as e:
+                    self.logger.error(f"❌ Failed to scrape {url}: {e}")
+                    if errors is not None:
+                        errors[url] = str(e) or type(e).__name__
+                    data = {}
                 return url, data
         
-        tasks = [scrape_with_semaphore(url) for url in urls]
+        tasks = [scrape_with_semaphore(url) for url in dict.fromkeys(urls)]
         completed = await asyncio.gather(*tasks, return_exceptions=True)
         
         for result in completed:
@@ -1,27 +1,167 @@
+from typing import Callable, Dict, Optional
+import asyncio
+import time
+from anyio import to_thread
 from config.app_config import AppConfig
 from utils.logger import get_logger
+from utils.metrics import REGISTRY
 from services.embedder import Embedder
 from services.vector_store_qdrant import QdrantVectorStore
 from services.gemini_client import GeminiClient
 from services.chatbot import RAGService  # Make sure this exists
+from services.scraper import WebScraper
+from services.recrawl import SitemapRecrawlJob
+from services.suggested_questions import SuggestedQuestionsService
+
+# Backoff between attempts of a failed required warmup step
+WARMUP_RETRY_INITIAL_S = 1.0
+WARMUP_RETRY_MAX_S = 30.0
+
+# Warmup steps that must succeed before /ready reports ready
+REQUIRED_WARMUP = ("embedder", "vector_store")
 
 class ServiceManager:
-    def __init__(self, config: AppConfig):
+    def __init__(
+        self,
+        config: AppConfig,
+        embedder: Optional[Embedder] = None,
+        vector_store: Optional[QdrantVectorStore] = None,
+        gemini_client: Optional[GeminiClient] = None,
+        scraper: Optional[WebScraper] = None
+    ):
         self.config = config
         self.logger = get_logger("ServiceManager")
-        
-        # Initialize services
-        self.embedder = Embedder(config)
-        self.vector_store = QdrantVectorStore(config)
-        self.gemini_client = GeminiClient(config)
-        self.rag_service = RAGService(config, self.embedder, self.vector_store, self.gemini_client)
-        
+
+        # Initialize services (injected instances take precedence, e.g. offline stand-ins)
+        self.embedder = embedder or Embedder(config)
+        self.vector_store = vector_store or QdrantVectorStore(config)
+        self.gemini_client = gemini_client or GeminiClient(config)
+        self.scraper = scraper or WebScraper.from_config(config)
+        self.rag_service = RAGService(config, self.embedder, self.vector_store, self.gemini_client, self.scraper)
+        self.suggested_questions = SuggestedQuestionsService(self.gemini_client)
+        self.sitemap_job = SitemapRecrawlJob.from_config(self.rag_service, config)
+        self.gemini_client.scheduler.register_metrics(REGISTRY)
+
+        # Warmup state, reported by /ready
+        self.ready = False
+        self.warmup_status: Dict[str, str] = {}
+        self._warmup_task: Optional[asyncio.Task] = None
+        REGISTRY.callback("service_ready", "1 once startup warmup has finished", lambda: float(self.ready))
+
         self.logger.info("✅ All services initialized successfully")
-    
+
+    async def startup(self) -> None:
+        """Open long-lived resources; called from the app lifespan."""
+        await self.scraper.start()
+        if self.sitemap_job is not None:
+            self.sitemap_job.start()
+        if self.config.warmup_enabled:
+            # In the background, so the server (and /ready) comes up immediately
+            self._warmup_task = asyncio.create_task(self.warmup())
+        else:
+            self.ready = True
+
+    async def warmup(self) -> bool:
+        """
+        Load models and open connections before the first request: encode a
+        dummy batch with the embedder, connect to Qdrant and Gemini, and
+        optionally load the OCR readers.
+
+        Only the embedder and Qdrant are required for readiness. They are
+        retried with exponential backoff until they succeed, so a dependency
+        that is briefly unavailable at boot doesn't keep the service unready
+        until a restart. A failed Gemini or OCR warmup is logged and retried
+        lazily on first use.
+
+        Returns:
+            Whether the service is ready
+        """
+        steps: Dict[str, Callable[[], None]] = {
+            "embedder": self.embedder.warmup,
+            "vector_store": self.vector_store.warmup,
+        }
+        if self.config.warmup_gemini:
+            steps["gemini"] = self.gemini_client.warmup
+        if self.config.warmup_ocr:
+            steps["ocr"] = self.rag_service.parser_dispatcher.warmup_ocr
+
+        self.warmup_status = {name: "pending" for name in steps}
+        await asyncio.gather(
+            self._warmup_required({name: steps[name] for name in REQUIRED_WARMUP}),
+            *(self._warmup_step(name, step) for name, step in steps.items() if name not in REQUIRED_WARMUP)
+        )
+        return self.ready
+
+    async def _warmup_required(self, steps: Dict[str, Callable[[], None]]) -> None:
+        started = time.perf_counter()
+        await asyncio.gather(*(self._warmup_step(name, step, retry=True) for name, step in steps.items()))
+        self.ready = True
+        self.logger.info(f"✅ Warmup finished in {time.perf_counter() - started:.1f}s, service is ready")
+
+    @property
+    def readiness(self) -> str:
+        """Readiness state: ready, warming_up (required steps are retried until they succeed) or failed (warmup cancelled)."""
+        if self.ready:
+            return "ready"
+        if self._warmup_task is not None and not self._warmup_task.done():
+            return "warming_up"
+        return "failed"
+
+    async def _warmup_step(self, name: str, step: Callable[[], None], retry: bool = False) -> bool:
+        started = time.perf_counter()
+        delay = WARMUP_RETRY_INITIAL_S
+        while True:
+            try:
+                await to_thread.run_sync(step)
+                break
+            except Exception as e:
+                self.warmup_status[name] = f"failed: {e}"
+                if not retry:
+                    self.logger.warning(f"⚠️ Warmup of {name} failed: {e}")
+                    return False
+                self.logger.warning(f"⚠️ Warmup of {name} failed, retrying in {delay:g}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, WARMUP_RETRY_MAX_S)
+        self.warmup_status[name] = "ok"
+        self.logger.info(f"🔥 Warmed up {name} in {time.perf_counter() - started:.1f}s")
+        return True
+
+    async def shutdown(self) -> None:
+        """Release long-lived resources; called from the app lifespan."""
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        if self.sitemap_job is not None:
+            await self.sitemap_job.stop()
+        await self.scraper.aclose()
+        self.rag_service.close()
+        self.embedder.close()
+
     def get_services(self):
         return {
             "embedder": self.embedder,
             "vector_store": self.vector_store,
             "gemini_client": self.gemini_client,
-            "rag_service": self.rag_service
-        }
\ No newline at end of file
+            "rag_service": self.rag_service,
+            "scraper": self.scraper,
+            "suggested_questions": self.suggested_questions
+        }
+
+
+_service_manager: Optional[ServiceManager] = None
+
+def set_service_manager(manager: Optional[ServiceManager]) -> None:
+    """
+    Install the process-wide ServiceManager.
+    Must be called before the routes are imported to take effect.
+    """
+    global _service_manager
+    _service_manager = manager
+
+def get_service_manager(config: AppConfig) -> ServiceManager:
+    """
+    Return the process-wide ServiceManager, creating it from config on first use.
+    """
+    global _service_manager
+    if _service_manager is None:
+        _service_manager = ServiceManager(config)
+    return _service_manager
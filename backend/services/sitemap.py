@@ -0,0 +1,243 @@
+# backend/services/sitemap.py
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, NamedTuple, Optional, Set
+import logging
+import time
+import zlib
+from anyio import to_thread
+from lxml import etree
+from .scraper import WebScraper
+
+# Sitemaps are capped at 50 MB uncompressed by the protocol
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+# Entries checked against the HTTP cache at once while a sitemap is streaming
+DUE_BATCH = 500
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+class SitemapEntry(NamedTuple):
+    url: str
+    lastmod: Optional[float]  # Unix timestamp
+
+class SitemapBatch(NamedTuple):
+    sitemap_url: str
+    entries: List[SitemapEntry]
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a W3C datetime (<lastmod>) into a Unix timestamp.
+
+    Accepts dates ("2025-03-01") and datetimes with or without a timezone
+    ("2025-03-01T10:00:00Z", "2025-03-01T10:00+01:00"); naive values are UTC.
+
+    Returns:
+        Timestamp, or None when missing or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def _localname(tag) -> str:
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+class SitemapReader:
+    """
+    Streaming reader for sitemap.xml and sitemap index files.
+
+    Sitemaps are parsed incrementally as bytes arrive (lxml pull parser) and
+    processed elements are freed, so memory stays flat however large the
+    file is. With a cache scope, only pages that changed since they were last
+    indexed are returned, so a recrawl cycle costs what changed rather than
+    the size of the site.
+    """
+
+    def __init__(self, scraper: WebScraper, max_sitemaps: int = 200):
+        """
+        Initialize the SitemapReader.
+
+        Args:
+            scraper: WebScraper whose HTTP client and cache are used
+            max_sitemaps: Maximum number of sitemap files read per call (index files included)
+        """
+        self.scraper = scraper
+        self.max_sitemaps = max_sitemaps
+        self.logger = logging.getLogger(__name__)
+
+    async def _read(self, sitemap_url: str) -> AsyncIterator[tuple]:
+        """Yield ("url" | "sitemap", SitemapEntry) in document order while downloading."""
+        parser = etree.XMLPullParser(events=("end",), resolve_entities=False, no_network=True)
+        # Gzip is told from the body, not the URL: httpx already undoes Content-Encoding,
+        # so a .gz sitemap served with Content-Encoding: gzip arrives as plain XML
+        head = b""
+        decompressor = None
+        received = 0
+
+        client = await self.scraper._get_client()
+        async with client.stream("GET", sitemap_url, headers={"User-Agent": self.scraper.user_agent}) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                if head is not None:
+                    head += chunk
+                    if len(head) < len(GZIP_MAGIC):
+                        continue
+                    if head.startswith(GZIP_MAGIC):
+                        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                    chunk, head = head, None
+                if decompressor is not None:
+                    chunk = decompressor.decompress(chunk)
+                received += len(chunk)
+                if received > MAX_SITEMAP_BYTES:
+                    raise ValueError(f"Sitemap exceeds {MAX_SITEMAP_BYTES} bytes: {sitemap_url}")
+                parser.feed(chunk)
+                for item in self._drain(parser):
+                    yield item
+        if head:
+            parser.feed(head)
+        parser.close()
+        for item in self._drain(parser):
+            yield item
+
+    @staticmethod
+    def _drain(parser) -> List[tuple]:
+        items = []
+        for _, element in parser.read_events():
+            kind = _localname(element.tag)
+            if kind not in ("url", "sitemap"):
+                continue
+            loc = lastmod = None
+            for child in element:
+                name = _localname(child.tag)
+                if name == "loc":
+                    loc = (child.text or "").strip()
+                elif name == "lastmod":
+                    lastmod = parse_lastmod(child.text)
+            if loc:
+                items.append((kind, SitemapEntry(loc, lastmod)))
+            # Free the entry and everything parsed before it
+            element.clear()
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+        return items
+
+    async def _due(
+        self,
+        entries: List[SitemapEntry],
+        cache_scope: Optional[str],
+        max_age: Optional[float],
+        now: float
+    ) -> List[SitemapEntry]:
+        """
+        Select entries to (re)fetch: never fetched, <lastmod> newer than the last
+        fetch, or without <lastmod> and last fetched longer than max_age ago.
+        """
+        if cache_scope is None or self.scraper.cache is None or not entries:
+            return entries
+        fetched = await to_thread.run_sync(self.scraper.cache.fetched_at, cache_scope, [entry.url for entry in entries])
+        due = []
+        for entry in entries:
+            last = fetched.get(entry.url)
+            if last is None:
+                due.append(entry)
+            elif entry.lastmod is not None:
+                if entry.lastmod > last:
+                    due.append(entry)
+            elif max_age is not None and now - last > max_age:
+                due.append(entry)
+        return due
+
+    async def mark_read(self, cache_scope: Optional[str], sitemap_url: str) -> None:
+        """
+        Record that every due page of a sitemap was indexed.
+
+        Until then the sitemap is re-read even when its <lastmod> in the index
+        file is older, so pages left over by a capped or failed cycle are not lost.
+        """
+        if cache_scope is not None and self.scraper.cache is not None:
+            await to_thread.run_sync(self.scraper.cache.put_many, cache_scope, [(sitemap_url, None, None, None, None)])
+
+    async def _unchanged_children(self, children: List[SitemapEntry], cache_scope: Optional[str]) -> Set[str]:
+        if cache_scope is None or self.scraper.cache is None or not children:
+            return set()
+        fetched = await to_thread.run_sync(self.scraper.cache.fetched_at, cache_scope, [child.url for child in children])
+        return {
+            child.url for child in children
+            if child.lastmod is not None and child.url in fetched and child.lastmod <= fetched[child.url]
+        }
+
+    async def iter_due(
+        self,
+        sitemap_urls: List[str],
+        cache_scope: Optional[str] = None,
+        max_age: Optional[float] = None
+    ) -> AsyncIterator[SitemapBatch]:
+        """
+        Read sitemaps (following index files) and yield pages due for indexing.
+
+        Args:
+            sitemap_urls: sitemap.xml or sitemap index URLs
+            cache_scope: HTTP cache scope (collection) holding when pages were last indexed;
+                without it every listed page is due
+            max_age: Seconds after which pages without <lastmod> are revalidated
+                (None never revalidates them once indexed)
+
+        Yields:
+            SitemapBatch of due pages per sitemap, after that sitemap has been fully
+            read; call mark_read() once they are indexed
+        """
+        queue = list(dict.fromkeys(sitemap_urls))
+        seen: Set[str] = set(queue)
+        read = 0
+        now = time.time()
+
+        while queue and read < self.max_sitemaps:
+            sitemap_url = queue.pop(0)
+            read += 1
+            pending: List[SitemapEntry] = []
+            due: List[SitemapEntry] = []
+            children: List[SitemapEntry] = []
+            listed = 0
+            try:
+                async for kind, entry in self._read(sitemap_url):
+                    if kind == "sitemap":
+                        children.append(entry)
+                        continue
+                    listed += 1
+                    pending.append(entry)
+                    if len(pending) >= DUE_BATCH:
+                        due.extend(await self._due(pending, cache_scope, max_age, now))
+                        pending = []
+                due.extend(await self._due(pending, cache_scope, max_age, now))
+            except Exception as e:
+                self.logger.warning(f"⚠️ Failed to read sitemap {sitemap_url}: {e}")
+                continue
+
+            # Child sitemaps whose <lastmod> predates our last complete pass are skipped
+            unchanged = await self._unchanged_children(children, cache_scope)
+            for child in children:
+                if child.url not in seen and child.url not in unchanged:
+                    seen.add(child.url)
+                    queue.append(child.url)
+
+            self.logger.info(
+                f"🗺️ Sitemap {sitemap_url}: {listed} pages, {len(due)} due, "
+                f"{len(children) - len(unchanged)}/{len(children)} child sitemaps changed"
+            )
+            if due:
+                yield SitemapBatch(sitemap_url, due)
+            elif listed:
+                await self.mark_read(cache_scope, sitemap_url)
+
+        if queue:
+            self.logger.warning(f"⚠️ Stopped after {self.max_sitemaps} sitemaps; {len(queue)} left for the next run")
@@ -0,0 +1,170 @@
+# backend/services/suggested_questions.py
+from typing import List, Dict, Optional
+import asyncio
+import json
+import logging
+import threading
+from anyio import to_thread
+from .gemini_client import GeminiClient
+
+class SuggestedQuestionsService:
+    """
+    Generates suggested questions as a background step of ingestion.
+
+    Ingestion records a short excerpt of every parsed document per session;
+    generation runs off the request path and the result is kept in memory, so
+    the endpoint answers without re-uploading or re-parsing anything.
+    """
+
+    def __init__(self, gemini_client: GeminiClient, excerpt_chars: int = 3000, max_prompt_chars: int = 12000):
+        """
+        Initialize the suggested questions service.
+
+        Args:
+            gemini_client: Client used to generate the questions
+            excerpt_chars: Characters kept from the start of each document
+            max_prompt_chars: Upper bound on document text sent in one prompt
+        """
+        self.gemini_client = gemini_client
+        self.excerpt_chars = excerpt_chars
+        self.max_prompt_chars = max_prompt_chars
+        self.logger = logging.getLogger(__name__)
+
+        # Excerpts are recorded from indexing worker threads
+        self._lock = threading.Lock()
+        self._excerpts: Dict[str, Dict[str, str]] = {}
+        self._questions: Dict[str, List[str]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def record_document(self, session_id: str, source: str, text: str) -> None:
+        """
+        Keep the opening excerpt of a parsed document for later generation.
+
+        Args:
+            session_id: Session the document was ingested into
+            source: File name or URL of the document
+            text: Parsed text of this document
+        """
+        excerpt = (text or "").strip()[:self.excerpt_chars]
+        if not excerpt:
+            return
+        with self._lock:
+            self._excerpts.setdefault(session_id, {})[source] = excerpt
+
+    def has_documents(self, session_id: str) -> bool:
+        with self._lock:
+            return bool(self._excerpts.get(session_id))
+
+    def is_generating(self, session_id: str) -> bool:
+        task = self._tasks.get(session_id)
+        return task is not None and not task.done()
+
+    def build_prompt(self, session_id: str, history: Optional[List[Dict[str, str]]] = None) -> str:
+        """
+        Build the generation prompt from the session's recorded excerpts.
+
+        Args:
+            session_id: Session to build the prompt for
+            history: Conversation history; recent bot messages are included as context
+
+        Returns:
+            Prompt string for Gemini
+        """
+        with self._lock:
+            excerpts = list(self._excerpts.get(session_id, {}).values())
+
+        # Share the prompt budget evenly so every document is represented
+        per_document = self.max_prompt_chars // max(len(excerpts), 1)
+        all_text = "\n\n".join(excerpt[:per_document] for excerpt in excerpts)
+
+        query_object = {
+            "task": "generate suggested questions based on the provided text",
+            "size": "short not more than 1 line without numbering",
+            "length": "10 words",
+            "tone": "questionnaire and informative",
+            "example": "What courses are available?, How to apply for admission?, What is the tuition fee?, Are there scholarships?, What hostel facilities are available?"
+        }
+
+        formatted_query = json.dumps(query_object, indent=2)
+        previous_context = "\n".join(msg["content"] for msg in (history or [])[-5:] if msg["role"] == "bot")
+        combined_context = previous_context + "\n" + all_text
+
+        return f"""Based on the following text from a university brochure,
+{formatted_query}
+suggest 5 relevant questions a student might ask:\n\n{combined_context}"""
+
+    def schedule(self, session_id: str, history: Optional[List[Dict[str, str]]] = None) -> Optional[asyncio.Task]:
+        """
+        Start background generation for a session. Must be called from the event loop.
+        A newer schedule for the same session supersedes any generation in flight.
+
+        Args:
+            session_id: Session to generate questions for
+            history: Conversation history at ingestion time
+
+        Returns:
+            The background task, or None if no documents were recorded
+        """
+        if not self.has_documents(session_id):
+            self.logger.warning(f"⚠️ No document text recorded for session {session_id}")
+            return None
+
+        prompt = self.build_prompt(session_id, history)
+        task = asyncio.create_task(self._generate(session_id, prompt))
+        self._tasks[session_id] = task
+        return task
+
+    async def _generate(self, session_id: str, prompt: str) -> List[str]:
+        # Only the latest scheduled generation may publish its result
+        is_latest = lambda: self._tasks.get(session_id) is asyncio.current_task()
+        try:
+            questions = await to_thread.run_sync(
+                lambda: self.gemini_client.generate_suggested_questions(prompt)
+            )
+            questions = [q.strip() for q in questions if q.strip()]
+            if is_latest():
+                self._questions[session_id] = questions
+                self.logger.info(f"✅ Generated {len(questions)} suggested questions for session {session_id}")
+            return questions
+        finally:
+            if is_latest():
+                del self._tasks[session_id]
+
+    async def get_questions(self, session_id: str, timeout: float = 30.0) -> Optional[List[str]]:
+        """
+        Return the stored questions, waiting for an in-flight generation if needed.
+
+        Args:
+            session_id: Session to look up
+            timeout: Seconds to wait for a generation in flight
+
+        Returns:
+            List of questions, or None if nothing was generated for the session
+            or the generation is still running after timeout (see is_generating)
+        """
+        task = self._tasks.get(session_id)
+        if task is not None:
+            try:
+                # Shield so a client giving up doesn't cancel the shared generation
+                return await asyncio.wait_for(asyncio.shield(task), timeout)
+            except asyncio.TimeoutError:
+                self.logger.warning(f"⚠️ Suggested questions for session {session_id} still generating")
+                return None
+            except Exception as e:
+                self.logger.error(f"❌ Suggested questions generation failed for session {session_id}: {e}")
+                return None
+        return self._questions.get(session_id)
+
+    def clear(self, session_id: str) -> None:
+        """
+        Drop all stored excerpts and questions for a session.
+
+        Args:
+            session_id: Session to clear
+        """
+        with self._lock:
+            self._excerpts.pop(session_id, None)
+        self._questions.pop(session_id, None)
+        task = self._tasks.pop(session_id, None)
+        if task is not None:
+            task.cancel()
@@ -0,0 +1,152 @@
+# test_dedup.py
+# Run from backend/: python -m pytest services/testing/test_dedup.py
+from services.dedup import NearDuplicateFilter
+
+BOILERPLATE = (
+    "Northfield University is accredited by the Higher Learning Commission. "
+    "Contact the registrar's office at registrar@northfield.edu for transcripts and enrollment records. "
+    "The office is open Monday to Friday from nine to five, except on university holidays, "
+    "and requests submitted online are usually processed within three business days."
+)
+BOILERPLATE_VARIANT = BOILERPLATE.replace("transcripts and", "transcripts, diplomas and")
+ADMISSIONS = (
+    "Applications for the fall semester open on the first of October and close in mid January. "
+    "Late applications are reviewed on a rolling basis while seats remain."
+)
+HOUSING = (
+    "First-year students live on campus in one of six residence halls. "
+    "Room assignments are sent in July together with roommate contact details."
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def chunk(text, source):
+    return {"text": text, "source": source}
+
+
+def index(dedup, collection, chunks, replaceable=False):
+    result = dedup.filter(collection, chunks, replaceable)
+    dedup.commit(collection, result)
+    return result
+
+
+def test_batch_duplicates_are_merged_into_the_kept_chunk():
+    dedup = NearDuplicateFilter()
+    result = dedup.filter("c", [
+        chunk(BOILERPLATE, "a.pdf"),
+        chunk(ADMISSIONS, "a.pdf"),
+        chunk(BOILERPLATE, "b.pdf"),
+        chunk(BOILERPLATE_VARIANT, "c.pdf"),
+    ])
+
+    assert [c["text"] for c in result.kept] == [BOILERPLATE, ADMISSIONS]
+    assert result.removed == 2
+    assert result.kept[0]["duplicate_sources"] == ["b.pdf", "c.pdf"]
+
+
+def test_filter_does_not_index_until_commit():
+    dedup = NearDuplicateFilter()
+    dedup.filter("c", [chunk(ADMISSIONS, "a.pdf")])
+    assert dedup.filter("c", [chunk(ADMISSIONS, "a.pdf")]).removed == 0
+
+    index(dedup, "c", [chunk(ADMISSIONS, "a.pdf")])
+    result = dedup.filter("c", [chunk(ADMISSIONS, "b.pdf"), chunk(HOUSING, "b.pdf")])
+    assert [c["text"] for c in result.kept] == [HOUSING]
+
+
+def test_collections_are_independent():
+    dedup = NearDuplicateFilter()
+    index(dedup, "c1", [chunk(ADMISSIONS, "a.pdf")])
+    assert dedup.filter("c2", [chunk(ADMISSIONS, "a.pdf")]).removed == 0
+
+
+def test_remove_sources_forgets_only_their_chunks():
+    dedup = NearDuplicateFilter()
+    index(dedup, "c", [chunk(ADMISSIONS, "a.pdf"), chunk(HOUSING, "b.pdf")])
+
+    dedup.remove_sources("c", ["a.pdf"])
+    result = dedup.filter("c", [chunk(ADMISSIONS, "x.pdf"), chunk(HOUSING, "x.pdf")])
+    assert [c["text"] for c in result.kept] == [ADMISSIONS]
+
+
+def test_replaceable_chunks_do_not_hide_other_sources():
+    dedup = NearDuplicateFilter()
+    index(dedup, "c", [chunk(BOILERPLATE, "https://e.x/a")], replaceable=True)
+
+    # Another page keeps its own copy: page a may be deleted and re-indexed on its own
+    result = index(dedup, "c", [chunk(BOILERPLATE, "https://e.x/b")], replaceable=True)
+    assert result.removed == 0
+    # ... and so does an uploaded document
+    assert dedup.filter("c", [chunk(BOILERPLATE, "a.pdf")]).removed == 0
+
+    # Repeats within the same page are still dropped
+    assert dedup.filter("c", [chunk(BOILERPLATE_VARIANT, "https://e.x/a")], replaceable=True).removed == 1
+
+
+def test_permanent_chunks_hide_replaceable_duplicates():
+    dedup = NearDuplicateFilter()
+    index(dedup, "c", [chunk(BOILERPLATE, "a.pdf")])
+    result = dedup.filter("c", [chunk(BOILERPLATE, "https://e.x/a"), chunk(HOUSING, "https://e.x/a")], replaceable=True)
+    assert [c["text"] for c in result.kept] == [HOUSING]
+
+
+def test_replaceable_batch_duplicates_are_merged_per_source():
+    dedup = NearDuplicateFilter()
+    result = dedup.filter("c", [
+        chunk(BOILERPLATE, "https://e.x/a"),
+        chunk(BOILERPLATE, "https://e.x/a"),
+        chunk(BOILERPLATE, "https://e.x/b"),
+    ], replaceable=True)
+    assert [c["source"] for c in result.kept] == ["https://e.x/a", "https://e.x/b"]
+
+
+def test_remove_sources_drops_a_replaced_page_scope():
+    dedup = NearDuplicateFilter()
+    index(dedup, "c", [chunk(ADMISSIONS, "https://e.x/a")], replaceable=True)
+    assert dedup.filter("c", [chunk(ADMISSIONS, "https://e.x/a")], replaceable=True).removed == 1
+
+    dedup.remove_sources("c", ["https://e.x/a"])
+    assert dedup.filter("c", [chunk(ADMISSIONS, "https://e.x/a")], replaceable=True).removed == 0
+
+
+def test_clear_forgets_the_collection():
+    dedup = NearDuplicateFilter()
+    index(dedup, "c", [chunk(ADMISSIONS, "a.pdf")])
+    index(dedup, "c", [chunk(HOUSING, "https://e.x/a")], replaceable=True)
+
+    dedup.clear("c")
+    assert dedup.filter("c", [chunk(ADMISSIONS, "a.pdf")]).removed == 0
+    assert dedup.filter("c", [chunk(HOUSING, "https://e.x/a")], replaceable=True).removed == 0
+
+
+def test_least_recently_used_collection_is_evicted():
+    dedup = NearDuplicateFilter(max_collections=2)
+    index(dedup, "c1", [chunk(ADMISSIONS, "a.pdf")])
+    index(dedup, "c2", [chunk(ADMISSIONS, "a.pdf")])
+    dedup.filter("c1", [])  # c1 used more recently than c2
+    index(dedup, "c3", [chunk(ADMISSIONS, "a.pdf")])
+
+    assert dedup.filter("c1", [chunk(ADMISSIONS, "a.pdf")]).removed == 1
+    assert dedup.filter("c2", [chunk(ADMISSIONS, "a.pdf")]).removed == 0
+
+
+def test_idle_collections_are_evicted():
+    clock = FakeClock()
+    dedup = NearDuplicateFilter(idle_ttl=60, clock=clock)
+    index(dedup, "idle", [chunk(ADMISSIONS, "a.pdf")])
+    index(dedup, "busy", [chunk(ADMISSIONS, "a.pdf")])
+
+    clock.now = 50
+    dedup.filter("busy", [])
+    clock.now = 100
+    dedup.filter("other", [])
+
+    assert dedup.filter("busy", [chunk(ADMISSIONS, "a.pdf")]).removed == 1
+    assert dedup.filter("idle", [chunk(ADMISSIONS, "a.pdf")]).removed == 0
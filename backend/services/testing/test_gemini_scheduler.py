@@ -0,0 +1,203 @@
+# test_gemini_scheduler.py
+# Run from backend/: python -m pytest services/testing/test_gemini_scheduler.py
+import threading
+import time
+
+import pytest
+
+from services import gemini_scheduler
+from services.gemini_scheduler import GeminiScheduler, Priority, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class QuotaError(Exception):
+    def __init__(self):
+        super().__init__("429 Resource has been exhausted (e.g. check quota).")
+
+
+@pytest.fixture(autouse=True)
+def full_backoff(monkeypatch):
+    # Jitter always picks the upper bound, so backoff delays are exact
+    monkeypatch.setattr(gemini_scheduler.random, "uniform", lambda low, high: high)
+
+
+def run_bounded(target, timeout: float = 5.0):
+    """Run target in a thread; a scheduler that never admits fails the test instead of hanging it."""
+    outcome = {}
+
+    def runner():
+        try:
+            outcome["result"] = target()
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "scheduler did not admit the call"
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def test_token_bucket_refills_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_sec=10, capacity=20, clock=clock)
+    bucket.consume(25)
+
+    assert bucket.time_until(10, clock()) == pytest.approx(1.5)
+    clock.now = 1.5
+    assert bucket.time_until(10, clock()) == 0.0
+    clock.now = 100
+    bucket.time_until(0, clock())
+    assert bucket.tokens == 20
+
+
+def test_queued_calls_are_admitted_in_priority_order():
+    clock = FakeClock()
+    scheduler = GeminiScheduler(max_concurrency=1, clock=clock, sleep=clock.sleep)
+    blocker = scheduler.acquire(Priority.INTERACTIVE, 10)
+
+    admitted = []
+
+    def call(priority):
+        ticket = scheduler.acquire(priority, 10)
+        admitted.append(priority)
+        scheduler.release(ticket)
+
+    threads = []
+    for queued, priority in enumerate([Priority.BACKGROUND, Priority.INTERACTIVE, Priority.INTERACTIVE_STREAM], start=1):
+        thread = threading.Thread(target=call, args=(priority,), daemon=True)
+        thread.start()
+        threads.append(thread)
+        wait_for(lambda: sum(scheduler.snapshot()["queue_depth"].values()) == queued)
+
+    scheduler.release(blocker)
+    for thread in threads:
+        thread.join(5)
+
+    assert admitted == [Priority.INTERACTIVE_STREAM, Priority.INTERACTIVE, Priority.BACKGROUND]
+    assert scheduler.snapshot()["in_flight"] == 0
+
+
+def test_blocked_head_also_blocks_lower_priorities():
+    clock = FakeClock()
+    scheduler = GeminiScheduler(tokens_per_minute=600, clock=clock, sleep=clock.sleep)
+    scheduler.token_bucket.consume(600)
+    with scheduler._cond:
+        scheduler._queue = []
+        for priority, tokens in [(Priority.INTERACTIVE, 100), (Priority.BACKGROUND, 1)]:
+            ticket = gemini_scheduler._Ticket(priority, tokens, clock())
+            scheduler._queue.append((int(priority), next(scheduler._seq), ticket))
+            scheduler._queue_depth[priority] += 1
+
+        # The background call would fit after 0.1s, but waits the 10s the interactive one needs
+        assert scheduler._admit_locked() == pytest.approx(10.0)
+        clock.now = 10.0
+        assert scheduler._admit_locked() == pytest.approx(0.1)
+    assert scheduler.snapshot()["admitted"] == {"interactive_stream": 0, "interactive": 1, "background": 0}
+
+
+def test_quota_error_pauses_admission_until_the_bucket_refills():
+    clock = FakeClock()
+    scheduler = GeminiScheduler(requests_per_minute=60, base_backoff=2.0, clock=clock)
+    calls = []
+    waits = []
+
+    def call():
+        calls.append(clock())
+        if len(calls) == 1:
+            raise QuotaError()
+        return "ok"
+
+    def sleep(seconds):
+        # Right after the 429: admissions are paused and the request bucket is empty
+        now = clock()
+        waits.append((seconds, scheduler._cooldown_until - now, scheduler.request_bucket.time_until(1, now)))
+        clock.sleep(seconds)
+
+    scheduler.sleep = sleep
+    assert run_bounded(lambda: scheduler.submit(call, Priority.INTERACTIVE, 10)) == "ok"
+
+    assert waits == [(2.0, 2.0, pytest.approx(1.0))]
+    assert calls == [0.0, 2.0]
+    assert scheduler.request_bucket.tokens == pytest.approx(0.0)
+    snapshot = scheduler.snapshot()
+    assert (snapshot["retries"], snapshot["quota_errors"], snapshot["failures"]) == (1, 1, 0)
+
+
+def test_cooldown_holds_other_callers_back():
+    clock = FakeClock()
+    scheduler = GeminiScheduler(clock=clock, sleep=clock.sleep)
+    scheduler._backoff(0, QuotaError())
+
+    with scheduler._cond:
+        scheduler._queue = [(int(Priority.INTERACTIVE_STREAM), next(scheduler._seq),
+                             gemini_scheduler._Ticket(Priority.INTERACTIVE_STREAM, 10, clock()))]
+        scheduler._queue_depth[Priority.INTERACTIVE_STREAM] += 1
+        assert scheduler._admit_locked() == pytest.approx(1.0)
+        clock.now = 1.0
+        assert scheduler._admit_locked() == 0.0
+    assert scheduler.snapshot()["in_flight"] == 1
+
+
+def test_stream_retries_an_error_before_the_first_chunk():
+    clock = FakeClock()
+    scheduler = GeminiScheduler(clock=clock, sleep=clock.sleep)
+    opened = []
+
+    def open_stream():
+        opened.append(clock())
+        if len(opened) == 1:
+            raise QuotaError()
+        return iter(["Hello", " world"])
+
+    chunks = run_bounded(lambda: list(scheduler.stream(open_stream, Priority.INTERACTIVE_STREAM, 10)))
+
+    assert chunks == ["Hello", " world"]
+    assert opened == [0.0, 1.0]
+    assert scheduler.snapshot()["retries"] == 1
+
+
+def test_stream_is_not_retried_once_a_chunk_was_yielded():
+    clock = FakeClock()
+    scheduler = GeminiScheduler(clock=clock, sleep=clock.sleep)
+    opened = []
+    received = []
+
+    def open_stream():
+        opened.append(clock())
+
+        def chunks():
+            yield "Hello"
+            raise QuotaError()
+        return chunks()
+
+    def consume():
+        for chunk in scheduler.stream(open_stream, Priority.INTERACTIVE_STREAM, 10):
+            received.append(chunk)
+
+    with pytest.raises(QuotaError):
+        run_bounded(consume)
+
+    assert received == ["Hello"]
+    assert len(opened) == 1
+    snapshot = scheduler.snapshot()
+    assert (snapshot["retries"], snapshot["failures"], snapshot["in_flight"]) == (0, 1, 0)
@@ -7,10 +7,11 @@ from typing import List, Dict, Optional
 from datetime import datetime
 from dotenv import load_dotenv
 from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct, Distance, VectorParams
+from qdrant_client.models import PointStruct, Distance, VectorParams, Filter, FieldCondition, MatchAny, FilterSelector
 from langsmith import traceable
 import logging
 from config.app_config import AppConfig
+from utils.metrics import SEARCH_MS, UPLOAD_MS, UPLOAD_POINTS
 
 # Load environment variables
 load_dotenv()
@@ -22,25 +23,29 @@ class QdrantVectorStore:
     """
     
     #def __init__(self, url: Optional[str] = None, api_key: Optional[str] = None):
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, client: Optional[QdrantClient] = None):
         """
         Initialize the Qdrant vector store client.
         
         Args:
-            url: Qdrant server URL (defaults to QDRANT_URL env var)
-            api_key: Qdrant API key (defaults to QDRANT_API_KEY env var)
+            config: Application configuration (provides Qdrant URL and API key)
+            client: Optional pre-built client, e.g. QdrantClient(location=":memory:")
+                for offline load testing. Skips the URL check when given.
         """
         self.url = config.qdrant_url
         self.api_key = config.qdrant_api_key
-        self.client = QdrantClient(url=self.url, api_key=self.api_key)
+        self.logger = logging.getLogger(__name__)
         # self.url = url or os.getenv("QDRANT_URL")
         # self.api_key = api_key or os.getenv("QDRANT_API_KEY")
         
+        if client is not None:
+            self.client = client
+            return
+        
         if not self.url:
             raise ValueError("Qdrant URL must be provided or set in QDRANT_URL environment variable")
         
-        # self.client = QdrantClient(url=self.url, api_key=self.api_key)
-        self.logger = logging.getLogger(__name__)
+        self.client = QdrantClient(url=self.url, api_key=self.api_key)
     
     def generate_collection_name(self, prefix: str = "user-session") -> str:
         """
@@ -108,6 +113,7 @@ class QdrantVectorStore:
         if len(embeddings) != len(metadata):
             raise ValueError("Number of embeddings must match number of metadata entries")
         
+        upload_start = time.perf_counter()
         timestamp = datetime.utcnow().isoformat()
         points = [
             PointStruct(
@@ -136,6 +142,9 @@ class QdrantVectorStore:
             else:
                 self.logger.error(f"🚫 Giving up on batch {batch_num} after {max_retries} attempts")
 
+        UPLOAD_MS.observe((time.perf_counter() - upload_start) * 1000)
+        UPLOAD_POINTS.inc(total_uploaded)
+
         if log_collection_size:
             try:
                 count = self.client.count(collection_name=collection_name, exact=True).count
@@ -166,13 +175,14 @@ class QdrantVectorStore:
             List of matching metadata entries
         """
         try:
-            results = self.client.search(
-                collection_name=collection_name,
-                query_vector=query_embedding.tolist(),
-                limit=top_k,
-                with_payload=True,
-                score_threshold=score_threshold
-            )
+            with SEARCH_MS.time():
+                results = self.client.search(
+                    collection_name=collection_name,
+                    query_vector=query_embedding.tolist(),
+                    limit=top_k,
+                    with_payload=True,
+                    score_threshold=score_threshold
+                )
             return [r.payload for r in results]
         except Exception as e:
             self.logger.error(f"❌ Search failed for collection {collection_name}: {e}")
@@ -196,6 +206,40 @@ class QdrantVectorStore:
             self.logger.error(f"❌ Failed to delete collection {collection_name}: {e}")
             return False
     
+    def delete_points_by_source(self, collection_name: str, sources: List[str], batch_size: int = 100) -> bool:
+        """
+        Deletes all points whose payload "source" is one of the given sources,
+        e.g. before re-indexing pages whose content changed.
+        
+        Args:
+            collection_name: Name of the collection
+            sources: Source values (file names or URLs) to remove
+            batch_size: Number of sources per delete request
+            
+        Returns:
+            True if deletion was successful, False otherwise
+        """
+        if not sources or not self.collection_exists(collection_name):
+            return True
+        
+        try:
+            for i in range(0, len(sources), batch_size):
+                self.client.delete(
+                    collection_name=collection_name,
+                    points_selector=FilterSelector(
+                        filter=Filter(must=[FieldCondition(key="source", match=MatchAny(any=sources[i:i + batch_size]))])
+                    )
+                )
+            self.logger.info(f"🧹 Deleted points of {len(sources)} source(s) from '{collection_name}'")
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ Failed to delete points by source in {collection_name}: {e}")
+            return False
+    
+    def warmup(self) -> None:
+        """Open the connection to Qdrant (raises if it is unreachable)."""
+        self.client.get_collections()
+    
     def collection_exists(self, collection_name: str) -> bool:
         """
         Check if a collection exists.
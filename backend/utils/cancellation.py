@@ -0,0 +1,56 @@
+# utils/cancellation.py
+import threading
+from typing import Callable, List
+
+class GenerationCancelled(Exception):
+    """Raised when work is abandoned because its CancellationToken was cancelled."""
+
+class CancellationToken:
+    """
+    Thread-safe cancellation flag with callbacks.
+
+    Callbacks let blocked work be interrupted (e.g. cancelling an upstream
+    stream a worker thread is waiting on) instead of only being noticed at the
+    next poll.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """Register a callback; runs immediately if already cancelled."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise GenerationCancelled()
+
+    def wait(self, timeout: float) -> bool:
+        return self._event.wait(timeout)
@@ -0,0 +1,201 @@
+# utils/metrics.py
+"""
+Minimal in-process metrics with Prometheus text exposition.
+
+Kept dependency-free and cheap (one lock + bisect per observation) so hot
+paths can be timed unconditionally, independent of LangSmith tracing.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+MS_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+RATE_BUCKETS = (1, 5, 10, 25, 50, 100, 200, 400, 800, 1600)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = MS_BUCKETS, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the elapsed wall time of the block in milliseconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe((time.perf_counter() - start) * 1000, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        lines = self.header()
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Gauge or counter whose value is read from a callback at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Union[float, Dict[str, float]]],
+        kind: str = "gauge",
+        labelname: Optional[str] = None
+    ):
+        super().__init__(name, documentation, (labelname,) if labelname else ())
+        self.kind = kind
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        value = self.callback()
+        lines = self.header()
+        if isinstance(value, dict):
+            for label, v in value.items():
+                lines.append(f"{self.name}{_format_labels(self.labelnames, (label,))} {_format_value(v)}")
+        else:
+            lines.append(f"{self.name} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            # Re-registration (e.g. a second ServiceManager) replaces the previous metric
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float] = MS_BUCKETS, labelnames: Sequence[str] = ()) -> Histogram:
+        return self._register(Histogram(name, documentation, buckets, labelnames))
+
+    def callback(self, name: str, documentation: str, callback: Callable, kind: str = "gauge", labelname: Optional[str] = None) -> CallbackMetric:
+        return self._register(CallbackMetric(name, documentation, callback, kind, labelname))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                lines.append(f"# {metric.name} unavailable: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Retrieval
+RAG_QUERY_MS = REGISTRY.histogram("rag_query_ms", "End-to-end RAGService.query_rag latency in milliseconds")
+EMBED_MS = REGISTRY.histogram("embed_ms", "Embedder.get_embeddings encode latency in milliseconds")
+EMBED_TEXTS = REGISTRY.counter("embed_texts_total", "Texts encoded by the embedder")
+EMBED_TEXTS_PER_SEC = REGISTRY.histogram("embed_texts_per_second", "Embedder throughput of length-bucketed (ingestion) encode calls", RATE_BUCKETS)
+QUERY_EMBED_BATCH = REGISTRY.histogram("query_embed_batch_size", "Queries encoded together by the query embedding batcher", (1, 2, 4, 8, 16, 32, 64, 128))
+QUERY_EMBED_WAIT_MS = REGISTRY.histogram("query_embed_wait_ms", "Time a query waited in the embedding batcher queue in milliseconds")
+SEARCH_MS = REGISTRY.histogram("search_ms", "Qdrant search latency in milliseconds")
+UPLOAD_MS = REGISTRY.histogram("upload_points_ms", "Qdrant upload_points latency in milliseconds")
+UPLOAD_POINTS = REGISTRY.counter("upload_points_total", "Points uploaded to Qdrant")
+
+# Generation
+TTFT_MS = REGISTRY.histogram("ttft_ms", "Gemini time to first streamed token in milliseconds (includes scheduler wait)")
+TOKENS_PER_SEC = REGISTRY.histogram("gemini_tokens_per_second", "Gemini streaming output rate after the first token", RATE_BUCKETS)
+HEDGED_REQUESTS = REGISTRY.counter("gemini_hedged_requests_total", "Hedge requests sent after the first-token deadline passed")
+HEDGE_WINS = REGISTRY.counter("gemini_hedge_wins_total", "Hedge requests that produced the first token")
+CANCELLED_STREAMS = REGISTRY.counter("gemini_cancelled_streams_total", "Gemini streams aborted before completion (e.g. client disconnect)")
+
+# Web scraping
+SCRAPE_CACHE = REGISTRY.counter("scrape_cache_total", "Cached re-scrapes by outcome (not_modified, unchanged, changed, miss)", labelnames=("result",))
+SCRAPE_SKIPPED = REGISTRY.counter("scrape_skipped_total", "Scraped responses rejected or truncated (content_type, too_large, truncated)", labelnames=("reason",))
+DEDUP_REMOVED = REGISTRY.counter("dedup_removed_chunks_total", "Chunks dropped as exact or near duplicates before embedding")
+
+# Parsing
+PARSE_MS = REGISTRY.histogram("parse_ms", "Document parse latency in milliseconds", labelnames=("format",))
+PARSE_MS_PER_PAGE = REGISTRY.histogram("parse_ms_per_page", "Per-page parse latency in milliseconds", labelnames=("parser", "method"))
+OCR_PAGES = REGISTRY.counter("ocr_pages_total", "Pages or images that went through OCR", labelnames=("parser",))
@@ -192,10 +192,9 @@ export const useChat = () => {
         throw new Error('Upload failed');
       }
 
-      // ✅ Request suggested questions with session ID
+      // ✅ Request suggested questions with session ID (generated server-side during indexing)
       const suggestFormData = new FormData();
       suggestFormData.append("session_id", sessionId);
-      pdfFiles.forEach((file: File) => suggestFormData.append("files", file));
 
       const res = await fetch(`${API_BASE}/generate-suggested-questions`, {
         method: "POST",